@@ -2,11 +2,47 @@
 Core modules for OneNote Search Agent
 """
 from .conversation_state import ConversationState
+from .conversation_store import (
+    ConversationStore,
+    InMemoryConversationStore,
+    SQLiteConversationStore,
+    TaskRecord,
+)
+from .intent_router import Intent, IntentRouter
+from .llm import (
+    AzureOpenAIBackend,
+    AzureOpenAIEmbeddingBackend,
+    EmbeddingBackend,
+    ExtractiveBackend,
+    HashingEmbeddingBackend,
+    LLMBackend,
+)
+from .mcp_client import OneNoteMCPClient, RequestAuth
 from .onenote_agent import OneNoteSearchAgent
+from .retriever import ChunkIndex, Retriever
+from .summarizer import MapReduceSummarizer, PageSummaryCache
 from .executor import OneNoteSearchAgentExecutor
 
 __all__ = [
     'ConversationState',
+    'ConversationStore',
+    'InMemoryConversationStore',
+    'SQLiteConversationStore',
+    'TaskRecord',
+    'Intent',
+    'IntentRouter',
+    'AzureOpenAIBackend',
+    'AzureOpenAIEmbeddingBackend',
+    'EmbeddingBackend',
+    'ExtractiveBackend',
+    'HashingEmbeddingBackend',
+    'LLMBackend',
+    'OneNoteMCPClient',
+    'RequestAuth',
     'OneNoteSearchAgent',
+    'ChunkIndex',
+    'Retriever',
+    'MapReduceSummarizer',
+    'PageSummaryCache',
     'OneNoteSearchAgentExecutor',
 ]
@@ -0,0 +1,229 @@
+"""
+Conversation State Store
+タスクごとの対話状態の保存先（LRU・アイドルTTLで上限管理）
+"""
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .conversation_state import ConversationState
+
+
+@dataclass(slots=True)
+class TaskRecord:
+    """タスク1件分の対話状態（状態と選択中のノートブックをまとめて保持）"""
+
+    state: ConversationState = ConversationState.INITIAL
+    notebook_id: Optional[str] = None
+
+
+class ConversationStore(ABC):
+    """
+    対話状態ストアの共通インターフェース
+
+    最大件数を超えると最も長く使われていないタスクから、アイドルTTLを超えた
+    タスクはアクセス時に破棄する。
+    """
+
+    def __init__(self, max_tasks: int, idle_ttl: float):
+        """
+        Args:
+            max_tasks: 保持するタスク数の上限
+            idle_ttl: 最後のアクセスから破棄までの秒数
+        """
+        self.max_tasks = max_tasks
+        self.idle_ttl = idle_ttl
+        self.hits = 0
+        self.misses = 0
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        """タスクの状態を取得（存在しないか期限切れならNone）"""
+
+    @abstractmethod
+    def put(self, task_id: str, record: TaskRecord) -> None:
+        """タスクの状態を保存し、最終アクセス時刻を更新"""
+
+    @abstractmethod
+    def delete(self, task_id: str) -> None:
+        """タスクの状態を削除"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """保持しているタスク数"""
+
+    def stats(self) -> dict[str, Any]:
+        """サイズと破棄件数のメトリクス"""
+        return {
+            "size": len(self),
+            "max_tasks": self.max_tasks,
+            "hits": self.hits,
+            "misses": self.misses,
+            "lru_evictions": self.lru_evictions,
+            "ttl_evictions": self.ttl_evictions,
+        }
+
+    def close(self) -> None:
+        """バックエンドの資源を解放"""
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    プロセス内の対話状態ストア
+
+    OrderedDictをアクセス順に並べ、先頭（最も古いアクセス）から破棄するため、
+    すべての操作がO(1)（TTLによる破棄は償却O(1)）。
+    """
+
+    def __init__(self, max_tasks: int = 10000, idle_ttl: float = 3600.0):
+        super().__init__(max_tasks, idle_ttl)
+        self._records: OrderedDict[str, tuple[TaskRecord, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        """アイドルTTLを超えたタスクを先頭から破棄（呼び出し側でロック取得済み）"""
+        while self._records:
+            task_id, (_, touched) = next(iter(self._records.items()))
+            if now - touched < self.idle_ttl:
+                break
+            del self._records[task_id]
+            self.ttl_evictions += 1
+
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._records.get(task_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._records[task_id] = (entry[0], now)
+            self._records.move_to_end(task_id)
+            return TaskRecord(entry[0].state, entry[0].notebook_id)
+
+    def put(self, task_id: str, record: TaskRecord) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self._records[task_id] = (TaskRecord(record.state, record.notebook_id), now)
+            self._records.move_to_end(task_id)
+            while len(self._records) > self.max_tasks:
+                self._records.popitem(last=False)
+                self.lru_evictions += 1
+
+    def delete(self, task_id: str) -> None:
+        with self._lock:
+            self._records.pop(task_id, None)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    SQLiteによる共有対話状態ストア
+
+    同じデータベースファイルを参照する複数のエージェントレプリカから、同じ
+    タスクの状態を参照できる。最終アクセス時刻はwall clockで記録する。
+    期限切れのタスクは読み出し時に破棄し、上限超過分はまとめて削除する。
+    """
+
+    PURGE_EVERY = 100
+
+    def __init__(self, path: str, max_tasks: int = 10000, idle_ttl: float = 3600.0):
+        super().__init__(max_tasks, idle_ttl)
+        self.path = path
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "task_id TEXT PRIMARY KEY, state TEXT NOT NULL, notebook_id TEXT, touched_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS conversations_touched ON conversations (touched_at)"
+        )
+
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        with self._lock:
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT state, notebook_id, touched_at FROM conversations WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+            if row is not None and now - row[2] >= self.idle_ttl:
+                self._conn.execute("DELETE FROM conversations WHERE task_id = ?", (task_id,))
+                self.ttl_evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE conversations SET touched_at = ? WHERE task_id = ?", (now, task_id)
+            )
+            return TaskRecord(ConversationState(row[0]), row[1])
+
+    def put(self, task_id: str, record: TaskRecord) -> None:
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO conversations (task_id, state, notebook_id, touched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(task_id) DO UPDATE SET state = excluded.state, "
+                "notebook_id = excluded.notebook_id, touched_at = excluded.touched_at",
+                (task_id, record.state.value, record.notebook_id, now),
+            )
+            # 削除はtouched_atのインデックスを走査するため、PURGE_EVERY回の書き込みごとに実行
+            self._puts += 1
+            if self._puts % self.PURGE_EVERY == 0:
+                self._purge(now)
+
+    def _purge(self, now: float) -> None:
+        """期限切れと上限超過のタスクを削除（呼び出し側でロック取得済み）"""
+        self.ttl_evictions += self._conn.execute(
+            "DELETE FROM conversations WHERE touched_at <= ?", (now - self.idle_ttl,)
+        ).rowcount
+        self.lru_evictions += self._conn.execute(
+            "DELETE FROM conversations WHERE task_id IN ("
+            "SELECT task_id FROM conversations ORDER BY touched_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_tasks,),
+        ).rowcount
+
+    def delete(self, task_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM conversations WHERE task_id = ?", (task_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM conversations WHERE touched_at > ?",
+                (time.time() - self.idle_ttl,),
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_conversation_store() -> ConversationStore:
+    """
+    環境変数から対話状態ストアを生成
+
+    CONVERSATION_STORE_PATHを指定するとSQLite、省略時はプロセス内ストアを使用する。
+    """
+    max_tasks = int(os.getenv("CONVERSATION_MAX_TASKS", "10000"))
+    idle_ttl = float(os.getenv("CONVERSATION_IDLE_TTL", "3600"))
+    path = os.getenv("CONVERSATION_STORE_PATH")
+    if path:
+        return SQLiteConversationStore(path, max_tasks=max_tasks, idle_ttl=idle_ttl)
+    return InMemoryConversationStore(max_tasks=max_tasks, idle_ttl=idle_ttl)
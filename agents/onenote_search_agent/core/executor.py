@@ -2,19 +2,74 @@
 OneNote Search Agent Executor
 A2A protocol compliant agent executor implementation
 """
+import logging
+import time
+import uuid
+from typing import AsyncIterator, Iterable, Optional
+
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
+from a2a.server.tasks import TaskUpdater
+from a2a.types import AgentSkill, Part, TaskState, TextPart
+from a2a.utils import new_task
 
 from .conversation_state import ConversationState
+from .conversation_store import TaskRecord
+from .intent_router import SELECT_NOTEBOOK, Intent, IntentRouter
+from .mcp_client import RequestAuth
+from .metrics import TURN_ERRORS, TURN_LATENCY, TURNS, TURNS_IN_FLIGHT
 from .onenote_agent import OneNoteSearchAgent
 
+logger = logging.getLogger(__name__)
+
+
+def _request_auth(context: RequestContext) -> Optional[RequestAuth]:
+    """
+    リクエストからユーザーのアクセストークンとトレースコンテキストを取得
+
+    AuthorizationヘッダーのBearerトークン、またはメッセージメタデータの
+    access_tokenを使用する。
+
+    Args:
+        context: Request context
+
+    Returns:
+        RequestAuth（トークンがない場合はNone）
+    """
+    call_context = getattr(context, 'call_context', None)
+    headers = {}
+    if call_context is not None:
+        headers = {k.lower(): v for k, v in call_context.state.get('headers', {}).items()}
+    metadata = (context.message.metadata if context.message else None) or {}
+
+    token = metadata.get('access_token')
+    authorization = headers.get('authorization', '')
+    if not token and authorization.lower().startswith('bearer '):
+        token = authorization[len('bearer '):].strip()
+    if not token:
+        return None
+    return RequestAuth(
+        access_token=token,
+        traceparent=headers.get('traceparent') or metadata.get('traceparent'),
+        tracestate=headers.get('tracestate') or metadata.get('tracestate'),
+    )
+
 
 class OneNoteSearchAgentExecutor(AgentExecutor):
     """OneNote Search Agent Executor - A2A protocol compliant implementation"""
 
-    def __init__(self):
+    # ノートブック選択後に判定する操作（いずれにも一致しなければ検索）
+    OPERATIONS = ['search_all_notebooks', 'answer_question', 'summarize_content', 'extract_content']
+    # 横断検索の検索語から取り除くキーワードのスキル（起動キーワードと検索の動詞）
+    QUERY_TRIGGERS = ('search_all_notebooks', 'search_onenote')
+
+    def __init__(self, skills: Iterable[AgentSkill]):
+        """
+        Args:
+            skills: Agent card skills whose tags are compiled into the intent router
+        """
         self.agent = OneNoteSearchAgent()
+        self.router = IntentRouter.from_skills(skills)
 
     async def execute(
         self,
@@ -24,124 +79,212 @@ class OneNoteSearchAgentExecutor(AgentExecutor):
         """
         Execute OneNote search based on user input with multi-step conversation
 
+        The response is streamed as chunks of a result artifact while the
+        task is working; each turn ends in the input-required state so the
+        conversation can continue on the same task.
+
         Args:
             context: Request context containing user input and metadata
             event_queue: Queue for enqueueing response events
         """
-        # Get the user's input and task ID from the context
-        user_input = context.input_text or ""
-        task_id = getattr(context, 'task_id', 'default')
+        # Get the user's input and task from the context
+        user_input = context.get_user_input()
+        task = context.current_task
+        if task is None:
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
 
-        # 現在の対話状態を取得
-        current_state = self.agent.conversation_states.get(task_id, ConversationState.INITIAL)
+        auth = _request_auth(context)
+        if auth is None:
+            await updater.update_status(
+                TaskState.input_required,
+                updater.new_agent_message(
+                    [Part(root=TextPart(text="認証情報がありません。アクセストークンを指定してください。"))]
+                ),
+                final=True,
+            )
+            return
 
-        # 状態に応じた処理フロー
-        result = await self._handle_state(task_id, current_state, user_input)
+        await updater.start_work()
 
-        # ノートブック選択の処理（番号または名前での選択）
-        if current_state == ConversationState.INITIAL and task_id in self.agent.conversation_states:
-            selection_result = await self._handle_notebook_selection(task_id, user_input)
-            if selection_result:
-                result = selection_result
+        # 現在の対話状態を取得
+        record = self.agent.conversations.get(task.id) or TaskRecord()
+        state = record.state.value
 
-        # Enqueue the result as a text message event
-        await event_queue.enqueue_event(new_agent_text_message(result))
+        # 結果はアーティファクトのチャンクとして、得られた順に送信
+        artifact_id = str(uuid.uuid4())
+        append = False
+        in_flight = TURNS_IN_FLIGHT.labels()
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            async for chunk in self._handle_state(auth, task.id, record, user_input):
+                await updater.add_artifact(
+                    [Part(root=TextPart(text=chunk))],
+                    artifact_id=artifact_id,
+                    name='result',
+                    append=append,
+                    last_chunk=False,
+                )
+                append = True
+        except Exception as e:
+            TURN_ERRORS.labels(state).inc()
+            logger.exception(f"OneNote MCP call failed for task {task.id}")
+            await updater.add_artifact(
+                [Part(root=TextPart(text=f"\nOneNoteサーバーとの通信でエラーが発生しました: {e}"))],
+                artifact_id=artifact_id,
+                name='result',
+                append=append,
+                last_chunk=False,
+            )
+        finally:
+            TURN_LATENCY.labels(state).observe(time.perf_counter() - start)
+            in_flight.dec()
+        await updater.add_artifact(
+            [Part(root=TextPart(text=""))],
+            artifact_id=artifact_id,
+            name='result',
+            append=True,
+            last_chunk=True,
+        )
+        await updater.update_status(TaskState.input_required, final=True)
 
-    async def _handle_state(self, task_id: str, current_state: ConversationState, user_input: str) -> str:
+    async def _handle_state(
+        self, auth: RequestAuth, task_id: str, record: TaskRecord, user_input: str
+    ) -> AsyncIterator[str]:
         """
         状態に応じた処理を実行
 
         Args:
+            auth: ユーザーのアクセストークンとトレースコンテキスト
             task_id: タスクID
-            current_state: 現在の対話状態
+            record: 現在の対話状態
             user_input: ユーザー入力
 
-        Returns:
-            処理結果メッセージ
+        Yields:
+            処理結果メッセージのチャンク
         """
-        if current_state == ConversationState.INITIAL:
+        if record.state == ConversationState.INITIAL:
+            notebooks = await self.agent.get_notebooks(auth)
+            intents = self.router.route(user_input, notebooks)
+
+            # ノートブック選択の処理（番号または名前での選択）
+            selection_result = self._handle_notebook_selection(task_id, notebooks, user_input, intents)
+            if selection_result:
+                TURNS.labels(record.state.value, 'select_notebook').inc()
+                yield selection_result
+                return
+
+            # ノートブックを選ばずにすべてのノートブックを横断検索
+            if any(intent.name == 'search_all_notebooks' for intent in intents):
+                TURNS.labels(record.state.value, 'search_all_notebooks').inc()
+                # 「すべてのノートブックから」などの起動キーワードを除いた検索語で検索
+                query = self.router.strip_keywords(user_input, self.QUERY_TRIGGERS)
+                async for chunk in self.agent.search_all_notebooks(auth, query, notebooks):
+                    yield chunk
+                self.agent.conversations.put(task_id, TaskRecord())
+                return
+
             # Step 1: ノートブック一覧を取得するか、直接検索かを判定
-            if any(keyword in user_input.lower() for keyword in ['ノートブック', 'notebook', '一覧', 'list']):
-                # ノートブック一覧を表示
-                result = await self.agent.list_notebooks()
-                self.agent.conversation_states[task_id] = ConversationState.INITIAL
-            else:
+            TURNS.labels(record.state.value, 'list_notebooks').inc()
+            if not any(intent.name == 'list_notebooks' for intent in intents):
                 # まず対話を開始してノートブックを選択させる
-                result = "OneNote検索を開始します。\n\n"
-                result += await self.agent.list_notebooks()
-                self.agent.conversation_states[task_id] = ConversationState.INITIAL
-            return result
+                yield "OneNote検索を開始します。\n\n"
+            # ノートブック一覧を表示
+            async for chunk in self.agent.list_notebooks(auth, notebooks):
+                yield chunk
+            self.agent.conversations.put(task_id, TaskRecord())
 
-        elif current_state == ConversationState.NOTEBOOK_SELECTED:
+        elif record.state == ConversationState.NOTEBOOK_SELECTED:
             # Step 2: ノートブック選択済み -> 検索、質問、要約を実行
-            return await self._handle_notebook_operations(task_id, user_input)
+            async for chunk in self._handle_notebook_operations(auth, task_id, record, user_input):
+                yield chunk
 
         else:
             # 未知の状態 -> リセット
-            result = "エラー: 不明な状態です。最初からやり直してください。\n\n"
-            result += await self.agent.list_notebooks()
-            self.agent.conversation_states[task_id] = ConversationState.INITIAL
-            return result
+            TURNS.labels(record.state.value, 'reset').inc()
+            yield "エラー: 不明な状態です。最初からやり直してください。\n\n"
+            async for chunk in self.agent.list_notebooks(auth):
+                yield chunk
+            self.agent.conversations.put(task_id, TaskRecord())
 
-    async def _handle_notebook_operations(self, task_id: str, user_input: str) -> str:
+    async def _handle_notebook_operations(
+        self, auth: RequestAuth, task_id: str, record: TaskRecord, user_input: str
+    ) -> AsyncIterator[str]:
         """
         ノートブック選択後の操作を処理
 
         Args:
+            auth: ユーザーのアクセストークンとトレースコンテキスト
             task_id: タスクID
+            record: 現在の対話状態
             user_input: ユーザー入力
 
-        Returns:
-            処理結果メッセージ
+        Yields:
+            処理結果メッセージのチャンク
         """
-        notebook_id = self.agent.selected_notebooks.get(task_id, "unknown")
+        notebook_id = record.notebook_id or "unknown"
+        intent = self.router.best(user_input, self.OPERATIONS)
+        operation = intent.name if intent else None
+        TURNS.labels(record.state.value, operation or 'search').inc()
 
-        if any(keyword in user_input.lower() for keyword in ['質問', '回答', '教えて', '?', '?']):
+        if operation == 'search_all_notebooks':
+            # 選択中のノートブックに限らず横断検索
+            query = self.router.strip_keywords(user_input, self.QUERY_TRIGGERS)
+            chunks = self.agent.search_all_notebooks(auth, query)
+        elif operation == 'answer_question':
             # 質問に回答
-            result = await self.agent.answer_question(notebook_id, user_input)
-        elif any(keyword in user_input.lower() for keyword in ['要約', 'まとめ', 'summary']):
+            chunks = self.agent.answer_question(auth, notebook_id, user_input)
+        elif operation == 'summarize_content':
             # 要約
-            result = await self.agent.summarize_content(notebook_id, user_input)
-        elif any(keyword in user_input.lower() for keyword in ['抽出', 'extract', 'コンテンツ']):
+            chunks = self.agent.summarize_content(auth, notebook_id, user_input)
+        elif operation == 'extract_content':
             # コンテンツ抽出
-            result = await self.agent.extract_content(user_input)
+            chunks = self.agent.extract_content(auth, notebook_id, user_input)
         else:
             # デフォルトは検索
-            result = await self.agent.search_in_notebook(notebook_id, user_input)
+            chunks = self.agent.search_in_notebook(auth, notebook_id, user_input)
+
+        async for chunk in chunks:
+            yield chunk
 
         # 検索後もノートブック選択状態を維持
-        self.agent.conversation_states[task_id] = ConversationState.NOTEBOOK_SELECTED
-        return result
+        self.agent.conversations.put(task_id, record)
 
-    async def _handle_notebook_selection(self, task_id: str, user_input: str) -> str:
+    def _handle_notebook_selection(
+        self, task_id: str, notebooks: list[dict], user_input: str, intents: list[Intent]
+    ) -> str:
         """
         ノートブック選択処理
 
         Args:
             task_id: タスクID
+            notebooks: ユーザーのノートブック一覧
             user_input: ユーザー入力
+            intents: 意図ルーターの判定結果（ノートブック名の一致を含む）
 
         Returns:
             選択完了メッセージ（選択されなかった場合は空文字列）
         """
+        selected = None
+
         # 番号選択の検出（1, 2, 3, 4など）
         if user_input.strip().isdigit():
             nb_index = int(user_input.strip()) - 1
-            mock_notebooks = self.agent.get_mock_notebooks()
-
-            if 0 <= nb_index < len(mock_notebooks):
-                selected = mock_notebooks[nb_index]
-                self.agent.selected_notebooks[task_id] = selected['id']
-                self.agent.conversation_states[task_id] = ConversationState.NOTEBOOK_SELECTED
-                return f"✅ ノートブック「{selected['name']}」を選択しました。\n\n検索キーワードを入力するか、以下の操作を指定してください:\n- 検索: キーワードを入力\n- 質問: 「〜について教えて」\n- 要約: 「要約して」"
-
-        # 名前での選択の検出
-        elif any(nb_name in user_input for nb_name in ['個人用ノート', 'プロジェクトA', 'ミーティング議事録', '技術メモ']):
-            for nb in self.agent.get_mock_notebooks():
-                if nb['name'] in user_input:
-                    self.agent.selected_notebooks[task_id] = nb['id']
-                    self.agent.conversation_states[task_id] = ConversationState.NOTEBOOK_SELECTED
-                    return f"✅ ノートブック「{nb['name']}」を選択しました。\n\n検索キーワードを入力するか、以下の操作を指定してください:\n- 検索: キーワードを入力\n- 質問: 「〜について教えて」\n- 要約: 「要約して」"
+            if 0 <= nb_index < len(notebooks):
+                selected = notebooks[nb_index]
+
+        # 名前での選択の検出（最長一致したノートブック名）
+        else:
+            notebook_id = next((intent.value for intent in intents if intent.name == SELECT_NOTEBOOK), None)
+            selected = next((nb for nb in notebooks if nb['id'] == notebook_id), None)
+
+        if selected is not None:
+            self.agent.conversations.put(
+                task_id, TaskRecord(ConversationState.NOTEBOOK_SELECTED, selected['id'])
+            )
+            return f"✅ ノートブック「{selected['name']}」を選択しました。\n\n検索キーワードを入力するか、以下の操作を指定してください:\n- 検索: キーワードを入力\n- 質問: 「〜について教えて」\n- 要約: 「要約して」\n- 横断検索: 「すべてのノートブックから〜を検索」"
 
         return ""
 
@@ -155,14 +298,12 @@ class OneNoteSearchAgentExecutor(AgentExecutor):
             context: Request context
             event_queue: Event queue for cancellation messages
         """
-        task_id = getattr(context, 'task_id', 'default')
+        task = context.current_task
 
         # 状態をクリア
-        if task_id in self.agent.conversation_states:
-            del self.agent.conversation_states[task_id]
-        if task_id in self.agent.selected_notebooks:
-            del self.agent.selected_notebooks[task_id]
+        self.agent.conversations.delete(context.task_id)
 
-        await event_queue.enqueue_event(
-            new_agent_text_message("OneNote検索操作をキャンセルしました。")
+        updater = TaskUpdater(event_queue, context.task_id, task.context_id if task else context.context_id)
+        await updater.cancel(
+            updater.new_agent_message([Part(root=TextPart(text="OneNote検索操作をキャンセルしました。"))])
         )
@@ -0,0 +1,283 @@
+"""
+Intent Router
+AgentSkillのキーワードとノートブック名から、ユーザー入力の意図を1パスで判定する
+"""
+import re
+import unicodedata
+from collections import OrderedDict, deque
+from operator import itemgetter
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional
+
+# ノートブック名に一致した場合の意図
+SELECT_NOTEBOOK = "select_notebook"
+
+_NAME = itemgetter("name")
+
+# キーワードを除いた後に残る断片の両端の助詞・依頼表現（英語は単語単位）
+_PARTICLES = 'について|に関して|してください|ください|して|したい|する|から|で|を|に|の|は|が'
+_ENGLISH = r'\b(?:for|from|in|across|about|the|of)\b'
+_LEADING = re.compile(rf'^(?:{_ENGLISH}|{_PARTICLES})')
+_TRAILING = re.compile(rf'(?:{_ENGLISH}|{_PARTICLES})$')
+_EDGE_CHARS = ' \t\n\u3000、。,.:;!?！？「」『』"\''
+
+
+def normalize(text: str) -> str:
+    """全角・半角を揃え（NFKC）、大文字小文字を無視するための正規化"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasickオートマトン
+
+    登録したすべてのキーワードを入力の1回の走査で検出する。走査コストは入力長と
+    一致数に比例し、キーワード数には依存しない。
+    """
+
+    def __init__(self, patterns: Iterable[tuple[str, Any]]):
+        """
+        Args:
+            patterns: (キーワード, 一致時に返す値) の列（キーワードは正規化済みであること）
+        """
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, Any]]] = [[]]
+        for pattern, payload in patterns:
+            if pattern:
+                self._add(pattern, payload)
+        self._link()
+
+    def _add(self, pattern: str, payload: Any) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(pattern), payload))
+
+    def _link(self) -> None:
+        """失敗遷移を幅優先で構築し、出力を接尾辞の状態から引き継ぐ"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> Iterator[tuple[int, int, Any]]:
+        """
+        一致をすべて返す
+
+        Args:
+            text: 正規化済みの入力
+
+        Yields:
+            (開始位置, 長さ, 値)
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, payload in out[state]:
+                yield index - length + 1, length, payload
+
+
+@dataclass(frozen=True)
+class Intent:
+    """判定された意図"""
+
+    name: str
+    confidence: float
+    value: Optional[str] = None  # select_notebookの場合はノートブックID
+
+
+class IntentRouter:
+    """
+    意図ルーター
+
+    スキルごとのキーワードから起動時に1度だけオートマトンを構築する。複数の
+    スキルに共通するキーワードほど重みを小さく（1/出現スキル数）し、すべての
+    スキルに共通するキーワードは判定に使わない。ユーザーのノートブック名は
+    スキルのキーワードと合わせたオートマトンを一覧ごとにキャッシュする。
+    """
+
+    def __init__(self, keywords: dict[str, Iterable[str]], notebook_cache_size: int = 256):
+        """
+        Args:
+            keywords: スキルID -> キーワード（宣言順が同点時の優先順）
+            notebook_cache_size: ノートブック一覧ごとのオートマトンをキャッシュする数
+        """
+        self.order = {intent: rank for rank, intent in enumerate(keywords)}
+        owners: dict[str, set[str]] = {}
+        for intent, words in keywords.items():
+            for word in words:
+                owners.setdefault(normalize(word), set()).add(intent)
+
+        self._patterns: list[tuple[str, Any]] = []
+        for word, intents in owners.items():
+            if len(intents) == len(keywords) > 1:
+                continue
+            for intent in intents:
+                self._patterns.append((word, (intent, word, 1.0 / len(intents))))
+        self._automaton = KeywordAutomaton(self._patterns)
+        self._notebook_cache: OrderedDict[tuple[str, ...], KeywordAutomaton] = OrderedDict()
+        self._notebook_cache_size = notebook_cache_size
+
+    @classmethod
+    def from_skills(cls, skills: Iterable[Any]) -> "IntentRouter":
+        """
+        AgentSkillのtagsから構築
+
+        Args:
+            skills: AgentSkill（id, tagsを持つオブジェクト）
+
+        Returns:
+            IntentRouter
+        """
+        return cls({skill.id: list(skill.tags or []) for skill in skills})
+
+    def _automaton_for(self, notebooks: Optional[list[dict]]) -> KeywordAutomaton:
+        """ノートブック名を含むオートマトンを返す（一覧ごとにキャッシュ）"""
+        if not notebooks:
+            return self._automaton
+        # キーは名前の並びのみ（一致時は位置から現在の一覧のIDを引くため、IDの変化に影響されない）
+        key = tuple(map(_NAME, notebooks))
+        automaton = self._notebook_cache.get(key)
+        if automaton is not None:
+            self._notebook_cache.move_to_end(key)
+            return automaton
+        automaton = KeywordAutomaton(
+            self._patterns
+            + [(normalize(name), (SELECT_NOTEBOOK, index, 1.0)) for index, name in enumerate(key) if name]
+        )
+        self._notebook_cache[key] = automaton
+        if len(self._notebook_cache) > self._notebook_cache_size:
+            self._notebook_cache.popitem(last=False)
+        return automaton
+
+    def route(self, text: str, notebooks: Optional[list[dict]] = None) -> list[Intent]:
+        """
+        入力の意図を判定する
+
+        Args:
+            text: ユーザー入力
+            notebooks: ユーザーのノートブック一覧（id, name）。指定時は名前の一致も判定する
+
+        Returns:
+            確信度の高い順の意図（一致がなければ空）。ノートブック名は最長一致の1件のみ
+        """
+        normalized = normalize(text)
+        scores: dict[str, float] = {}
+        seen: set[tuple[str, str]] = set()
+        notebook: Optional[tuple[int, int]] = None  # (一致長, 一覧内の位置)
+        for _, length, (intent, key, weight) in self._automaton_for(notebooks).find(normalized):
+            if intent == SELECT_NOTEBOOK:
+                if notebook is None or length > notebook[0]:
+                    notebook = (length, key)
+            elif (intent, key) not in seen:
+                seen.add((intent, key))
+                scores[intent] = scores.get(intent, 0.0) + weight
+
+        intents = []
+        total = sum(scores.values())
+        for intent, score in sorted(scores.items(), key=lambda item: (-item[1], self.order[item[0]])):
+            intents.append(Intent(intent, score / total))
+        if notebook is not None:
+            # 入力のうちノートブック名が占める割合を確信度とする
+            confidence = min(1.0, notebook[0] / max(1, len(normalized.strip())))
+            intents.append(Intent(SELECT_NOTEBOOK, confidence, notebooks[notebook[1]]["id"]))
+            intents.sort(key=lambda intent: -intent.confidence)
+        return intents
+
+    def strip_keywords(self, text: str, intents: Iterable[str]) -> str:
+        """
+        入力から指定したスキルのキーワードを取り除き、検索語を取り出す
+
+        「すべてのノートブックから予算を検索」のような入力から、指定したスキル
+        （横断検索と検索）のキーワード（「すべてのノートブック」「検索」）と、
+        取り除いたキーワードに接する助詞・依頼表現を1つずつ除いて「予算」を返す。
+        ほかのスキルのキーワード（「要約」「Q&A」など）は検索語として残し、
+        助詞はキーワードに接していない位置や語の内部では取り除かない。
+
+        Args:
+            text: ユーザー入力
+            intents: キーワードを取り除くスキルID
+
+        Returns:
+            正規化済みの検索語（空白区切り）。キーワードしかない場合は正規化した入力
+        """
+        normalized = normalize(text)
+        removed = set(intents)
+        keyword = [False] * len(normalized)
+        for start, length, (intent, _, _) in self._automaton.find(normalized):
+            if intent in removed and _is_whole_word(normalized, start, start + length):
+                keyword[start:start + length] = [True] * length
+
+        terms = []
+        start = 0
+        while start < len(normalized):
+            if keyword[start]:
+                start += 1
+                continue
+            end = start
+            while end < len(normalized) and not keyword[end]:
+                end += 1
+            term = _strip_edges(normalized[start:end], leading=start > 0, trailing=end < len(normalized))
+            if term:
+                terms.append(term)
+            start = end
+        return ' '.join(terms) or normalized.strip()
+
+    def best(self, text: str, candidates: Iterable[str]) -> Optional[Intent]:
+        """
+        候補の中で最も確信度の高い意図を返す
+
+        Args:
+            text: ユーザー入力
+            candidates: 対象とするスキルID
+
+        Returns:
+            Intent（候補に一致しなければNone）
+        """
+        allowed = set(candidates)
+        return next((intent for intent in self.route(text) if intent.name in allowed), None)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+def _is_whole_word(text: str, start: int, end: int) -> bool:
+    """一致が英単語の一部（researchの中のsearchなど）でないか"""
+    if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+        return False
+    return not (end < len(text) and _is_word_char(text[end - 1]) and _is_word_char(text[end]))
+
+
+def _strip_edges(fragment: str, leading: bool, trailing: bool) -> str:
+    """
+    断片の両端の空白・句読点と、取り除いたキーワードに接する助詞・依頼表現を1つだけ取り除く
+
+    Args:
+        fragment: キーワードの間に残った断片
+        leading: 断片の直前がキーワードか
+        trailing: 断片の直後がキーワードか
+    """
+    fragment = fragment.strip(_EDGE_CHARS)
+    if leading:
+        fragment = _LEADING.sub('', fragment, count=1).strip(_EDGE_CHARS)
+    if trailing:
+        fragment = _TRAILING.sub('', fragment, count=1).strip(_EDGE_CHARS)
+    return fragment
@@ -0,0 +1,258 @@
+"""
+LLM Backends
+要約・回答の生成に使うLLMと、検索に使う埋め込みのバックエンド（差し替え可能）
+"""
+import asyncio
+import logging
+import os
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+import httpx
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# プロンプトの指示と本文の区切り（ローカルスタブは区切り以降を本文として扱う）
+PROMPT_BODY_MARKER = "\n\n---\n"
+
+_SENTENCE_END = re.compile(r"(?<=[。．！？!?])\s*|\n+")
+_WORD = re.compile(r"[^\W\u3000-\u9fff\uff00-\uffef]+")
+_WIDE_RUN = re.compile(r"[\u3040-\u9fff\uff66-\uff9f]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    トークン数の概算
+
+    トークナイザーに依存しないよう、ASCII文字は約4文字で1トークン、
+    日本語などのマルチバイト文字は1文字1トークンとして数える。
+    """
+    length = len(text)
+    # UTF-8でASCIIは1バイト、かな・漢字は3バイトのため、バイト数との差から非ASCII文字数を求める
+    wide = (len(text.encode("utf-8")) - length) // 2
+    return (length - wide + 3) // 4 + wide
+
+
+def build_prompt(instruction: str, body: str) -> str:
+    """指示と本文からプロンプトを組み立てる"""
+    return f"{instruction}{PROMPT_BODY_MARKER}{body}"
+
+
+class LLMBackend(ABC):
+    """テキスト生成バックエンドの共通インターフェース"""
+
+    @abstractmethod
+    async def complete(self, prompt: str, max_tokens: int) -> str:
+        """
+        プロンプトに対する応答を生成
+
+        Args:
+            prompt: プロンプト（build_promptで組み立てたもの）
+            max_tokens: 応答の最大トークン数
+
+        Returns:
+            生成されたテキスト
+        """
+
+    async def close(self) -> None:
+        """バックエンドの資源を解放"""
+
+
+class ExtractiveBackend(LLMBackend):
+    """
+    決定的なローカルスタブ
+
+    LLMを呼ばずに本文の先頭から文を順に拾い、max_tokensに収まる分を返す。
+    テストやベンチマーク、LLM未設定時の動作確認に使う。
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, prompt: str, max_tokens: int) -> str:
+        self.calls += 1
+        body = prompt.split(PROMPT_BODY_MARKER, 1)[-1]
+        picked: list[str] = []
+        used = 0
+        for sentence in _SENTENCE_END.split(body):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            tokens = estimate_tokens(sentence)
+            if used + tokens > max_tokens:
+                if not picked:
+                    picked.append(sentence[: max(1, max_tokens)])
+                break
+            picked.append(sentence)
+            used += tokens
+        return "\n".join(picked)
+
+
+class EmbeddingBackend(ABC):
+    """埋め込みベクトル生成バックエンドの共通インターフェース"""
+
+    @abstractmethod
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        """
+        テキストを埋め込みベクトルに変換
+
+        Args:
+            texts: テキストのリスト
+
+        Returns:
+            L2正規化済みのベクトル（len(texts) x 次元数、float32）
+        """
+
+    async def close(self) -> None:
+        """バックエンドの資源を解放"""
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    決定的なローカル埋め込み
+
+    英数字の単語と、かな・漢字の文字bigramを特徴量として固定次元にハッシュする
+    （feature hashing）。外部サービスなしで語彙の重なりによる類似度を得られる。
+    """
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> list[int]:
+        text = text.casefold()
+        features = _WORD.findall(text)
+        for run in _WIDE_RUN.findall(text):
+            features.extend(run[i:i + 2] for i in range(max(1, len(run) - 1)))
+        return [zlib.crc32(feature.encode("utf-8")) % self.dimensions for feature in features]
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            np.add.at(vectors[row], self._features(text), 1.0)
+        return _normalize_rows(vectors)
+
+
+class _AzureOpenAIClient:
+    """Azure OpenAIのデプロイメントへのHTTPクライアント（429・5xx応答時は再試行）"""
+
+    def __init__(
+        self,
+        endpoint: str,
+        api_key: str,
+        deployment: str,
+        api_version: str = "2024-10-21",
+        timeout: float = 60.0,
+        max_retries: int = 3,
+    ):
+        """
+        Args:
+            endpoint: リソースのエンドポイント（https://<resource>.openai.azure.com）
+            api_key: APIキー
+            deployment: デプロイメント名
+            api_version: APIバージョン
+            timeout: リクエストのタイムアウト（秒）
+            max_retries: 429・5xx応答時の再試行回数
+        """
+        self.base_url = f"{endpoint.rstrip('/')}/openai/deployments/{deployment}"
+        self.api_version = api_version
+        self.max_retries = max_retries
+        self._client = httpx.AsyncClient(headers={"api-key": api_key}, timeout=timeout)
+
+    async def _post(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            response = await self._client.post(
+                f"{self.base_url}/{path}", params={"api-version": self.api_version}, json=payload
+            )
+            if response.status_code != 429 and response.status_code < 500:
+                break
+            if attempt == self.max_retries:
+                break
+            delay = float(response.headers.get("retry-after", 2 ** attempt))
+            logger.warning(f"Azure OpenAI returned {response.status_code}, retrying in {delay}s")
+            await asyncio.sleep(delay)
+        response.raise_for_status()
+        return response.json()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class AzureOpenAIBackend(_AzureOpenAIClient, LLMBackend):
+    """Azure OpenAIのChat Completions APIによるバックエンド"""
+
+    async def complete(self, prompt: str, max_tokens: int) -> str:
+        data = await self._post(
+            "chat/completions",
+            {
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": 0,
+            },
+        )
+        return data["choices"][0]["message"]["content"] or ""
+
+
+class AzureOpenAIEmbeddingBackend(_AzureOpenAIClient, EmbeddingBackend):
+    """Azure OpenAIのEmbeddings APIによるバックエンド"""
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        data = await self._post("embeddings", {"input": texts})
+        rows = sorted(data["data"], key=lambda item: item["index"])
+        return _normalize_rows(np.array([row["embedding"] for row in rows], dtype=np.float32))
+
+
+def _azure_endpoint() -> Optional[str]:
+    """AZURE_OPENAI_ENDPOINT、またはAZURE_OPENAI_RESOURCE_NAMEから組み立てたエンドポイント"""
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    resource = os.getenv("AZURE_OPENAI_RESOURCE_NAME")
+    if not endpoint and resource:
+        endpoint = f"https://{resource}.openai.azure.com"
+    return endpoint
+
+
+def create_llm_backend() -> LLMBackend:
+    """
+    環境変数からLLMバックエンドを生成
+
+    AZURE_OPENAI_API_KEYとAZURE_OPENAI_ENDPOINT（またはAZURE_OPENAI_RESOURCE_NAME）を
+    指定するとAzure OpenAI、省略時はローカルの抽出スタブを使用する。
+    """
+    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    endpoint = _azure_endpoint()
+    if api_key and endpoint:
+        return AzureOpenAIBackend(
+            endpoint,
+            api_key,
+            deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o"),
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-10-21"),
+        )
+    logger.warning("Azure OpenAI is not configured; using the local extractive backend")
+    return ExtractiveBackend()
+
+
+def create_embedding_backend() -> EmbeddingBackend:
+    """
+    環境変数から埋め込みバックエンドを生成
+
+    Azure OpenAIの設定に加えてAZURE_OPENAI_EMBEDDING_DEPLOYMENTを指定すると
+    Azure OpenAI、省略時はローカルのハッシュ埋め込みを使用する。
+    """
+    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    endpoint = _azure_endpoint()
+    deployment = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+    if api_key and endpoint and deployment:
+        return AzureOpenAIEmbeddingBackend(
+            endpoint,
+            api_key,
+            deployment=deployment,
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-10-21"),
+        )
+    return HashingEmbeddingBackend()
@@ -0,0 +1,311 @@
+"""
+OneNote MCP Client
+OneNote MCPサーバーへの長寿命・プール型クライアント
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+
+from .metrics import MCP_CALLS, MCP_IN_FLIGHT, MCP_LATENCY, MCP_PAYLOAD
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RequestAuth:
+    """ユーザーのアクセストークンとトレースコンテキスト（MCPツール呼び出しごとに渡す）"""
+
+    access_token: str
+    traceparent: Optional[str] = None
+    tracestate: Optional[str] = None
+
+    def to_arguments(self) -> dict[str, str]:
+        """MCPツールの共通引数に変換"""
+        arguments = {"access_token": self.access_token}
+        if self.traceparent:
+            arguments["traceparent"] = self.traceparent
+            if self.tracestate:
+                arguments["tracestate"] = self.tracestate
+        return arguments
+
+
+class MCPToolError(Exception):
+    """MCPツールがエラーを返した"""
+
+
+class MCPSession:
+    """
+    Streamable HTTPセッション1本
+
+    トランスポートとClientSessionはキャンセルスコープを持つため、専用のタスク内で
+    開いたまま保持し、他のタスクからはcall_tool/pingのみを行う。
+    """
+
+    def __init__(self, url: str, call_timeout: float):
+        self.url = url
+        self.call_timeout = timedelta(seconds=call_timeout)
+        self.session: Optional[ClientSession] = None
+        self.tools: list[str] = []
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def healthy(self) -> bool:
+        """接続済みでオーナータスクが生きているか"""
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def connect(self, timeout: float) -> None:
+        """
+        セッションを開き、初期化とツール一覧の取得まで待つ
+
+        Args:
+            timeout: 接続完了までの待ち時間（秒）
+        """
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise ConnectionError(f"Timed out connecting to MCP server at {self.url}")
+        if self.session is None:
+            await self.close()
+            raise ConnectionError(f"Failed to connect to MCP server at {self.url}: {self._error}")
+
+    async def _run(self) -> None:
+        """セッションのオーナータスク：閉じるよう指示されるまで接続を保持"""
+        try:
+            async with streamablehttp_client(self.url) as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    # ツール一覧の取得は接続時の1回だけ
+                    self.tools = [tool.name for tool in (await session.list_tools()).tools]
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self._error = e
+            logger.warning(f"MCP session to {self.url} ended: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> Any:
+        """
+        ツールを呼び出し、結果をJSON値として返す
+
+        Args:
+            name: ツール名
+            arguments: ツール引数
+
+        Returns:
+            ツールの戻り値
+
+        Raises:
+            MCPToolError: ツールがエラーを返した場合
+        """
+        if self.session is None:
+            raise ConnectionError("MCP session is not connected")
+        result = await self.session.call_tool(name, arguments, read_timeout_seconds=self.call_timeout)
+        text = "\n".join(block.text for block in result.content if getattr(block, "text", None))
+        MCP_PAYLOAD.labels(name, "received").inc(len(text))
+        if result.isError:
+            raise MCPToolError(text or f"Tool {name} failed")
+
+        structured = getattr(result, "structuredContent", None)
+        if structured is not None:
+            # FastMCPは非オブジェクトの戻り値を{"result": ...}で包む
+            if set(structured) == {"result"}:
+                return structured["result"]
+            return structured
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text
+
+    async def ping(self) -> None:
+        """ヘルスチェック"""
+        if self.session is None:
+            raise ConnectionError("MCP session is not connected")
+        await asyncio.wait_for(self.session.send_ping(), self.call_timeout.total_seconds())
+
+    async def close(self) -> None:
+        """セッションを閉じる"""
+        self._closing.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, 5.0)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+        self.session = None
+
+
+class OneNoteMCPClient:
+    """
+    OneNote MCPサーバーへのプール型クライアント
+
+    A2Aタスクをまたいで少数のStreamable HTTPセッションを使い回し、ターンごとの
+    セッション初期化とツール一覧取得を省く。同時実行中の呼び出し数は上限で制限し、
+    定期的なpingで切断を検知したセッションは張り直す。
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 2,
+        max_in_flight: int = 16,
+        call_timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+    ):
+        """
+        Args:
+            url: MCPエンドポイントURL
+            pool_size: 保持するセッション数
+            max_in_flight: 同時実行するツール呼び出しの上限
+            call_timeout: ツール呼び出しのタイムアウト（秒）
+            connect_timeout: 接続のタイムアウト（秒）
+            health_check_interval: ヘルスチェック間隔（秒、0で無効）
+        """
+        self.url = url
+        self.pool_size = pool_size
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self.health_check_interval = health_check_interval
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._sessions: list[Optional[MCPSession]] = [None] * pool_size
+        self._connect_locks = [asyncio.Lock() for _ in range(pool_size)]
+        self._next = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+        self.connects = 0
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls) -> "OneNoteMCPClient":
+        """環境変数から生成（ONENOTE_MCP_URLのパス省略時は/mcp）"""
+        url = os.getenv("ONENOTE_MCP_URL", "http://onenote-mcp:8000")
+        if urlsplit(url).path in ("", "/"):
+            url = url.rstrip("/") + "/mcp"
+        return cls(
+            url,
+            pool_size=int(os.getenv("MCP_POOL_SIZE", "2")),
+            max_in_flight=int(os.getenv("MCP_MAX_IN_FLIGHT", "16")),
+            call_timeout=float(os.getenv("MCP_CALL_TIMEOUT", "60")),
+            health_check_interval=float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30")),
+        )
+
+    @property
+    def tools(self) -> list[str]:
+        """接続済みセッションが取得したツール名一覧"""
+        session = next((s for s in self._sessions if s is not None and s.healthy), None)
+        return list(session.tools) if session else []
+
+    async def _session(self, slot: int) -> MCPSession:
+        """スロットの健全なセッションを返す（必要なら接続）"""
+        session = self._sessions[slot]
+        if session is not None and session.healthy:
+            return session
+        async with self._connect_locks[slot]:
+            session = self._sessions[slot]
+            if session is not None and session.healthy:
+                return session
+            if session is not None:
+                await session.close()
+            session = MCPSession(self.url, self.call_timeout)
+            await session.connect(self.connect_timeout)
+            self._sessions[slot] = session
+            self.connects += 1
+            logger.info(f"Connected MCP session {slot} to {self.url}")
+            if self._health_task is None and self.health_check_interval > 0:
+                self._health_task = asyncio.create_task(self._health_loop())
+            return session
+
+    async def warm_up(self) -> None:
+        """
+        プールの全スロットを事前に接続する（起動時に使用）
+
+        失敗したスロットはログに残し、最初の呼び出し時に再接続する。
+        """
+        results = await asyncio.gather(
+            *(self._session(slot) for slot in range(self.pool_size)), return_exceptions=True
+        )
+        for slot, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.warning(f"MCP session {slot} warm-up failed: {result}")
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> Any:
+        """
+        プールのセッションでツールを呼び出す
+
+        接続エラーの場合はセッションを張り直して1回だけ再試行する。
+
+        Args:
+            name: ツール名
+            arguments: ツール引数
+
+        Returns:
+            ツールの戻り値
+        """
+        MCP_PAYLOAD.labels(name, "sent").inc(len(json.dumps(arguments, ensure_ascii=False)))
+        in_flight = MCP_IN_FLIGHT.labels()
+        async with self._in_flight:
+            slot = next(self._next) % self.pool_size
+            self.calls += 1
+            in_flight.inc()
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                for attempt in range(2):
+                    session = await self._session(slot)
+                    try:
+                        result = await session.call_tool(name, arguments)
+                        outcome = "ok"
+                        return result
+                    except (MCPToolError, McpError):
+                        raise
+                    except Exception as e:
+                        if attempt:
+                            raise
+                        logger.warning(
+                            f"MCP call {name} failed on session {slot}, reconnecting: {e}"
+                        )
+                        await session.close()
+            finally:
+                MCP_LATENCY.labels(name).observe(time.perf_counter() - start)
+                MCP_CALLS.labels(name, outcome).inc()
+                in_flight.dec()
+
+    async def _health_loop(self) -> None:
+        """接続済みセッションに定期的にpingし、応答しないものを閉じる（次回使用時に再接続）"""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for slot, session in enumerate(self._sessions):
+                if session is None or not session.healthy:
+                    continue
+                try:
+                    await session.ping()
+                except Exception as e:
+                    logger.warning(f"MCP session {slot} failed health check: {e}")
+                    await session.close()
+
+    async def close(self) -> None:
+        """すべてのセッションを閉じる"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for slot, session in enumerate(self._sessions):
+            if session is not None:
+                await session.close()
+                self._sessions[slot] = None
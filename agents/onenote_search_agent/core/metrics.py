@@ -0,0 +1,171 @@
+"""
+Agent Metrics
+ターンの振り分けとMCPツール呼び出しのメトリクス（Prometheusテキスト形式で公開）
+"""
+from bisect import bisect_left
+from typing import Any, Callable
+
+# 秒（キャッシュヒットから要約・回答の生成までを含む）
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Counter:
+    """単調増加する値"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """増減する値"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class Histogram:
+    """
+    固定バケットのヒストグラム
+
+    記録はバケット境界の二分探索と加算のみで、累積値は出力時に計算する。
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricFamily:
+    """名前つきのメトリクスと、ラベル値ごとの子"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        label_names: tuple[str, ...],
+        factory: Callable[[], Any],
+    ):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.label_names = label_names
+        self._factory = factory
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str) -> Any:
+        """ラベル値に対応する子を返す（初回は作成）"""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._factory()
+        return child
+
+    def render(self) -> list[str]:
+        """Prometheusテキスト形式の行を返す"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            labels = ",".join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, values)
+            )
+            suffix = f"{{{labels}}}" if labels else ""
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{suffix} {child.value}")
+                continue
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(child.bounds, child.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {child.count}')
+            lines.append(f"{self.name}_sum{suffix} {child.sum}")
+            lines.append(f"{self.name}_count{suffix} {child.count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """メトリクスを保持し、/metrics用に出力する"""
+
+    def __init__(self):
+        self._families: list[MetricFamily] = []
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        self._families.append(family)
+        return family
+
+    def counter(self, name: str, help: str, label_names: tuple[str, ...] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, help, "counter", label_names, Counter))
+
+    def gauge(self, name: str, help: str, label_names: tuple[str, ...] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, help, "gauge", label_names, Gauge))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> MetricFamily:
+        return self._register(
+            MetricFamily(name, help, "histogram", label_names, lambda: Histogram(buckets))
+        )
+
+    def render(self) -> str:
+        """すべてのメトリクスをPrometheusテキスト形式で返す"""
+        lines: list[str] = []
+        for family in self._families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+TURNS = registry.counter(
+    "onenote_agent_turns_total",
+    "Turns by conversation state and routing decision",
+    ("state", "decision"),
+)
+TURN_LATENCY = registry.histogram(
+    "onenote_agent_turn_duration_seconds", "Turn latency by conversation state", ("state",)
+)
+TURN_ERRORS = registry.counter(
+    "onenote_agent_turn_errors_total", "Turns that failed with an error", ("state",)
+)
+TURNS_IN_FLIGHT = registry.gauge("onenote_agent_turns_in_flight", "Turns in progress")
+MCP_CALLS = registry.counter(
+    "onenote_agent_mcp_calls_total", "MCP tool calls by outcome", ("tool", "outcome")
+)
+MCP_LATENCY = registry.histogram(
+    "onenote_agent_mcp_duration_seconds", "MCP tool call latency", ("tool",)
+)
+MCP_IN_FLIGHT = registry.gauge("onenote_agent_mcp_in_flight", "MCP tool calls in progress")
+MCP_PAYLOAD = registry.counter(
+    "onenote_agent_mcp_payload_chars_total",
+    "JSON characters of MCP tool arguments sent and results received",
+    ("tool", "direction"),
+)
@@ -2,104 +2,388 @@
 OneNote Search Agent
 OneNote検索エージェントのビジネスロジック
 """
-from typing import Dict
-from .conversation_state import ConversationState
+import asyncio
+import functools
+import heapq
+import logging
+import os
+import time
+from typing import AsyncIterator, Iterator, Optional
+from .conversation_store import ConversationStore, create_conversation_store
+from .llm import (
+    EmbeddingBackend,
+    LLMBackend,
+    build_prompt,
+    create_embedding_backend,
+    create_llm_backend,
+)
+from .mcp_client import OneNoteMCPClient, RequestAuth
+from .retriever import Retriever
+from .summarizer import MapReduceSummarizer, PageRef
+
+logger = logging.getLogger(__name__)
+
+ANSWER_INSTRUCTION = (
+    "以下はOneNoteノートブックから質問に関連する部分を抜き出したものです。"
+    "抜粋の内容だけに基づいて、質問「{question}」に日本語で簡潔に回答してください。"
+    "抜粋に答えが含まれない場合は、その旨を回答してください。"
+)
 
 
 class OneNoteSearchAgent:
     """OneNote Search Agent - searches and retrieves information from Microsoft OneNote"""
 
-    def __init__(self):
-        # TODO: Initialize OneNote MCP client connection
-        # self.onenote_mcp_client = OneNoteMCPClient()
+    def __init__(
+        self,
+        mcp_client: Optional[OneNoteMCPClient] = None,
+        conversation_store: Optional[ConversationStore] = None,
+        llm: Optional[LLMBackend] = None,
+        embedder: Optional[EmbeddingBackend] = None,
+        fanout_concurrency: Optional[int] = None,
+        fanout_deadline: Optional[float] = None,
+        fanout_min_score: Optional[float] = None,
+    ):
+        # OneNote MCPサーバーへのプール型クライアント（タスクをまたいで共有）
+        self.mcp_client = mcp_client or OneNoteMCPClient.from_env()
+
+        # 対話状態を管理（タスクIDごとに状態と選択中のノートブックを保持）
+        self.conversations = conversation_store or create_conversation_store()
 
-        # 対話状態を管理（タスクIDごとに状態を保持）
-        self.conversation_states: Dict[str, ConversationState] = {}
-        self.selected_notebooks: Dict[str, str] = {}  # task_id -> notebook_id
+        # 要約・回答の生成に使うLLMと、ページ要約をキャッシュするMap-Reduce要約
+        self.llm = llm or create_llm_backend()
+        self.summarizer = MapReduceSummarizer.from_env(self.llm)
 
-    async def list_notebooks(self) -> str:
+        # 質問回答用の抜粋索引（ノートブックごとに差分更新し、質問間で再利用）
+        self.embedder = embedder or create_embedding_backend()
+        self.retriever = Retriever.from_env(self.embedder)
+        self.answer_tokens = int(os.getenv("RAG_ANSWER_TOKENS", "600"))
+
+        # ノートブック横断検索の同時実行数、締め切り（秒）、打ち切りに必要なスコア
+        self.fanout_concurrency = fanout_concurrency or int(os.getenv("SEARCH_FANOUT_CONCURRENCY", "8"))
+        self.fanout_deadline = fanout_deadline or float(os.getenv("SEARCH_FANOUT_DEADLINE", "10"))
+        self.fanout_min_score = (
+            fanout_min_score
+            if fanout_min_score is not None
+            else float(os.getenv("SEARCH_FANOUT_MIN_SCORE", "1.0"))
+        )
+
+    async def get_notebooks(self, auth: RequestAuth) -> list[dict]:
         """
-        利用可能なノートブック一覧を取得
+        ノートブック一覧をMCPサーバーから取得
+
+        Args:
+            auth: ユーザーのアクセストークンとトレースコンテキスト
 
         Returns:
-            ノートブック一覧の整形された文字列
+            ノートブックのリスト（id, name）
+        """
+        notebooks = await self.mcp_client.call_tool(
+            "list_notebooks", {**auth.to_arguments(), "fields": ["id", "display_name"]}
+        )
+        return [{"id": nb["id"], "name": nb["display_name"]} for nb in notebooks["items"]]
+
+    async def list_notebooks(
+        self, auth: RequestAuth, notebooks: Optional[list[dict]] = None
+    ) -> AsyncIterator[str]:
         """
-        # TODO: Implement actual notebook listing via MCP
-        # For now, return mock data
-        mock_notebooks = [
-            {"id": "nb-001", "name": "個人用ノート"},
-            {"id": "nb-002", "name": "プロジェクトA"},
-            {"id": "nb-003", "name": "ミーティング議事録"},
-            {"id": "nb-004", "name": "技術メモ"},
-        ]
+        利用可能なノートブック一覧を取得
+
+        Args:
+            auth: ユーザーのアクセストークンとトレースコンテキスト
+            notebooks: 取得済みのノートブック一覧（省略時はMCPサーバーから取得）
 
-        result = "📚 利用可能なノートブック一覧:\n\n"
-        for i, nb in enumerate(mock_notebooks, 1):
-            result += f"{i}. {nb['name']} (ID: {nb['id']})\n"
+        Yields:
+            ノートブック一覧の整形された文字列のチャンク
+        """
+        if notebooks is None:
+            notebooks = await self.get_notebooks(auth)
+        if not notebooks:
+            yield "利用可能なノートブックが見つかりませんでした。"
+            return
 
-        result += "\n検索したいノートブックの番号または名前を指定してください。"
-        return result
+        yield "📚 利用可能なノートブック一覧:\n\n"
+        yield "".join(f"{i}. {nb['name']} (ID: {nb['id']})\n" for i, nb in enumerate(notebooks, 1))
+        yield "\n検索したいノートブックの番号または名前を指定してください。"
 
-    async def search_in_notebook(self, notebook_id: str, query: str) -> str:
+    async def search_in_notebook(self, auth: RequestAuth, notebook_id: str, query: str) -> AsyncIterator[str]:
         """
         指定されたノートブック内を検索
 
         Args:
+            auth: ユーザーのアクセストークンとトレースコンテキスト
             notebook_id: ノートブックID
             query: 検索クエリ
 
+        Yields:
+            検索結果の整形された文字列のチャンク（見出しの後、1件ずつ）
+        """
+        yield f"📝 「{query}」の検索結果:\n\n"
+        results = await self.mcp_client.call_tool(
+            "search_onenote",
+            {
+                **auth.to_arguments(),
+                "query": query,
+                "notebook_id": notebook_id,
+                "max_items": 10,
+                "fields": ["title", "preview"],
+            },
+        )
+        results = results["items"]
+        if not results:
+            yield "一致するページは見つかりませんでした。"
+            return
+
+        for i, item in enumerate(results, 1):
+            hit = f"{i}. {item['title']}\n"
+            if item.get("preview"):
+                hit += f"   {item['preview']}\n"
+            yield hit
+
+    async def search_all_notebooks(
+        self,
+        auth: RequestAuth,
+        query: str,
+        notebooks: Optional[list[dict]] = None,
+        section_ids: Optional[list[str]] = None,
+        top_k: int = 10,
+    ) -> AsyncIterator[str]:
+        """
+        複数のノートブック（またはセクション）を並列に検索し、結果をスコア順に統合
+
+        Args:
+            auth: ユーザーのアクセストークンとトレースコンテキスト
+            query: 検索クエリ
+            notebooks: 検索対象のノートブック一覧（省略時はすべてのノートブック）
+            section_ids: 指定時はノートブックの代わりにこれらのセクションを検索
+            top_k: 返す結果の件数
+
+        Yields:
+            検索結果の整形された文字列のチャンク（見出しの後、1件ずつ）
+        """
+        yield f"🔎 「{query}」のノートブック横断検索結果:\n\n"
+        if section_ids:
+            scopes = [({"section_id": section_id}, None) for section_id in section_ids]
+        else:
+            if notebooks is None:
+                notebooks = await self.get_notebooks(auth)
+            scopes = [({"notebook_id": nb["id"]}, nb["name"]) for nb in notebooks]
+        if not scopes:
+            yield "検索対象のノートブックが見つかりませんでした。"
+            return
+
+        hits, pending, stopped_early = await self._fan_out_search(auth, query, scopes, top_k)
+        if not hits:
+            yield "一致するページは見つかりませんでした。"
+        for i, (item, label) in enumerate(hits, 1):
+            hit = f"{i}. {item['title']}" + (f"（{label}）" if label else "") + "\n"
+            if item.get("preview"):
+                hit += f"   {item['preview']}\n"
+            yield hit
+        if stopped_early:
+            yield "\n（十分な結果が得られたため、残りの検索は打ち切りました）"
+        elif pending:
+            yield f"\n（{pending}件の検索が時間内に完了しなかったため、結果に含まれていません）"
+
+    async def _fan_out_search(
+        self, auth: RequestAuth, query: str, scopes: list[tuple[dict, Optional[str]]], top_k: int
+    ) -> tuple[list[tuple[dict, Optional[str]]], int, bool]:
+        """
+        範囲ごとのsearch_onenoteを同時実行数の上限つきで並列に呼び出し、上位top_k件を統合
+
+        結果はtop_k件の最小ヒープで保持し、ヒープが埋まって最下位のスコアも
+        fanout_min_score以上になった時点、または締め切りの時点で残りの検索を取り消す。
+        スコアがない結果（Graph検索へのフォールバック時）は範囲内の順位から1/順位とする。
+
+        Args:
+            auth: ユーザーのアクセストークンとトレースコンテキスト
+            query: 検索クエリ
+            scopes: (search_onenoteの範囲引数, 結果に付けるラベル) のリスト
+            top_k: 返す結果の件数
+
         Returns:
-            検索結果の整形された文字列
+            (スコア順の(結果, ラベル), 完了しなかった検索の数, 打ち切ったか)
         """
-        # TODO: Implement actual OneNote search via MCP
-        return f"📝 ノートブック「{notebook_id}」内で「{query}」を検索中...\n\n[Placeholder] 検索結果がここに表示されます。\n\nOneNote MCP Serverとの連携により実装予定。"
+        semaphore = asyncio.Semaphore(self.fanout_concurrency)
+
+        async def search(scope: dict, label: Optional[str]) -> tuple[list[dict], Optional[str]]:
+            async with semaphore:
+                results = await self.mcp_client.call_tool(
+                    "search_onenote",
+                    {
+                        **auth.to_arguments(),
+                        **scope,
+                        "query": query,
+                        "max_items": top_k,
+                        "fields": ["title", "preview", "score"],
+                    },
+                )
+                return results["items"], label
+
+        tasks = [asyncio.create_task(search(scope, label)) for scope, label in scopes]
+        heap: list[tuple[float, int, dict, Optional[str]]] = []
+        seen: set[str] = set()
+        sequence = 0
+        stopped_early = False
+        deadline = time.monotonic() + self.fanout_deadline
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=self.fanout_deadline):
+                try:
+                    results, label = await next_done
+                except asyncio.TimeoutError:
+                    if time.monotonic() >= deadline:
+                        raise
+                    logger.warning(f"Notebook search for {query!r} timed out")
+                    continue
+                except Exception as e:
+                    logger.warning(f"Notebook search for {query!r} failed: {e}")
+                    continue
+
+                for rank, item in enumerate(results or [], 1):
+                    if item["page_id"] in seen:
+                        continue
+                    seen.add(item["page_id"])
+                    score = item["score"] if item.get("score") is not None else 1.0 / rank
+                    sequence += 1
+                    entry = (score, -sequence, item, label)
+                    if len(heap) < top_k:
+                        heapq.heappush(heap, entry)
+                    elif score > heap[0][0]:
+                        heapq.heapreplace(heap, entry)
+
+                if len(heap) == top_k and heap[0][0] >= self.fanout_min_score:
+                    stopped_early = any(not task.done() for task in tasks)
+                    break
+        except asyncio.TimeoutError:
+            logger.info(f"Notebook search for {query!r} reached the {self.fanout_deadline}s deadline")
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        ranked = sorted(heap, reverse=True)
+        return [(item, label) for _, _, item, label in ranked], len(pending), stopped_early
 
-    async def extract_content(self, page_identifier: str) -> str:
+    async def extract_content(
+        self, auth: RequestAuth, notebook_id: str, page_identifier: str
+    ) -> AsyncIterator[str]:
         """
         Extract content from specific OneNote page
 
         Args:
-            page_identifier: Page ID or title
+            auth: User access token and trace context
+            notebook_id: Notebook to look for the page in
+            page_identifier: Page title or a phrase identifying the page
 
-        Returns:
-            Extracted and summarized content
+        Yields:
+            Chunks of the extracted page content (title first)
         """
-        # TODO: Implement actual content extraction via MCP
-        return f"[Placeholder] Extracting content from page: '{page_identifier}'\n\nThis will be implemented using OneNote MCP Server."
+        hits = await self.mcp_client.call_tool(
+            "search_onenote",
+            {
+                **auth.to_arguments(),
+                "query": page_identifier,
+                "notebook_id": notebook_id,
+                "max_items": 1,
+                "fields": ["title"],
+            },
+        )
+        hits = hits["items"]
+        if not hits:
+            yield f"「{page_identifier}」に該当するページが見つかりませんでした。"
+            return
+
+        yield f"📄 {hits[0]['title']}\n\n"
+        page = await self.mcp_client.call_tool(
+            "get_page_content",
+            {**auth.to_arguments(), "page_id": hits[0]["page_id"], "format": "markdown"},
+        )
+        yield page["content"]
+        if page.get("truncated"):
+            yield "\n\n（長いため途中で省略しました）"
 
-    async def answer_question(self, notebook_id: str, question: str) -> str:
+    async def answer_question(self, auth: RequestAuth, notebook_id: str, question: str) -> AsyncIterator[str]:
         """
         ノートブックの内容から質問に回答
 
         Args:
+            auth: ユーザーのアクセストークンとトレースコンテキスト
             notebook_id: ノートブックID
             question: 質問内容
 
-        Returns:
-            回答結果
+        Yields:
+            回答結果のチャンク
         """
-        # TODO: Implement Q&A via MCP + LLM
-        return f"💡 質問「{question}」への回答:\n\n[Placeholder] ノートブック「{notebook_id}」の内容を元に回答を生成します。\n\nLLMとの連携により実装予定。"
+        yield f"💡 質問「{question}」への回答:\n\n"
+        chunks = await self.retriever.retrieve(
+            notebook_id,
+            question,
+            functools.partial(self._list_pages, auth, notebook_id),
+            functools.partial(self._load_page_text, auth),
+        )
+        if not chunks:
+            yield "回答の根拠となるページが見つかりませんでした。"
+            return
 
-    async def summarize_content(self, notebook_id: str, scope: str) -> str:
+        context = "\n\n".join(f"[{i}] {chunk.title}\n{chunk.text}" for i, chunk in enumerate(chunks, 1))
+        yield await self.llm.complete(
+            build_prompt(ANSWER_INSTRUCTION.format(question=question), context), self.answer_tokens
+        )
+        titles = list(dict.fromkeys(chunk.title for chunk in chunks))
+        yield "\n\n参照したページ:\n" + "".join(f"- {title}\n" for title in titles)
+
+    async def summarize_content(self, auth: RequestAuth, notebook_id: str, scope: str) -> AsyncIterator[str]:
         """
         ノートブック内容を要約
 
+        ページ一覧を取得し、ページごとの要約（変更のないページはキャッシュを再利用）を
+        階層的に統合する。
+
         Args:
+            auth: ユーザーのアクセストークンとトレースコンテキスト
             notebook_id: ノートブックID
             scope: 要約範囲の指定
 
-        Returns:
-            要約結果
-        """
-        # TODO: Implement summarization via MCP + LLM
-        return f"📋 要約結果 (範囲: {scope}):\n\n[Placeholder] ノートブック「{notebook_id}」の内容を要約します。\n\nLLMとの連携により実装予定。"
-
-    def get_mock_notebooks(self):
-        """モックノートブックデータを取得（ヘルパーメソッド）"""
-        return [
-            {"id": "nb-001", "name": "個人用ノート"},
-            {"id": "nb-002", "name": "プロジェクトA"},
-            {"id": "nb-003", "name": "ミーティング議事録"},
-            {"id": "nb-004", "name": "技術メモ"},
-        ]
+        Yields:
+            要約結果のチャンク
+        """
+        yield f"📋 要約結果 (範囲: {scope}):\n\n"
+        pages = await self._list_pages(auth, notebook_id)
+        if not pages:
+            yield "要約するページが見つかりませんでした。"
+            return
+
+        result = await self.summarizer.summarize(
+            pages, functools.partial(self._load_page_text, auth), f"ユーザーの要望: {scope}"
+        )
+        yield result.summary or "要約できる内容がありませんでした。"
+        footer = f"\n\n（{result.pages}ページ: 新規に要約{result.summarized}件、前回の要約を再利用{result.reused}件"
+        if result.failed:
+            footer += f"、取得できなかったページ{result.failed}件"
+        yield footer + "）"
+
+    async def _list_pages(self, auth: RequestAuth, notebook_id: str) -> list[PageRef]:
+        """ノートブックのすべてのページ（セクショングループ配下を含む）を取得"""
+        tree = await self.mcp_client.call_tool(
+            "get_notebook_tree",
+            {**auth.to_arguments(), "notebook_id": notebook_id, "include_pages": True},
+        )
+        return list(_tree_pages(tree))
+
+    async def _load_page_text(self, auth: RequestAuth, page: PageRef) -> str:
+        """ページ本文をテキストで取得"""
+        content = await self.mcp_client.call_tool(
+            "get_page_content",
+            {**auth.to_arguments(), "page_id": page.id, "format": "text"},
+        )
+        return content.get("content") or ""
+
+
+def _tree_pages(tree: dict) -> Iterator[PageRef]:
+    """get_notebook_treeの結果から、セクショングループ配下を含むすべてのページを列挙"""
+    # section_groupsは入れ子ではなく、すべての階層のグループを並べた一覧
+    containers = [tree, *tree.get("section_groups", [])]
+    for container in containers:
+        for section in container.get("sections", []):
+            for page in section.get("pages", []):
+                yield PageRef(page["id"], page["title"], page.get("last_modified_datetime"))
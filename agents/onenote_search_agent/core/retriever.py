@@ -0,0 +1,254 @@
+"""
+Chunk Retriever
+質問に関連するページの抜粋を、ノートブックごとのローカル索引から取り出す
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from .llm import EmbeddingBackend, estimate_tokens
+from .summarizer import PageRef, split_by_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Chunk:
+    """ページ本文の抜粋"""
+
+    page_id: str
+    title: str
+    text: str
+    tokens: int
+
+
+class ChunkIndex:
+    """
+    ノートブック1冊分の抜粋と埋め込みベクトル
+
+    ページの最終更新日時を記録し、更新時は追加・変更されたページだけを
+    分割・埋め込みし、削除されたページの抜粋を取り除く。検索は正規化済み
+    ベクトルの行列積（コサイン類似度）で行う。
+    """
+
+    def __init__(self, notebook_id: str):
+        self.notebook_id = notebook_id
+        self.refreshed_at = 0.0
+        self.lock = asyncio.Lock()
+        self._pages: dict[str, tuple[Optional[str], list[Chunk], np.ndarray]] = {}
+        self._chunks: list[Chunk] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return sum(len(chunks) for _, chunks, _ in self._pages.values())
+
+    async def refresh(
+        self,
+        pages: list[PageRef],
+        load_text: Callable[[PageRef], Awaitable[str]],
+        embedder: EmbeddingBackend,
+        chunk_tokens: int,
+        concurrency: int,
+    ) -> tuple[int, int]:
+        """
+        ページ一覧に合わせて索引を更新
+
+        Args:
+            pages: ノートブックの現在のページ一覧
+            load_text: ページ本文を取得する関数
+            embedder: 埋め込みバックエンド
+            chunk_tokens: 抜粋1件の上限トークン数
+            concurrency: 本文取得と埋め込みの同時実行数
+
+        Returns:
+            (索引し直したページ数, 削除したページ数)
+        """
+        current = {page.id for page in pages}
+        removed = [page_id for page_id in self._pages if page_id not in current]
+        for page_id in removed:
+            del self._pages[page_id]
+        changed = [
+            page for page in pages
+            if page.id not in self._pages
+            or page.last_modified is None
+            or self._pages[page.id][0] != page.last_modified
+        ]
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def index_page(page: PageRef) -> None:
+            async with semaphore:
+                chunks = [
+                    Chunk(page.id, page.title, text, estimate_tokens(text))
+                    for text in split_by_tokens(await load_text(page), chunk_tokens)
+                ]
+                vectors = (
+                    await embedder.embed([f"{page.title}\n{chunk.text}" for chunk in chunks])
+                    if chunks
+                    else np.zeros((0, 0), dtype=np.float32)
+                )
+            self._pages[page.id] = (page.last_modified, chunks, vectors)
+
+        outcomes = await asyncio.gather(*(index_page(page) for page in changed), return_exceptions=True)
+        for page, outcome in zip(changed, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.warning(f"Failed to index page {page.id}: {outcome}")
+
+        if changed or removed:
+            self._rebuild()
+        self.refreshed_at = time.monotonic()
+        return len(changed), len(removed)
+
+    def _rebuild(self) -> None:
+        """ページごとの抜粋とベクトルを検索用の1つの行列にまとめる"""
+        self._chunks = []
+        blocks = []
+        for _, chunks, vectors in self._pages.values():
+            if chunks:
+                self._chunks.extend(chunks)
+                blocks.append(vectors)
+        self._matrix = np.vstack(blocks) if blocks else None
+
+    def search(
+        self, query: np.ndarray, limit: int, page_ids: Optional[set[str]] = None
+    ) -> list[tuple[float, Chunk]]:
+        """
+        クエリベクトルとの類似度が高い抜粋を返す
+
+        Args:
+            query: 正規化済みのクエリベクトル
+            limit: 返す件数
+            page_ids: 対象とするページID（省略時はすべて）
+
+        Returns:
+            類似度の高い順の(類似度, 抜粋)
+        """
+        if self._matrix is None or limit <= 0:
+            return []
+        scores = self._matrix @ query
+        if page_ids is not None:
+            allowed = np.fromiter(
+                (chunk.page_id in page_ids for chunk in self._chunks), dtype=bool, count=len(self._chunks)
+            )
+            scores = np.where(allowed, scores, 0.0)
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self._chunks[i]) for i in top if scores[i] > 0]
+
+
+def pack_context(hits: list[tuple[float, Chunk]], budget: int) -> list[Chunk]:
+    """
+    類似度の高い順に、トークン予算に収まる抜粋を選ぶ
+
+    予算を超える抜粋は飛ばし、より短い下位の抜粋で残りの予算を埋める。
+    """
+    packed: list[Chunk] = []
+    used = 0
+    for _, chunk in hits:
+        if used + chunk.tokens <= budget:
+            packed.append(chunk)
+            used += chunk.tokens
+    return packed
+
+
+class Retriever:
+    """
+    ノートブックごとの抜粋索引を保持し、質問に関連する抜粋を選ぶ
+
+    索引はノートブックIDごとに保持して同じ会話の質問間で再利用し、
+    refresh_interval秒を過ぎてから質問された時にページ一覧の差分を反映する。
+    索引はユーザー間で共有するため、質問のたびに質問者のトークンでページ一覧を
+    取得し（取得できなければ何も返さない）、その一覧にあるページの抜粋だけを返す。
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingBackend,
+        chunk_tokens: int = 300,
+        context_tokens: int = 3000,
+        candidates: int = 50,
+        max_notebooks: int = 32,
+        refresh_interval: float = 60.0,
+        concurrency: int = 8,
+    ):
+        """
+        Args:
+            embedder: 埋め込みバックエンド
+            chunk_tokens: 抜粋1件の上限トークン数
+            context_tokens: プロンプトに含める抜粋の合計トークン数の上限
+            candidates: 類似度で選ぶ候補の抜粋数
+            max_notebooks: 索引を保持するノートブック数の上限
+            refresh_interval: 索引を再確認するまでの秒数
+            concurrency: 索引作成時の本文取得と埋め込みの同時実行数
+        """
+        self.embedder = embedder
+        self.chunk_tokens = chunk_tokens
+        self.context_tokens = context_tokens
+        self.candidates = candidates
+        self.max_notebooks = max_notebooks
+        self.refresh_interval = refresh_interval
+        self.concurrency = concurrency
+        self._indexes: OrderedDict[str, ChunkIndex] = OrderedDict()
+
+    @classmethod
+    def from_env(cls, embedder: EmbeddingBackend) -> "Retriever":
+        """環境変数から生成"""
+        return cls(
+            embedder,
+            chunk_tokens=int(os.getenv("RAG_CHUNK_TOKENS", "300")),
+            context_tokens=int(os.getenv("RAG_CONTEXT_TOKENS", "3000")),
+            max_notebooks=int(os.getenv("RAG_MAX_NOTEBOOKS", "32")),
+            refresh_interval=float(os.getenv("RAG_REFRESH_INTERVAL", "60")),
+        )
+
+    def _index(self, notebook_id: str) -> ChunkIndex:
+        index = self._indexes.get(notebook_id)
+        if index is None:
+            index = self._indexes[notebook_id] = ChunkIndex(notebook_id)
+            while len(self._indexes) > self.max_notebooks:
+                self._indexes.popitem(last=False)
+        self._indexes.move_to_end(notebook_id)
+        return index
+
+    async def retrieve(
+        self,
+        notebook_id: str,
+        question: str,
+        list_pages: Callable[[], Awaitable[list[PageRef]]],
+        load_text: Callable[[PageRef], Awaitable[str]],
+    ) -> list[Chunk]:
+        """
+        質問に関連する抜粋を、コンテキスト予算に収まる分だけ返す
+
+        Args:
+            notebook_id: ノートブックID
+            question: 質問
+            list_pages: 質問者の権限でノートブックのページ一覧を取得する関数
+            load_text: ページ本文を取得する関数
+
+        Returns:
+            類似度の高い順の抜粋
+        """
+        # 他のユーザーが作成した索引を読む前に、質問者がページを読めることを確認する
+        pages = await list_pages()
+        index = self._index(notebook_id)
+        async with index.lock:
+            if time.monotonic() - index.refreshed_at >= self.refresh_interval:
+                indexed, removed = await index.refresh(
+                    pages, load_text, self.embedder, self.chunk_tokens, self.concurrency
+                )
+                logger.info(
+                    f"Refreshed chunk index of notebook {notebook_id}: "
+                    f"{indexed} pages indexed, {removed} removed, {len(index)} chunks"
+                )
+
+        query = (await self.embedder.embed([question]))[0]
+        hits = index.search(query, self.candidates, {page.id for page in pages})
+        return pack_context(hits, self.context_tokens)
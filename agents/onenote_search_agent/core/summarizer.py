@@ -0,0 +1,286 @@
+"""
+Map-Reduce Summarizer
+ノートブックのページをトークン予算で分割して要約し、階層的に統合する
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from .llm import LLMBackend, build_prompt, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+MAP_INSTRUCTION = (
+    "以下はOneNoteページ「{title}」の本文（一部の場合あり）です。"
+    "重要な事実・決定事項・数値を落とさずに、日本語の箇条書きで簡潔に要約してください。"
+)
+REDUCE_INSTRUCTION = (
+    "以下は複数の要約です。重複をまとめて1つの要約に統合してください。{instruction}"
+)
+
+
+def split_by_tokens(text: str, budget: int) -> list[str]:
+    """
+    テキストをトークン予算以下のチャンクに分割
+
+    行の区切りで詰め、1行で予算を超える場合は文字数で切る。
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    used = 0
+    for line in text.splitlines():
+        tokens = estimate_tokens(line)
+        while tokens > budget:
+            # 1文字あたりのトークン数から、予算に収まる文字数を見積もって切る
+            cut = max(1, len(line) * budget // tokens)
+            if current:
+                chunks.append("\n".join(current))
+                current, used = [], 0
+            chunks.append(line[:cut])
+            line = line[cut:]
+            tokens = estimate_tokens(line)
+        if current and used + tokens > budget:
+            chunks.append("\n".join(current))
+            current, used = [], 0
+        current.append(line)
+        used += tokens
+    if current and "".join(current).strip():
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+@dataclass(frozen=True)
+class PageRef:
+    """要約対象のページ"""
+
+    id: str
+    title: str
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class SummaryResult:
+    """ノートブック要約の結果"""
+
+    summary: str
+    pages: int
+    summarized: int
+    reused: int
+    failed: int
+
+
+class PageSummaryCache:
+    """
+    ページ要約のキャッシュ
+
+    ページIDごとに最終更新日時と要約を保持し、更新日時が一致する場合のみ再利用する。
+    件数の上限を超えると最も長く使われていないページから破棄する。
+    """
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[Optional[str], str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, page: PageRef) -> Optional[str]:
+        """ページの要約を取得（未登録か更新されていればNone）"""
+        entry = self._entries.get(page.id)
+        if entry is None or page.last_modified is None or entry[0] != page.last_modified:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(page.id)
+        return entry[1]
+
+    def put(self, page: PageRef, summary: str) -> None:
+        """ページの要約を保存"""
+        self._entries[page.id] = (page.last_modified, summary)
+        self._entries.move_to_end(page.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RateLimiter:
+    """LLM呼び出しの同時実行数と、1分あたりの呼び出し回数の上限"""
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float = 0):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> None:
+        await self._semaphore.acquire()
+        if self._interval:
+            # 開始時刻を等間隔に予約し、予約した時刻まで待つ
+            async with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start)
+                self._next_start = start + self._interval
+            await asyncio.sleep(start - now)
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._semaphore.release()
+
+
+class MapReduceSummarizer:
+    """
+    Map-Reduce要約パイプライン
+
+    ページ本文をトークン予算で分割してチャンクごとに要約（map）し、要約を
+    予算に収まる単位でまとめて1つになるまで統合（reduce）する。ページ単位の
+    要約は更新日時つきでキャッシュし、変更のないページは本文の取得から省く。
+    """
+
+    def __init__(
+        self,
+        llm: LLMBackend,
+        cache: Optional[PageSummaryCache] = None,
+        chunk_tokens: int = 2000,
+        summary_tokens: int = 400,
+        max_concurrency: int = 4,
+        requests_per_minute: float = 0,
+    ):
+        """
+        Args:
+            llm: LLMバックエンド
+            cache: ページ要約キャッシュ
+            chunk_tokens: 1回のLLM呼び出しに渡す本文の上限トークン数
+            summary_tokens: 1回の要約の最大トークン数
+            max_concurrency: LLM呼び出しの同時実行数
+            requests_per_minute: 1分あたりのLLM呼び出し上限（0で無制限）
+        """
+        self.llm = llm
+        self.cache = cache or PageSummaryCache()
+        self.chunk_tokens = chunk_tokens
+        self.summary_tokens = summary_tokens
+        self.max_concurrency = max_concurrency
+        self._limiter = RateLimiter(max_concurrency, requests_per_minute)
+
+    @classmethod
+    def from_env(cls, llm: LLMBackend) -> "MapReduceSummarizer":
+        """環境変数から生成"""
+        return cls(
+            llm,
+            cache=PageSummaryCache(int(os.getenv("SUMMARY_CACHE_SIZE", "5000"))),
+            chunk_tokens=int(os.getenv("SUMMARY_CHUNK_TOKENS", "2000")),
+            summary_tokens=int(os.getenv("SUMMARY_MAX_TOKENS", "400")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+            requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+        )
+
+    async def _complete(self, instruction: str, body: str) -> str:
+        async with self._limiter:
+            return await self.llm.complete(build_prompt(instruction, body), self.summary_tokens)
+
+    async def summarize_page(
+        self, page: PageRef, load_text: Callable[[PageRef], Awaitable[str]]
+    ) -> tuple[str, bool]:
+        """
+        ページを要約（キャッシュがあれば本文を取得せずに再利用）
+
+        Args:
+            page: ページ
+            load_text: ページ本文を取得する関数
+
+        Returns:
+            (要約, キャッシュを再利用したか)
+        """
+        cached = self.cache.get(page)
+        if cached is not None:
+            return cached, True
+
+        chunks = split_by_tokens(await load_text(page), self.chunk_tokens)
+        instruction = MAP_INSTRUCTION.format(title=page.title)
+        summaries = await asyncio.gather(*(self._complete(instruction, chunk) for chunk in chunks))
+        summary = await self.reduce(list(summaries)) if len(summaries) > 1 else "".join(summaries)
+        self.cache.put(page, summary)
+        return summary, False
+
+    async def reduce(self, summaries: list[str], instruction: str = "") -> str:
+        """
+        要約を階層的に統合
+
+        予算に収まるだけの要約（最低2件）を1グループとして並列に統合し、
+        1件になるまで繰り返す。
+
+        Args:
+            summaries: 要約のリスト
+            instruction: 統合時の追加の指示
+
+        Returns:
+            統合された要約
+        """
+        prompt = REDUCE_INSTRUCTION.format(instruction=instruction)
+        while len(summaries) > 1:
+            groups: list[list[str]] = []
+            used = 0
+            for summary in summaries:
+                tokens = estimate_tokens(summary)
+                if groups and (len(groups[-1]) < 2 or used + tokens <= self.chunk_tokens):
+                    groups[-1].append(summary)
+                    used += tokens
+                else:
+                    groups.append([summary])
+                    used = tokens
+            if len(groups[-1]) == 1 and len(groups) > 1:
+                groups[-2].extend(groups.pop())
+            summaries = list(
+                await asyncio.gather(*(self._complete(prompt, "\n\n".join(group)) for group in groups))
+            )
+        return summaries[0] if summaries else ""
+
+    async def summarize(
+        self,
+        pages: list[PageRef],
+        load_text: Callable[[PageRef], Awaitable[str]],
+        instruction: str = "",
+    ) -> SummaryResult:
+        """
+        ページ群を要約して1つに統合
+
+        本文の取得はLLMの同時実行数の2倍までに抑え、取得できたページから順に
+        mapを開始する。取得や要約に失敗したページは除いて統合する。
+
+        Args:
+            pages: 要約対象のページ
+            load_text: ページ本文を取得する関数
+            instruction: 統合時の追加の指示（ユーザーの要望など）
+
+        Returns:
+            SummaryResult
+        """
+        in_flight = asyncio.Semaphore(self.max_concurrency * 2)
+
+        async def run(page: PageRef) -> tuple[str, bool]:
+            async with in_flight:
+                return await self.summarize_page(page, load_text)
+
+        outcomes = await asyncio.gather(*(run(page) for page in pages), return_exceptions=True)
+        summaries: list[str] = []
+        reused = failed = 0
+        for page, outcome in zip(pages, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.warning(f"Failed to summarize page {page.id}: {outcome}")
+                failed += 1
+                continue
+            summary, hit = outcome
+            reused += hit
+            if summary.strip():
+                summaries.append(f"## {page.title}\n{summary}")
+
+        return SummaryResult(
+            summary=await self.reduce(summaries, instruction),
+            pages=len(pages),
+            summarized=len(pages) - reused - failed,
+            reused=reused,
+            failed=failed,
+        )
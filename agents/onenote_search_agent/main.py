@@ -2,6 +2,9 @@
 OneNote Search Agent - A2A Protocol Compatible
 Main entry point using official A2A SDK
 """
+import os
+from contextlib import asynccontextmanager
+
 import uvicorn
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
@@ -11,75 +14,108 @@ from a2a.types import (
     AgentCard,
     AgentSkill,
 )
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
 from core.executor import OneNoteSearchAgentExecutor
+from core.metrics import registry
 
 
-if __name__ == '__main__':
-    # Define notebook listing skill
-    list_notebooks_skill = AgentSkill(
-        id='list_notebooks',
-        name='ノートブック一覧取得',
-        description='利用可能なOneNoteノートブックの一覧を取得します',
-        tags=['ノートブック', '一覧', 'onenote'],
-        examples=[
-            'ノートブック一覧を表示して',
-            '利用可能なノートブックを教えて',
-            'どのノートブックがありますか？',
-        ],
-    )
+# Define notebook listing skill
+list_notebooks_skill = AgentSkill(
+    id='list_notebooks',
+    name='ノートブック一覧取得',
+    description='利用可能なOneNoteノートブックの一覧を取得します',
+    tags=['ノートブック', '一覧', 'onenote', 'notebook', 'list'],
+    examples=[
+        'ノートブック一覧を表示して',
+        '利用可能なノートブックを教えて',
+        'どのノートブックがありますか？',
+    ],
+)
 
-    # Define search skill
-    search_skill = AgentSkill(
-        id='search_onenote',
-        name='OneNote検索',
-        description='指定されたOneNoteノートブック内から関連情報を検索します（ノートブック選択後に使用）',
-        tags=['検索', '情報検索', 'onenote'],
-        examples=[
-            '先週のミーティングノートを探して',
-            'プロジェクト仕様書を検索',
-            'Q4の計画書を探して',
-        ],
-    )
+# Define search skill
+search_skill = AgentSkill(
+    id='search_onenote',
+    name='OneNote検索',
+    description='指定されたOneNoteノートブック内から関連情報を検索します（ノートブック選択後に使用）',
+    tags=['検索', '情報検索', 'onenote', 'search'],
+    examples=[
+        '先週のミーティングノートを探して',
+        'プロジェクト仕様書を検索',
+        'Q4の計画書を探して',
+    ],
+)
 
-    # Define Q&A skill
-    qa_skill = AgentSkill(
-        id='answer_question',
-        name='質問回答',
-        description='選択されたノートブックの内容から質問に回答します',
-        tags=['質問', '回答', 'Q&A', 'onenote'],
-        examples=[
-            'プロジェクトの納期について教えて',
-            '前回のミーティングでの決定事項は？',
-            'このタスクの担当者は誰ですか？',
-        ],
-    )
+# Define cross-notebook search skill
+search_all_skill = AgentSkill(
+    id='search_all_notebooks',
+    name='ノートブック横断検索',
+    description='すべてのノートブックを並列に検索し、関連度の高い順に統合した結果を返します',
+    tags=['横断検索', 'すべてのノートブック', '全ノートブック', 'onenote', 'all notebooks'],
+    examples=[
+        'すべてのノートブックから予算を検索',
+        '全ノートブックで議事録を横断検索',
+    ],
+)
 
-    # Define summarization skill
-    summarize_skill = AgentSkill(
-        id='summarize_content',
-        name='コンテンツ要約',
-        description='選択されたノートブックの内容を要約します',
-        tags=['要約', 'まとめ', 'onenote'],
-        examples=[
-            '今月のミーティング内容を要約して',
-            'プロジェクトの進捗をまとめて',
-            '重要なポイントを抽出して',
-        ],
-    )
+# Define Q&A skill
+qa_skill = AgentSkill(
+    id='answer_question',
+    name='質問回答',
+    description='選択されたノートブックの内容から質問に回答します',
+    tags=['質問', '回答', 'Q&A', 'onenote', '教えて', '?'],
+    examples=[
+        'プロジェクトの納期について教えて',
+        '前回のミーティングでの決定事項は？',
+        'このタスクの担当者は誰ですか？',
+    ],
+)
 
-    # Define content extraction skill
-    extract_skill = AgentSkill(
-        id='extract_content',
-        name='OneNoteコンテンツ抽出',
-        description='特定のOneNoteページからコンテンツを抽出します',
-        tags=['抽出', 'コンテンツ', 'onenote'],
-        examples=[
-            "「Q1計画」というタイトルのページからコンテンツを抽出して",
-            '昨日のミーティングノートを取得',
-            'プロジェクトキックオフノートを表示',
-        ],
-    )
+# Define summarization skill
+summarize_skill = AgentSkill(
+    id='summarize_content',
+    name='コンテンツ要約',
+    description='選択されたノートブックの内容を要約します',
+    tags=['要約', 'まとめ', 'onenote', 'summary'],
+    examples=[
+        '今月のミーティング内容を要約して',
+        'プロジェクトの進捗をまとめて',
+        '重要なポイントを抽出して',
+    ],
+)
+
+# Define content extraction skill
+extract_skill = AgentSkill(
+    id='extract_content',
+    name='OneNoteコンテンツ抽出',
+    description='特定のOneNoteページからコンテンツを抽出します',
+    tags=['抽出', 'コンテンツ', 'onenote', 'extract'],
+    examples=[
+        "「Q1計画」というタイトルのページからコンテンツを抽出して",
+        '昨日のミーティングノートを取得',
+        'プロジェクトキックオフノートを表示',
+    ],
+)
+
+# Skills in priority order; their tags are compiled into the executor's intent router
+SKILLS = [
+    list_notebooks_skill,
+    search_skill,
+    search_all_skill,
+    qa_skill,
+    summarize_skill,
+    extract_skill,
+]
+
+
+def create_app():
+    """
+    Build the A2A Starlette application
 
+    The executor, MCP session pool and stores are created here and closed by
+    the application's lifespan.
+    """
     # Create public agent card
     public_agent_card = AgentCard(
         name='OneNote検索エージェント',
@@ -89,35 +125,53 @@ if __name__ == '__main__':
         default_input_modes=['text'],
         default_output_modes=['text'],
         capabilities=AgentCapabilities(
-            streaming=False,
+            streaming=True,
             push_notifications=False,
             state_transition_history=True,  # 対話状態管理を有効化
         ),
-        skills=[
-            list_notebooks_skill,
-            search_skill,
-            qa_skill,
-            summarize_skill,
-            extract_skill,
-        ],
+        skills=SKILLS,
     )
 
     # Create request handler with our executor
+    executor = OneNoteSearchAgentExecutor(SKILLS)
     request_handler = DefaultRequestHandler(
-        agent_executor=OneNoteSearchAgentExecutor(),
+        agent_executor=executor,
         task_store=InMemoryTaskStore(),
     )
 
+    @asynccontextmanager
+    async def lifespan(app):
+        # MCPセッション、対話状態ストア、LLMクライアントはタスクをまたいで再利用し、終了時に閉じる
+        if os.getenv('WARM_UP', 'true').lower() in ('1', 'true', 'yes'):
+            # 最初のターンでセッション初期化を待たないよう、受付開始前に接続しておく
+            await executor.agent.mcp_client.warm_up()
+        yield
+        await executor.agent.mcp_client.close()
+        executor.agent.conversations.close()
+        await executor.agent.llm.close()
+        await executor.agent.embedder.close()
+
     # Create A2A Starlette application
     server = A2AStarletteApplication(
         agent_card=public_agent_card,
         http_handler=request_handler,
     )
+    app = server.build(lifespan=lifespan)
+
+    async def metrics(request: Request) -> PlainTextResponse:
+        # ターンの振り分け・MCP呼び出しのメトリクス（Prometheusテキスト形式）
+        return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4')
+
+    app.add_route('/metrics', metrics, methods=['GET'])
+    return app
 
-    # Run the server
-    # reload=True enables hot reload for development
+
+if __name__ == '__main__':
+    # 開発用: ファイル変更で自動リロード（本番は serve.py）
+    # reloadにはアプリのimport文字列が必要なため、ファクトリとして渡す
     uvicorn.run(
-        server.build(),
+        'main:create_app',
+        factory=True,
         host='0.0.0.0',
         port=8000,
         reload=True,
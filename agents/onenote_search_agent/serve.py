@@ -0,0 +1,133 @@
+"""
+OneNote Search Agent - 本番用エントリーポイント
+共有ソケット上でuvicornワーカーをpre-forkで起動する（リロードなし）
+"""
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Optional
+
+import uvicorn
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 起動からこの秒数以内に終了したワーカーは起動失敗とみなす
+MIN_WORKER_UPTIME = 5.0
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """全ワーカーで共有する待ち受けソケットを作成（ウォームアップ中の接続はbacklogで待機）"""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket) -> None:
+    """
+    ワーカー内でアプリを生成して共有ソケットで待ち受ける
+
+    MCPセッションプール・LLMクライアント・対話状態ストアはワーカーごとに
+    create_app()で生成し、lifespanで接続（ウォームアップ）・解放する。
+    """
+    from main import create_app
+
+    config = uvicorn.Config(
+        create_app(),
+        lifespan='on',
+        access_log=False,
+        timeout_graceful_shutdown=float(os.getenv('WORKER_SHUTDOWN_TIMEOUT', '30')),
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """ワーカーをforkし、異常終了したものを置き換え、シグナルで停止させる"""
+
+    def __init__(self, sock: socket.socket, workers: int):
+        self.sock = sock
+        self.workers = workers
+        self._children: dict[int, float] = {}
+        self._stopping = False
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            # ワーカー: 終了シグナルはuvicornが処理する
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(self.sock)
+            except BaseException:
+                logger.exception('Worker failed')
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[pid] = time.monotonic()
+        logger.info(f'Started worker {pid}')
+
+    def _stop(self, signum: int, frame: Optional[object]) -> None:
+        self._stopping = True
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        """シグナル受信後に全ワーカーが終了するまで監視する"""
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self._spawn()
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self._children.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logger.warning(f'Worker {pid} exited with {code}; starting a replacement')
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                # 設定ミスなどで起動できない場合にforkを繰り返さない
+                time.sleep(MIN_WORKER_UPTIME)
+            if not self._stopping:
+                self._spawn()
+        self.sock.close()
+
+
+def main() -> None:
+    """ソケットを開き、アプリをプリロードしてから設定数のワーカーで待ち受ける"""
+    host = os.getenv('HOST', '0.0.0.0')
+    port = int(os.getenv('PORT', '8000'))
+    workers = int(os.getenv('WORKERS', '1')) or os.cpu_count() or 1
+    sock = bind_socket(host, port, int(os.getenv('LISTEN_BACKLOG', '2048')))
+
+    # プリロード: a2a・mcp SDKとスキル定義をfork前に一度だけimportする
+    import main as _  # noqa: F401
+
+    if workers > 1:
+        # A2Aタスクはワーカーのメモリに保持されるため、継続ターンは別ワーカーに届くと失われる
+        logger.warning(
+            f'Running {workers} workers: multi-turn tasks require the same worker; '
+            'set CONVERSATION_STORE_PATH and prefer WORKERS=1 per container for A2A tasks'
+        )
+    logger.info(f'Starting OneNote Search Agent on {host}:{port} with {workers} workers')
+    if workers == 1:
+        run_worker(sock)
+        return
+    Supervisor(sock, workers).run()
+
+
+if __name__ == '__main__':
+    main()
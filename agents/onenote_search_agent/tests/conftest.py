@@ -0,0 +1,7 @@
+"""
+テスト共通設定: エージェントのディレクトリからcoreをimportできるようにする
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,115 @@
+"""
+IntentRouterのテスト
+"""
+import pytest
+
+from core.intent_router import IntentRouter
+
+KEYWORDS = {
+    'list_notebooks': ['ノートブック', '一覧', 'onenote', 'notebook', 'list'],
+    'search_onenote': ['検索', '情報検索', 'onenote', 'search'],
+    'search_all_notebooks': ['横断検索', 'すべてのノートブック', '全ノートブック', 'onenote', 'all notebooks'],
+    'answer_question': ['質問', '回答', 'Q&A', 'onenote', '教えて', '?'],
+    'summarize_content': ['要約', 'まとめ', 'onenote', 'summary'],
+    'extract_content': ['抽出', 'コンテンツ', 'onenote', 'extract'],
+}
+
+
+@pytest.fixture
+def router() -> IntentRouter:
+    return IntentRouter(KEYWORDS)
+
+
+TRIGGERS = ('search_all_notebooks', 'search_onenote')
+
+
+@pytest.mark.parametrize(
+    'text, query',
+    [
+        ('すべてのノートブックから予算を検索', '予算'),
+        ('全ノートブックで議事録を横断検索', '議事録'),
+        ('全ノートブックから「Q1計画」を検索して', 'q1計画'),
+        ('search all notebooks for budget report', 'budget report'),
+        ('予算', '予算'),
+        # 語の先頭・末尾の助詞と同じ文字は取り除かない
+        ('すべてのノートブックからはがきを検索', 'はがき'),
+        ('すべてのノートブックから にんじん を検索', 'にんじん'),
+        ('すべてのノートブックではがきを検索してください', 'はがき'),
+        # ほかのスキルのキーワードは検索語に残す
+        ('すべてのノートブックから要約テンプレートを検索', '要約テンプレート'),
+        ('全ノートブックでQ&A集を横断検索', 'q&a集'),
+        ('all notebooks: shopping list', 'shopping list'),
+        # 英単語の一部に一致したキーワードは取り除かない
+        ('all notebooks research notes', 'research notes'),
+    ],
+)
+def test_strip_keywords_extracts_query(router, text, query):
+    assert router.strip_keywords(text, TRIGGERS) == query
+
+
+def test_strip_keywords_keeps_input_made_only_of_keywords(router):
+    assert router.strip_keywords('すべてのノートブック', TRIGGERS) == 'すべてのノートブック'
+
+
+def names(intents) -> list[str]:
+    return [intent.name for intent in intents]
+
+
+def test_route_picks_the_skill_of_the_matched_keyword(router):
+    intents = router.route('議事録を要約して')
+
+    assert names(intents) == ['summarize_content']
+    assert intents[0].confidence == 1.0
+
+
+def test_route_ignores_keywords_shared_by_every_skill(router):
+    assert router.route('OneNote') == []
+
+
+def test_route_normalizes_width_and_case(router):
+    assert names(router.route('ＳＵＭＭＡＲＹ please')) == ['summarize_content']
+
+
+def test_route_ranks_by_keyword_weight(router):
+    intents = router.route('全ノートブックで横断検索')
+
+    assert intents[0].name == 'search_all_notebooks'
+    assert intents[0].confidence == pytest.approx(0.5)
+    assert sum(intent.confidence for intent in intents) == pytest.approx(1.0)
+
+
+def test_route_counts_a_repeated_keyword_once(router):
+    intents = router.route('要約の要約と抽出')
+
+    assert [(intent.name, intent.confidence) for intent in intents] == [
+        ('summarize_content', 0.5),
+        ('extract_content', 0.5),
+    ]
+
+
+def test_route_breaks_ties_in_declaration_order(router):
+    assert names(router.route('search list')) == ['list_notebooks', 'search_onenote']
+
+
+def test_route_selects_the_longest_matching_notebook(router):
+    notebooks = [{'id': 'nb-1', 'name': '仕事'}, {'id': 'nb-2', 'name': '仕事ノート'}]
+
+    intents = router.route('仕事ノート', notebooks)
+
+    assert intents[0].name == 'select_notebook'
+    assert intents[0].value == 'nb-2'
+
+
+def test_route_reads_notebook_ids_from_the_current_listing(router):
+    router.route('仕事', [{'id': 'old', 'name': '仕事'}])
+
+    intents = router.route('仕事', [{'id': 'new', 'name': '仕事'}])
+
+    assert intents[0].value == 'new'
+
+
+def test_best_only_considers_candidates(router):
+    text = '全ノートブックで横断検索'
+
+    assert router.best(text, ['search_onenote']).name == 'search_onenote'
+    assert router.best(text, ['summarize_content']) is None
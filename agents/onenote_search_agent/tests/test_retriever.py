@@ -0,0 +1,73 @@
+"""
+Retrieverのテスト
+"""
+import asyncio
+
+import pytest
+
+from core.llm import HashingEmbeddingBackend
+from core.retriever import Retriever
+from core.summarizer import PageRef
+
+TEXTS = {
+    'p1': '来期の予算は前年比で増額する',
+    'p2': '採用計画は下期に見直す',
+}
+
+
+class Notebook:
+    """ユーザーごとに見えるページと、本文の取得回数を記録する"""
+
+    def __init__(self):
+        self.visible = {'alice': ['p1', 'p2'], 'bob': ['p2']}
+        self.loads = 0
+
+    async def list_pages(self, user: str) -> list[PageRef]:
+        if user not in self.visible:
+            raise PermissionError(f'{user} cannot read the notebook')
+        return [PageRef(page_id, page_id, '2024-05-01T09:00:00Z') for page_id in self.visible[user]]
+
+    async def load_text(self, page: PageRef) -> str:
+        self.loads += 1
+        return TEXTS[page.id]
+
+
+@pytest.fixture
+def notebook() -> Notebook:
+    return Notebook()
+
+
+def ask(retriever: Retriever, notebook: Notebook, user: str, question: str) -> list[str]:
+    chunks = asyncio.run(
+        retriever.retrieve(
+            'nb', question, lambda: notebook.list_pages(user), notebook.load_text
+        )
+    )
+    return [chunk.page_id for chunk in chunks]
+
+
+def test_index_is_reused_between_questions(notebook):
+    retriever = Retriever(HashingEmbeddingBackend())
+
+    assert ask(retriever, notebook, 'alice', '予算') == ['p1']
+    assert ask(retriever, notebook, 'alice', '採用計画') == ['p2']
+    assert notebook.loads == 2
+
+
+def test_excerpts_are_limited_to_pages_the_caller_can_list(notebook):
+    retriever = Retriever(HashingEmbeddingBackend())
+    ask(retriever, notebook, 'alice', '予算')
+
+    assert ask(retriever, notebook, 'bob', '予算') == []
+    assert ask(retriever, notebook, 'bob', '採用計画') == ['p2']
+
+
+def test_caller_without_access_gets_nothing_from_a_shared_index(notebook):
+    retriever = Retriever(HashingEmbeddingBackend())
+    ask(retriever, notebook, 'alice', '予算')
+
+    with pytest.raises(PermissionError):
+        ask(retriever, notebook, 'mallory', '予算')
+
+    notebook.visible['alice'] = ['p2']
+    assert ask(retriever, notebook, 'alice', '予算') == []
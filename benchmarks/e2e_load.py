@@ -0,0 +1,406 @@
+"""
+End-to-end load benchmark for the OneNote MCP server and search agent.
+
+Starts the fake Graph / Entra services from fake_graph.py, the MCP server from
+mcp/onenote_mcp (pointed at the fake Graph, with the MSAL client replaced by
+one that calls the fake token endpoint) and the A2A agent from
+agents/onenote_search_agent, all in this process. It then drives every MCP
+tool and multi-turn agent conversations under concurrent load.
+
+For each scenario it reports throughput, p50/p95/p99 latency, errors and the
+upstream Graph/token calls per request (by route). Results are written as JSON
+(named after the current commit) so runs can be compared between commits.
+
+Usage:
+    python benchmarks/e2e_load.py --requests 200 --concurrency 16
+    python benchmarks/e2e_load.py --throttle-ratio 0.05 --latency-ms 50
+    python benchmarks/e2e_load.py --compare benchmarks/results/e2e-<commit>.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+import uvicorn
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "mcp", "onenote_mcp"))
+sys.path.insert(0, os.path.join(ROOT, "agents", "onenote_search_agent"))
+
+from fake_graph import BASE_PATH, FakeGraph, FakeGraphConfig, FakeTenant, create_app  # noqa: E402
+
+TENANT_ID = "bench-tenant"
+QUERIES = ["予算", "議事録", "budget", "release", "設計 レビュー", "roadmap risk"]
+
+
+class TokenEndpointClient:
+    """MSAL stand-in that performs the OBO exchange against the fake token endpoint."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = httpx.Client(timeout=10.0)
+
+    def acquire_token_on_behalf_of(self, user_assertion: str, scopes: list[str]) -> dict[str, Any]:
+        response = self._client.post(
+            self.url,
+            data={
+                "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
+                "requested_token_use": "on_behalf_of",
+                "assertion": user_assertion,
+                "scope": " ".join(scopes),
+            },
+        )
+        return response.json()
+
+
+def user_token(user: int) -> str:
+    """Unsigned JWT with distinct tid/oid claims (the server only decodes them)."""
+
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+    return f"{encode({'alg': 'none'})}.{encode({'tid': TENANT_ID, 'oid': f'user-{user}'})}.sig"
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float, upstream: Counter, requests: int) -> dict[str, Any]:
+    ordered = sorted(latencies)
+    throttled = upstream.pop("throttled", 0)
+    calls = sum(upstream.values())
+    return {
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "upstream_calls": calls,
+        "upstream_calls_per_request": round(calls / requests, 3) if requests else 0.0,
+        "upstream_throttled": throttled,
+        "upstream_by_route": dict(sorted(upstream.items())),
+    }
+
+
+async def run_load(
+    call: Callable[[int], Awaitable[Any]], requests: int, concurrency: int, graph: FakeGraph
+) -> dict[str, Any]:
+    """Issue `requests` calls from `concurrency` workers and summarize them."""
+    before = Counter(graph.counters.snapshot())
+    latencies: list[float] = []
+    errors = 0
+    indexes = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in indexes:
+            start = time.perf_counter()
+            try:
+                await call(i)
+            except Exception as e:
+                if not errors:
+                    logging.warning(f"First failure: {type(e).__name__}: {e}")
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    upstream = Counter(graph.counters.snapshot())
+    upstream.subtract(before)
+    return summarize(latencies, errors, elapsed, +upstream, requests)
+
+
+def span_breakdown(spans: list) -> dict[str, Any]:
+    """Count and duration percentiles of recorded spans, by span name."""
+    durations: dict[str, list[float]] = {}
+    for span in spans:
+        durations.setdefault(span.name, []).append(span.duration_ms)
+    breakdown = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        breakdown[name] = {
+            "count": len(values),
+            "mean_ms": round(statistics.mean(values), 3),
+            "p50_ms": round(percentile(values, 0.50), 3),
+            "p95_ms": round(percentile(values, 0.95), 3),
+        }
+    return breakdown
+
+
+def tool_scenarios(tenant: FakeTenant) -> dict[str, Callable[[int], dict[str, Any]]]:
+    """Arguments for each MCP tool, varied by request index."""
+    notebooks = [nb["id"] for nb in tenant.notebook_items]
+    sections = list(tenant.pages_of)
+    pages = list(tenant.page_text)
+    return {
+        "list_notebooks": lambda i: {},
+        "list_sections": lambda i: {"notebook_id": notebooks[i % len(notebooks)]},
+        "list_pages": lambda i: {"section_id": sections[i % len(sections)]},
+        "search_onenote": lambda i: {"query": QUERIES[i % len(QUERIES)], "max_items": 10},
+        "get_page_content": lambda i: {"page_id": pages[i % len(pages)], "format": "text"},
+        "get_notebook_tree": lambda i: {"notebook_id": notebooks[i % len(notebooks)]},
+        "list_pages_bulk": lambda i: {"section_ids": [sections[(i + k) % len(sections)] for k in range(4)]},
+        "get_pages_content_bulk": lambda i: {"page_ids": [pages[(i * 5 + k) % len(pages)] for k in range(5)]},
+    }
+
+
+async def send_message(client: httpx.AsyncClient, token: str, text: str, task: Optional[dict]) -> dict:
+    """Send one A2A message/send turn and return the resulting task."""
+    message: dict[str, Any] = {
+        "role": "user",
+        "parts": [{"kind": "text", "text": text}],
+        "messageId": str(uuid.uuid4()),
+        "metadata": {"access_token": token},
+    }
+    if task is not None:
+        message["taskId"] = task["id"]
+        message["contextId"] = task["contextId"]
+    response = await client.post(
+        "/",
+        json={"jsonrpc": "2.0", "id": str(uuid.uuid4()), "method": "message/send", "params": {"message": message}},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    response.raise_for_status()
+    body = response.json()
+    if "error" in body:
+        raise RuntimeError(body["error"])
+    return body["result"]
+
+
+async def run_agent(
+    url: str, conversations: int, concurrency: int, users: int, graph: FakeGraph
+) -> dict[str, Any]:
+    """Drive multi-turn conversations (list -> select -> search -> question) against the agent."""
+    turns = [
+        ("list", lambda i: "ノートブック一覧を表示して"),
+        ("select", lambda i: "1"),
+        ("search", lambda i: QUERIES[i % len(QUERIES)]),
+        ("question", lambda i: f"{QUERIES[i % len(QUERIES)]}について教えて"),
+    ]
+    latencies: dict[str, list[float]] = {name: [] for name, _ in turns}
+    errors: Counter = Counter()
+    before = Counter(graph.counters.snapshot())
+
+    async with httpx.AsyncClient(base_url=url, timeout=120.0) as client:
+        indexes = iter(range(conversations))
+
+        async def worker() -> None:
+            for i in indexes:
+                token = user_token(i % users)
+                task = None
+                for name, text in turns:
+                    start = time.perf_counter()
+                    try:
+                        task = await send_message(client, token, text(i), task)
+                    except Exception as e:
+                        if not errors:
+                            logging.warning(f"First agent failure: {type(e).__name__}: {e}")
+                        errors[name] += 1
+                        break
+                    finally:
+                        latencies[name].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    upstream = Counter(graph.counters.snapshot())
+    upstream.subtract(before)
+    results = {"conversations": summarize([], sum(errors.values()), elapsed, +upstream, conversations)}
+    for name, values in latencies.items():
+        results[f"turn_{name}"] = summarize(values, errors[name], elapsed, Counter(), len(values))
+    return results
+
+
+def commit_id() -> str:
+    """Short commit hash of the working tree, marked when it has local changes."""
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict[str, Any]) -> None:
+    print(f"{'scenario':<32}{'rps':>9}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'err':>6}{'upstream/req':>14}")
+    for group in ("tools", "agent"):
+        for name, row in results.get(group, {}).items():
+            print(
+                f"{group + ':' + name:<32}{row['throughput_rps']:>9.1f}{row['p50_ms']:>9.1f}"
+                f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['errors']:>6}"
+                f"{row['upstream_calls_per_request']:>14.2f}"
+            )
+
+
+def print_comparison(results: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Relative change of throughput, p95 and upstream calls against a previous run."""
+
+    def change(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nvs {baseline.get('commit', '?')}:")
+    print(f"{'scenario':<32}{'rps':>10}{'p95':>10}{'upstream/req':>14}")
+    for group in ("tools", "agent"):
+        for name, row in results.get(group, {}).items():
+            old = baseline.get(group, {}).get(name)
+            if old is None:
+                continue
+            print(
+                f"{group + ':' + name:<32}{change(row['throughput_rps'], old['throughput_rps']):>10}"
+                f"{change(row['p95_ms'], old['p95_ms']):>10}"
+                f"{change(row['upstream_calls_per_request'], old['upstream_calls_per_request']):>14}"
+            )
+
+
+async def serve(app: Any, port: int) -> tuple[uvicorn.Server, asyncio.Task]:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notebooks", type=int, default=5)
+    parser.add_argument("--sections", type=int, default=4)
+    parser.add_argument("--section-groups", type=int, default=1)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--throttle-ratio", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=100, help="Calls per MCP tool")
+    parser.add_argument("--conversations", type=int, default=20, help="Agent conversations")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--tools", nargs="*", help="Only run these MCP tools")
+    parser.add_argument("--skip-agent", action="store_true")
+    parser.add_argument("--trace", action="store_true", help="Record MCP server spans per tool")
+    parser.add_argument("--port", type=int, default=8790, help="First of three local ports")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/e2e-<commit>.json)")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    graph_port, mcp_port, agent_port = args.port, args.port + 1, args.port + 2
+    os.environ.update(
+        {
+            "TENANT_ID": TENANT_ID,
+            "CLIENT_ID": "bench-client",
+            "CLIENT_SECRET": "bench-secret",
+            "GRAPH_API_BASE_URL": f"http://127.0.0.1:{graph_port}{BASE_PATH}",
+            "SYNC_ENABLED": "false",
+            "ONENOTE_MCP_URL": f"http://127.0.0.1:{mcp_port}/mcp",
+            "MCP_HEALTH_CHECK_INTERVAL": "0",
+        }
+    )
+    if args.trace:
+        os.environ["TRACING_EXPORTER"] = "memory"
+    for name in ("AZURE_OPENAI_API_KEY", "AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_RESOURCE_NAME"):
+        os.environ.pop(name, None)
+
+    # Imported after the environment is set: both services read it at import time
+    from core.mcp_client import OneNoteMCPClient, RequestAuth
+    from main import create_app as create_agent_app
+    from src.auth import auth_service
+    from src.server import mcp
+    from src.tracing import tracer
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    tenant = FakeTenant(args.notebooks, args.sections, args.section_groups, args.pages)
+    graph = FakeGraph(
+        tenant,
+        FakeGraphConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            throttle_ratio=args.throttle_ratio,
+            retry_after=args.retry_after,
+        ),
+    )
+    auth_service.app = TokenEndpointClient(f"http://127.0.0.1:{graph_port}/{TENANT_ID}/oauth2/v2.0/token")
+
+    servers = [await serve(create_app(graph), graph_port), await serve(mcp.http_app(), mcp_port)]
+    results: dict[str, Any] = {
+        "commit": commit_id(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {**vars(args), "tenant_pages": len(tenant.page_text)},
+        "tools": {},
+    }
+    try:
+        client = OneNoteMCPClient(os.environ["ONENOTE_MCP_URL"], pool_size=4, max_in_flight=args.concurrency)
+        scenarios = tool_scenarios(tenant)
+        for tool in args.tools or scenarios:
+            arguments = scenarios[tool]
+
+            async def call(i: int, tool: str = tool, arguments=arguments) -> Any:
+                auth = RequestAuth(access_token=user_token(i % args.users))
+                return await client.call_tool(tool, {**auth.to_arguments(), **arguments(i)})
+
+            results["tools"][tool] = await run_load(call, args.requests, args.concurrency, graph)
+            if tracer.enabled:
+                tracer.flush()
+                results["tools"][tool]["spans"] = span_breakdown(tracer.exporter.spans)
+                tracer.exporter.clear()
+            print(f"  {tool}: done", file=sys.stderr)
+        await client.close()
+
+        if not args.skip_agent:
+            servers.append(await serve(create_agent_app(), agent_port))
+            results["agent"] = await run_agent(
+                f"http://127.0.0.1:{agent_port}", args.conversations, args.concurrency, args.users, graph
+            )
+    finally:
+        for server, task in reversed(servers):
+            server.should_exit = True
+            await task
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"e2e-{results['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print_results(results)
+    if args.trace:
+        print(f"\n{'tool / span':<40}{'count':>8}{'mean ms':>10}{'p95 ms':>10}")
+        for tool, row in results["tools"].items():
+            for name, span in row.get("spans", {}).items():
+                print(
+                    f"{tool + ' / ' + name:<40}{span['count']:>8}"
+                    f"{span['mean_ms']:>10.2f}{span['p95_ms']:>10.2f}"
+                )
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,327 @@
+"""
+Local fake Microsoft Graph (OneNote) and Entra ID token endpoint for benchmarks.
+
+Serves a deterministic tenant of configurable size with the OneNote routes the
+MCP server uses: notebooks, sections, section groups and pages collections
+(with $select, $top/$skip pagination via @odata.nextLink, $orderby, $count, $expand
+of parentNotebook and parentSectionGroup, and search), single-resource
+lastModifiedDateTime probes, page content, JSON batching (/$batch) and an
+OAuth token endpoint. Every request can be delayed and a share of them
+answered with 429 Retry-After. Upstream calls are counted per route so
+harnesses can attribute them.
+
+Usage (standalone):
+    python benchmarks/fake_graph.py --port 8790 --notebooks 5 --latency-ms 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, Response
+from starlette.routing import Route
+
+BASE_PATH = "/v1.0"
+MAX_TOP = 100
+DEFAULT_TOP = 20
+TIMESTAMP = "2024-01-{day:02d}T09:00:00Z"
+WORDS = [
+    "予算", "議事録", "仕様", "納期", "リリース", "設計", "レビュー", "見積もり",
+    "budget", "roadmap", "design", "meeting", "release", "customer", "risk", "plan",
+]
+
+
+@dataclass
+class FakeTenant:
+    """Deterministic OneNote content: notebooks > (section groups >) sections > pages."""
+
+    notebooks: int = 5
+    sections: int = 4
+    section_groups: int = 1
+    pages: int = 10
+    page_paragraphs: int = 20
+    seed: int = 1
+
+    def __post_init__(self):
+        self.notebook_items: list[dict] = []
+        self.sections_of: dict[str, list[dict]] = {}
+        self.groups_of: dict[str, list[dict]] = {}
+        self.pages_of: dict[str, list[dict]] = {}
+        self.notebook_of_section: dict[str, str] = {}
+        self.group_of_section: dict[str, Optional[str]] = {}
+        self.notebook_of_page: dict[str, str] = {}
+        self.resources: dict[str, dict] = {}
+        self.page_text: dict[str, str] = {}
+        rng = random.Random(self.seed)
+
+        for n in range(self.notebooks):
+            notebook = self._item(f"nb-{n}", displayName=f"Notebook {n}", day=1 + n % 28)
+            self.notebook_items.append(notebook)
+            containers = [(f"/me/onenote/notebooks/{notebook['id']}", notebook["id"], "", None)]
+            self.groups_of[containers[0][0]] = []
+            for g in range(self.section_groups):
+                group = self._item(f"sg-{n}-{g}", displayName=f"Group {n}.{g}", day=1 + g % 28)
+                self.groups_of[containers[0][0]].append(group)
+                path = f"/me/onenote/sectionGroups/{group['id']}"
+                self.groups_of[path] = []
+                containers.append((path, notebook["id"], f"g{g}-", group["id"]))
+
+            for path, notebook_id, prefix, group_id in containers:
+                self.sections_of[path] = []
+                for s in range(self.sections):
+                    section = self._item(
+                        f"sec-{n}-{prefix}{s}", displayName=f"Section {n}.{prefix}{s}", day=1 + s % 28
+                    )
+                    self.sections_of[path].append(section)
+                    self.notebook_of_section[section["id"]] = notebook_id
+                    self.group_of_section[section["id"]] = group_id
+                    pages = []
+                    for p in range(self.pages):
+                        page_id = f"page-{n}-{prefix}{s}-{p}"
+                        title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {p}"
+                        page = self._item(page_id, title=title, day=1 + p % 28)
+                        page["contentUrl"] = f"https://graph.invalid{BASE_PATH}/me/onenote/pages/{page_id}/content"
+                        pages.append(page)
+                        self.notebook_of_page[page_id] = notebook_id
+                        self.page_text[page_id] = " ".join(
+                            " ".join(rng.choice(WORDS) for _ in range(12)) + "。"
+                            for _ in range(self.page_paragraphs)
+                        )
+                    self.pages_of[section["id"]] = pages
+
+    def _item(self, item_id: str, day: int, **fields: Any) -> dict:
+        item = {
+            "id": item_id,
+            "createdDateTime": TIMESTAMP.format(day=day),
+            "lastModifiedDateTime": TIMESTAMP.format(day=day),
+            **fields,
+        }
+        self.resources[item_id] = item
+        return item
+
+    def page_html(self, page_id: str) -> str:
+        page = self.resources[page_id]
+        paragraphs = "".join(f"<p>{line}</p>" for line in self.page_text[page_id].split("。") if line)
+        return f"<html><head><title>{page['title']}</title></head><body>{paragraphs}</body></html>"
+
+    def collection(self, path: str) -> Optional[list[dict]]:
+        """Items of a collection path relative to the API base, or None if unknown."""
+        if path == "/me/onenote/notebooks":
+            return self.notebook_items
+        if path == "/me/onenote/sections":
+            return [
+                {
+                    **section,
+                    "parentNotebook": {"id": self.notebook_of_section[section["id"]]},
+                    "parentSectionGroup": (
+                        {"id": self.group_of_section[section["id"]]}
+                        if self.group_of_section[section["id"]]
+                        else None
+                    ),
+                }
+                for sections in self.sections_of.values()
+                for section in sections
+            ]
+        if path == "/me/onenote/pages":
+            return [
+                {**page, "parentNotebook": {"id": self.notebook_of_page[page["id"]]}}
+                for pages in self.pages_of.values()
+                for page in pages
+            ]
+        match = re.fullmatch(r"(/me/onenote/(?:notebooks|sectionGroups)/[^/]+)/(sections|sectionGroups)", path)
+        if match:
+            container = self.sections_of if match.group(2) == "sections" else self.groups_of
+            return container.get(match.group(1))
+        match = re.fullmatch(r"/me/onenote/sections/([^/]+)/pages", path)
+        if match:
+            return self.pages_of.get(match.group(1))
+        return None
+
+
+@dataclass
+class FakeGraphConfig:
+    """Behaviour knobs of the fake services."""
+
+    latency_ms: float = 20.0
+    jitter_ms: float = 5.0
+    throttle_ratio: float = 0.0
+    retry_after: int = 0
+    token_latency_ms: float = 50.0
+    seed: int = 1
+
+
+@dataclass
+class Counters:
+    """Upstream requests seen by the fake, per route template."""
+
+    routes: Counter = field(default_factory=Counter)
+    throttled: int = 0
+
+    def snapshot(self) -> dict[str, int]:
+        return dict(self.routes, throttled=self.throttled)
+
+
+def route_template(path: str) -> str:
+    """Collapse IDs in a Graph path so calls can be grouped per route."""
+    return re.sub(r"/(notebooks|sectionGroups|sections|pages)/[^/]+", r"/\1/{id}", path)
+
+
+class FakeGraph:
+    """Request handling shared by direct and $batch calls."""
+
+    def __init__(self, tenant: FakeTenant, config: FakeGraphConfig):
+        self.tenant = tenant
+        self.config = config
+        self.counters = Counters()
+        self._rng = random.Random(config.seed)
+
+    async def delay(self, latency_ms: float) -> None:
+        jitter = self._rng.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        await asyncio.sleep(max(0.0, latency_ms + jitter) / 1000)
+
+    def throttle(self) -> bool:
+        if self.config.throttle_ratio and self._rng.random() < self.config.throttle_ratio:
+            self.counters.throttled += 1
+            return True
+        return False
+
+    def handle(self, method: str, path: str, query: dict[str, str], base_url: str) -> tuple[int, Any, str]:
+        """
+        Answer one Graph request.
+
+        Returns:
+            (status, body, content type) where body is JSON-serializable or HTML text
+        """
+        self.counters.routes[f"{method} {route_template(path)}"] += 1
+        if self.throttle():
+            return 429, {"error": {"code": "TooManyRequests", "message": "Throttled by fake Graph"}}, "json"
+
+        match = re.fullmatch(r"/me/onenote/pages/([^/]+)/content", path)
+        if match:
+            if match.group(1) not in self.tenant.page_text:
+                return 404, _error("ResourceNotFound"), "json"
+            return 200, self.tenant.page_html(match.group(1)), "html"
+
+        items = self.tenant.collection(path)
+        if items is None:
+            match = re.fullmatch(r"/me/onenote/(?:notebooks|sectionGroups|sections|pages)/([^/]+)", path)
+            resource = self.tenant.resources.get(match.group(1)) if match else None
+            if resource is None:
+                return 404, _error("ResourceNotFound"), "json"
+            return 200, _select(resource, query.get("$select")), "json"
+
+        search = query.get("search")
+        if search:
+            terms = search.casefold().split()
+            items = [
+                item for item in items
+                if any(term in f"{item['title']} {self.tenant.page_text[item['id']]}".casefold() for term in terms)
+            ]
+        if query.get("$orderby", "").startswith("lastModifiedDateTime"):
+            items = sorted(items, key=lambda item: item["lastModifiedDateTime"], reverse=query["$orderby"].endswith("desc"))
+        expand = query.get("$expand", "")
+        hidden = {parent for parent in ("parentNotebook", "parentSectionGroup") if parent not in expand}
+        if hidden:
+            items = [{k: v for k, v in item.items() if k not in hidden} for item in items]
+
+        top = min(int(query.get("$top", DEFAULT_TOP)), MAX_TOP)
+        skip = int(query.get("$skip", 0))
+        body: dict[str, Any] = {"value": [_select(item, query.get("$select")) for item in items[skip:skip + top]]}
+        if query.get("$count") == "true":
+            body["@odata.count"] = len(items)
+        if skip + top < len(items):
+            body["@odata.nextLink"] = f"{base_url}{BASE_PATH}{path}?{urlencode({**query, '$skip': skip + top})}"
+        return 200, body, "json"
+
+
+def _select(item: dict, select: Optional[str]) -> dict:
+    if not select:
+        return item
+    fields = set(select.split(",")) | {"id", "parentNotebook", "parentSectionGroup"}
+    return {k: v for k, v in item.items() if k in fields}
+
+
+def _error(code: str) -> dict:
+    return {"error": {"code": code, "message": code}}
+
+
+def create_app(graph: FakeGraph) -> Starlette:
+    """Starlette app serving the fake Graph API under /v1.0 and the token endpoint."""
+
+    def respond(status: int, body: Any, kind: str) -> Response:
+        headers = {"Retry-After": str(graph.config.retry_after)} if status == 429 else None
+        if kind == "html":
+            return HTMLResponse(body, status_code=status)
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    async def graph_get(request: Request) -> Response:
+        await graph.delay(graph.config.latency_ms)
+        path = "/" + request.path_params["path"]
+        base_url = f"{request.url.scheme}://{request.url.netloc}"
+        return respond(*graph.handle("GET", path, dict(request.query_params), base_url))
+
+    async def graph_batch(request: Request) -> Response:
+        await graph.delay(graph.config.latency_ms)
+        graph.counters.routes["POST /$batch"] += 1
+        payload = await request.json()
+        base_url = f"{request.url.scheme}://{request.url.netloc}"
+        responses = []
+        for sub in payload.get("requests", []):
+            url = urlsplit(sub["url"])
+            status, body, kind = graph.handle(sub.get("method", "GET"), url.path, dict(parse_qsl(url.query)), base_url)
+            headers = {"Content-Type": "text/html" if kind == "html" else "application/json"}
+            if status == 429:
+                headers["Retry-After"] = str(graph.config.retry_after)
+            responses.append({"id": sub["id"], "status": status, "headers": headers, "body": body})
+        return JSONResponse({"responses": responses})
+
+    async def token(request: Request) -> Response:
+        await graph.delay(graph.config.token_latency_ms)
+        graph.counters.routes["POST /oauth2/v2.0/token"] += 1
+        form = dict(parse_qsl((await request.body()).decode("utf-8")))
+        assertion = form.get("assertion", "anonymous")
+        return JSONResponse(
+            {"token_type": "Bearer", "expires_in": 3600, "access_token": f"fake-graph-{hash(assertion) & 0xffffffff:x}"}
+        )
+
+    async def stats(request: Request) -> Response:
+        return JSONResponse(graph.counters.snapshot())
+
+    return Starlette(
+        routes=[
+            Route(f"{BASE_PATH}/$batch", graph_batch, methods=["POST"]),
+            Route(BASE_PATH + "/{path:path}", graph_get, methods=["GET"]),
+            Route("/{tenant}/oauth2/v2.0/token", token, methods=["POST"]),
+            Route("/_stats", stats, methods=["GET"]),
+        ]
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--notebooks", type=int, default=5)
+    parser.add_argument("--sections", type=int, default=4)
+    parser.add_argument("--section-groups", type=int, default=1)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--throttle-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+
+    tenant = FakeTenant(args.notebooks, args.sections, args.section_groups, args.pages)
+    graph = FakeGraph(tenant, FakeGraphConfig(latency_ms=args.latency_ms, throttle_ratio=args.throttle_ratio))
+    print(json.dumps({"base_url": f"http://127.0.0.1:{args.port}{BASE_PATH}", "pages": len(tenant.page_text)}))
+    uvicorn.run(create_app(graph), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cost of building and serializing listing responses in the MCP server.
+
+Compares, for a list_pages-sized result of Graph-shaped items:
+
+- models: one validated PageInfo model per item, serialized as a list
+  (how listings were returned before field projection)
+- lean: the projected dictionaries in a PageList envelope built without
+  validation (how listings are returned now), with all fields and with a
+  narrow field selection
+
+Reports the time to build and serialize the response and its JSON size.
+
+Usage:
+    python benchmarks/lean_responses.py --items 100 1000 10000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+from pydantic import TypeAdapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "mcp", "onenote_mcp"))
+# The server reads its Entra settings lazily; tools are not called here
+os.environ.setdefault("TENANT_ID", "bench-tenant")
+os.environ.setdefault("CLIENT_ID", "bench-client")
+os.environ.setdefault("CLIENT_SECRET", "bench-secret")
+
+
+def graph_pages(count: int) -> list[dict]:
+    """Graph-shaped page items as returned by Graph or the mirror."""
+    return [
+        {
+            "id": f"1-{index:032x}!{index}",
+            "title": f"Meeting notes {index}",
+            "contentUrl": f"https://graph.microsoft.com/v1.0/me/onenote/pages/1-{index:032x}/content",
+            "createdDateTime": "2024-05-01T09:00:00Z",
+            "lastModifiedDateTime": "2024-05-02T10:30:00Z",
+            "sectionId": "section-1",
+            "notebookId": "notebook-1",
+        }
+        for index in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Listing response build and serialization cost")
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from src.server import PAGE_FIELDS, PageInfo, PageList, _to_page_info
+
+    models = TypeAdapter(list[PageInfo])
+    every_field = PAGE_FIELDS.project(None)
+    narrow = PAGE_FIELDS.project(["title"])
+
+    def with_models(items: list[dict]) -> bytes:
+        return models.dump_json([_to_page_info(item) for item in items])
+
+    def lean(items: list[dict], projection) -> bytes:
+        response = PageList.model_construct(items=projection.apply(items), next_cursor=None)
+        return response.model_dump_json().encode()
+
+    cases = [
+        ("models", with_models),
+        ("lean", lambda items: lean(items, every_field)),
+        ("lean id,title", lambda items: lean(items, narrow)),
+    ]
+    print(f"{'items':>8}  {'response':<16}{'ms':>10}{'bytes':>12}{'speedup':>10}")
+    for count in args.items:
+        items = graph_pages(count)
+        baseline = None
+        for name, build in cases:
+            seconds = min(timeit.repeat(lambda: build(items), number=1, repeat=args.repeat))
+            baseline = baseline or seconds
+            print(
+                f"{count:>8}  {name:<16}{seconds * 1000:>10.2f}{len(build(items)):>12}"
+                f"{baseline / seconds:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
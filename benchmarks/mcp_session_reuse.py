@@ -0,0 +1,113 @@
+"""
+MCP session reuse benchmark for the OneNote search agent.
+
+Starts a local stub MCP server exposing the OneNote tool names and measures
+the per-turn latency of an agent turn (list_notebooks + search_onenote) when
+every turn opens its own streamable-HTTP session (initialize + tools/list)
+versus going through the agent's pooled OneNoteMCPClient.
+
+Usage:
+    python benchmarks/mcp_session_reuse.py --turns 50 --port 8765
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Optional
+
+import uvicorn
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.server.fastmcp import FastMCP
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "agents", "onenote_search_agent"))
+
+from core.mcp_client import OneNoteMCPClient, RequestAuth  # noqa: E402
+
+stub = FastMCP("OneNote MCP stub")
+
+
+@stub.tool()
+async def list_notebooks(access_token: str, fields: Optional[list[str]] = None) -> dict:
+    return {"items": [{"id": f"nb-{i}", "display_name": f"Notebook {i}"} for i in range(4)]}
+
+
+@stub.tool()
+async def search_onenote(
+    access_token: str,
+    query: str,
+    notebook_id: str = "",
+    max_items: int = 10,
+    fields: Optional[list[str]] = None,
+) -> dict:
+    return {"items": [{"page_id": "p-1", "title": f"Result for {query}", "preview": "..."}]}
+
+
+AUTH = RequestAuth(access_token="bench-token")
+
+
+async def turn_with_new_session(url: str) -> None:
+    """Baseline: open, initialize and discover tools on every turn."""
+    async with streamablehttp_client(url) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await session.list_tools()
+            await session.call_tool("list_notebooks", AUTH.to_arguments())
+            await session.call_tool("search_onenote", {**AUTH.to_arguments(), "query": "q"})
+
+
+async def turn_with_pool(client: OneNoteMCPClient) -> None:
+    await client.call_tool("list_notebooks", AUTH.to_arguments())
+    await client.call_tool("search_onenote", {**AUTH.to_arguments(), "query": "q"})
+
+
+async def measure(turn, turns: int) -> list[float]:
+    durations = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        await turn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(name: str, durations: list[float]) -> None:
+    ordered = sorted(durations)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{name:>11}: mean {statistics.mean(durations) * 1000:.1f}ms, "
+        f"p50 {statistics.median(durations) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms per turn"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = uvicorn.Server(
+        uvicorn.Config(stub.streamable_http_app(), host="127.0.0.1", port=args.port, log_level="warning")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    url = f"http://127.0.0.1:{args.port}/mcp"
+
+    report("per-turn", await measure(lambda: turn_with_new_session(url), args.turns))
+
+    client = OneNoteMCPClient(url, pool_size=1)
+    # The first turn pays the session setup once for the process lifetime
+    first = await measure(lambda: turn_with_pool(client), 1)
+    report("pooled", await measure(lambda: turn_with_pool(client), args.turns))
+    print(f"{'':>11}  (first pooled turn incl. connect: {first[0] * 1000:.1f}ms, connects: {client.connects})")
+    await client.close()
+
+    server.should_exit = True
+    await server_task
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""
+Hot-path cost of metrics recording in the MCP server and the search agent.
+
+Times the operations that run per tool call or per Graph request: counter
+increments, histogram observations, label lookups and the MCP server's
+per-request accounting (`record_graph_request`). The baseline is an empty
+statement, so the reported cost is on top of the loop overhead.
+
+Usage:
+    python benchmarks/metrics_overhead.py --iterations 1000000
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "mcp", "onenote_mcp"))
+
+
+def load_agent_metrics():
+    """Load core/metrics.py of the agent without importing the core package (and its SDKs)."""
+    path = os.path.join(ROOT, "agents", "onenote_search_agent", "core", "metrics.py")
+    spec = importlib.util.spec_from_file_location("agent_metrics", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Metrics recording overhead")
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    from src import metrics as server
+
+    agent = load_agent_metrics()
+    tool = server.ToolMetrics("bench_tool")
+    counter = server.Counter()
+    histogram = server.Histogram(server.LATENCY_BUCKETS)
+    namespace = {
+        "server": server,
+        "agent": agent,
+        "tool": tool,
+        "counter": counter,
+        "histogram": histogram,
+        "record_graph_request": server.record_graph_request,
+    }
+    cases = [
+        ("counter += 1 (resolved child)", "counter.value += 1"),
+        ("Counter.inc()", "counter.inc()"),
+        ("Histogram.observe()", "histogram.observe(0.3)"),
+        ("labels() lookup + inc()", "server.TOOL_CALLS.labels('bench_tool', 'ok').inc()"),
+        ("record_graph_request()", "record_graph_request(0)"),
+        ("agent labels() + observe()", "agent.MCP_LATENCY.labels('bench_tool').observe(0.3)"),
+    ]
+
+    baseline = timeit.timeit("pass", number=args.iterations) / args.iterations
+    print(f"{'operation':<32}{'ns/op':>10}")
+    for name, statement in cases:
+        seconds = timeit.timeit(statement, globals=namespace, number=args.iterations) / args.iterations
+        print(f"{name:<32}{(seconds - baseline) * 1e9:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
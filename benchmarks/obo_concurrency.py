@@ -0,0 +1,96 @@
+"""
+OBO token acquisition concurrency benchmark.
+
+Replaces the MSAL client with a stub whose token endpoint sleeps for a fixed
+delay and measures how many concurrent acquisitions complete per second, as
+well as the worst event loop stall observed while they run.
+
+Usage:
+    python benchmarks/obo_concurrency.py --calls 32 --delay 0.2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "mcp", "onenote_mcp"))
+
+os.environ.setdefault("TENANT_ID", "bench-tenant")
+os.environ.setdefault("CLIENT_ID", "bench-client")
+os.environ.setdefault("CLIENT_SECRET", "bench-secret")
+
+from src.auth import auth_service  # noqa: E402
+
+
+class SlowTokenEndpoint:
+    """MSAL stand-in whose OBO exchange blocks like a slow Entra ID."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def acquire_token_on_behalf_of(self, user_assertion, scopes):
+        time.sleep(self.delay)
+        return {"access_token": f"graph-{user_assertion}", "expires_in": 3600}
+
+
+async def blocking_acquire(user_assertion: str, scopes: tuple[str, ...]):
+    """Baseline: call MSAL directly on the event loop (previous behavior)."""
+    result = auth_service.app.acquire_token_on_behalf_of(
+        user_assertion=user_assertion, scopes=list(scopes)
+    )
+    return result["access_token"], result["expires_in"]
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Return the largest delay between scheduled and actual wake-ups."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(mode: str, calls: int) -> dict[str, float]:
+    auth_service.token_cache.clear()
+    acquire = blocking_acquire if mode == "blocking" else auth_service._acquire_obo_token
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    # Distinct assertions so that every call misses the token cache
+    await asyncio.gather(
+        *(
+            auth_service.token_cache.get_or_acquire(f"user-{i}", ("scope",), acquire)
+            for i in range(calls)
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    worst_lag = await lag_task
+    return {"elapsed_s": elapsed, "calls_per_s": calls / elapsed, "max_loop_lag_s": worst_lag}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=32)
+    parser.add_argument("--delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    auth_service.app = SlowTokenEndpoint(args.delay)
+    for mode in ("blocking", "executor"):
+        result = await run(mode, args.calls)
+        print(
+            f"{mode:>9}: {result['elapsed_s']:.2f}s for {args.calls} calls "
+            f"({result['calls_per_s']:.1f} calls/s, max loop lag {result['max_loop_lag_s'] * 1000:.0f}ms)"
+        )
+    auth_service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
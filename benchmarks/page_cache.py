@@ -0,0 +1,104 @@
+"""
+Hit ratio, memory use and read latency of the MCP server's page content cache.
+
+Replays Zipf-distributed page reads (a few hot pages, a long tail) from
+several users against PageCache with a memory budget, the way
+get_page_content uses it: a miss converts the page HTML to markdown and stores
+it. A share of the pages is shared by all users, so their bodies deduplicate.
+Reports the hit ratio, the bytes held against the uncompressed size and the
+bytes saved by compression and deduplication, and the time per read of a hit
+against converting the page again.
+
+Usage:
+    python benchmarks/page_cache.py --pages 2000 --reads 20000 --budget-mb 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "mcp", "onenote_mcp"))
+# Settings are read when the module singletons are created
+os.environ.setdefault("TENANT_ID", "bench-tenant")
+os.environ.setdefault("CLIENT_ID", "bench-client")
+os.environ.setdefault("CLIENT_SECRET", "bench-secret")
+
+WORDS = "meeting budget review roadmap design release customer incident plan notes".split()
+
+
+def page_html(index: int, paragraphs: int) -> str:
+    """A OneNote-like page of a few headings and paragraphs."""
+    rng = random.Random(index)
+    body = "".join(
+        f"<h2>Topic {n}</h2><p>{' '.join(rng.choice(WORDS) for _ in range(60))}</p>"
+        for n in range(paragraphs)
+    )
+    return f"<html><head><title>Page {index}</title></head><body>{body}</body></html>"
+
+
+async def run(args: argparse.Namespace) -> None:
+    from src.html_text import extract_text
+    from src.page_cache import PageCache
+
+    cache = PageCache(max_bytes=args.budget_mb * 1024 * 1024)
+    pages = [page_html(index, args.paragraphs) for index in range(args.pages)]
+    shared = int(args.pages * args.shared_ratio)
+    variant = ("markdown", "drop", 100_000)
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(args.pages)]
+    reads = rng.choices(range(args.pages), weights=weights, k=args.reads)
+
+    hit_time = miss_time = 0.0
+    for n, index in enumerate(reads):
+        # Shared pages are read under one ID by every user; the others are per user
+        user = f"user-{n % args.users}"
+        page_id = f"page-{index}" if index < shared else f"{user}-page-{index}"
+        start = time.perf_counter()
+        content = await cache.get(user, page_id, "v1", variant)
+        if content is None:
+            html = pages[index]
+            if index >= shared:
+                html = html.replace("<p>", f"<p>{user} ", 1)
+            content = extract_text(html, True, "drop", 100_000)
+            await cache.put(user, page_id, "v1", variant, content)
+            miss_time += time.perf_counter() - start
+        else:
+            hit_time += time.perf_counter() - start
+
+    stats = cache.stats()
+    hits = stats["hits"]
+    misses = stats["misses"]
+    print(f"reads            {args.reads:>12}")
+    print(f"hit ratio        {stats['hit_ratio']:>12.3f}")
+    print(f"entries          {stats['entries']:>12}")
+    print(f"bodies           {stats['bodies']:>12}")
+    print(f"evictions        {stats['evictions']:>12}")
+    print(f"bytes held       {stats['bytes']:>12}  (budget {stats['max_bytes']})")
+    print(f"uncompressed     {stats['uncompressed_bytes']:>12}")
+    print(f"saved (zlib)     {stats['compression_bytes_saved']:>12}")
+    print(f"saved (dedup)    {stats['dedup_bytes_saved']:>12}")
+    if hits:
+        print(f"hit us/read      {hit_time / hits * 1e6:>12.1f}")
+    if misses:
+        print(f"miss us/read     {miss_time / misses * 1e6:>12.1f}  (convert + store)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Page content cache hit ratio and memory use")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--paragraphs", type=int, default=20)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument(
+        "--shared-ratio", type=float, default=0.2, help="Share of pages read by all users"
+    )
+    parser.add_argument("--reads", type=int, default=20000)
+    parser.add_argument("--zipf", type=float, default=1.0)
+    parser.add_argument("--budget-mb", type=int, default=8)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Cold start and throughput of the development and production entry points.
+
+Starts each service as a subprocess the way it is deployed and measures:
+
+- cold start: process launch until the first 200 response (includes imports,
+  app construction and the lifespan warm-up)
+- throughput: requests per second against GET /metrics from concurrent
+  clients, and the same figure per worker process
+
+The development command is today's hot-reload setup (uvicorn --reload); the
+production command is the pre-forked server with 1..N workers. /metrics does
+no upstream I/O, so throughput reflects the serving stack rather than Graph.
+
+Usage:
+    python benchmarks/serving.py --service mcp --workers 1 2 4
+    python benchmarks/serving.py --service agent --workers 1 2 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = {
+    "mcp": os.path.join(ROOT, "mcp", "onenote_mcp"),
+    "agent": os.path.join(ROOT, "agents", "onenote_search_agent"),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def command(service: str, mode: str, port: int) -> list[str]:
+    """Command line of a service in "reload" (development) or "serve" (production) mode."""
+    if mode == "reload":
+        app = ["src.server:mcp.asgi_app"] if service == "mcp" else ["main:create_app", "--factory"]
+        return [
+            sys.executable, "-m", "uvicorn", *app,
+            "--host", "127.0.0.1", "--port", str(port), "--reload", "--reload-dir", ".",
+        ]
+    return [sys.executable, "-m", "src.serve"] if service == "mcp" else [sys.executable, "serve.py"]
+
+
+def environment(port: int, workers: int) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        HOST="127.0.0.1",
+        PORT=str(port),
+        WORKERS=str(workers),
+        # The MCP server needs Entra settings; warm-up connects to a closed local port
+        TENANT_ID=env.get("TENANT_ID", "bench-tenant"),
+        CLIENT_ID=env.get("CLIENT_ID", "bench-client"),
+        CLIENT_SECRET=env.get("CLIENT_SECRET", "bench-secret"),
+        GRAPH_API_BASE_URL=env.get("GRAPH_API_BASE_URL", "http://127.0.0.1:9/v1.0"),
+        ONENOTE_MCP_URL=env.get("ONENOTE_MCP_URL", "http://127.0.0.1:9/mcp"),
+    )
+    return env
+
+
+async def wait_ready(
+    url: str, process: subprocess.Popen, start: float, timeout: float
+) -> Optional[float]:
+    """Poll until the first 200 response; returns seconds since start or None on failure."""
+    async with httpx.AsyncClient(timeout=1.0) as client:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                return None
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.01)
+    return None
+
+
+async def throughput(url: str, concurrency: int, duration: float) -> tuple[int, int]:
+    """Send requests from concurrent clients (one connection each) for a fixed time."""
+    done = errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop() -> None:
+        nonlocal done, errors
+        # A client per loop so connections are spread over the workers' accept queue
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            while time.perf_counter() < deadline:
+                try:
+                    response = await client.get(url)
+                    if response.status_code == 200:
+                        done += 1
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return done, errors
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def measure(
+    service: str, mode: str, workers: int, concurrency: int, duration: float, timeout: float
+) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/metrics"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command(service, mode, port),
+        cwd=SERVICES[service],
+        env=environment(port, workers),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        cold_start = await wait_ready(url, process, start, timeout)
+        if cold_start is None:
+            return {"mode": mode, "workers": workers, "error": "did not become ready"}
+        done, errors = await throughput(url, concurrency, duration)
+    finally:
+        stop(process)
+    rps = done / duration
+    return {
+        "mode": mode,
+        "workers": workers,
+        "cold_start_s": round(cold_start, 3),
+        "rps": round(rps, 1),
+        "rps_per_worker": round(rps / workers, 1),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold start and throughput per entry point")
+    parser.add_argument("--service", choices=sorted(SERVICES), default="mcp")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for startup")
+    args = parser.parse_args()
+
+    runs = [("reload", 1)] + [("serve", n) for n in args.workers]
+    print(f"{'mode':<8}{'workers':>8}{'cold start s':>14}{'req/s':>10}{'req/s/worker':>14}{'errors':>8}")
+    for mode, workers in runs:
+        result = asyncio.run(
+            measure(args.service, mode, workers, args.concurrency, args.duration, args.timeout)
+        )
+        if "error" in result:
+            print(f"{mode:<8}{workers:>8}  {result['error']}")
+            continue
+        print(
+            f"{mode:<8}{workers:>8}{result['cold_start_s']:>14.3f}{result['rps']:>10.1f}"
+            f"{result['rps_per_worker']:>14.1f}{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,176 @@
 """Authentication utilities for OBO (On-Behalf-Of) flow."""
 
+import asyncio
+import base64
+import binascii
+import functools
+import hashlib
+import json
 import logging
-from typing import Optional
-
-import msal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
 
 from .config import settings
+from .metrics import OBO_ACQUISITIONS, OBO_LATENCY
+from .token_cache import TokenCache
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class UserIdentity:
+    """Tenant and user a request is made on behalf of."""
+
+    tenant_id: str
+    user_id: str
+
+
+def get_user_identity(user_access_token: str) -> UserIdentity:
+    """
+    Derive the tenant and user from the incoming access token.
+
+    The token signature is not verified here: Entra ID validates the assertion
+    during the OBO exchange, and the identity is only used to partition
+    server-side state such as concurrency limits and caches.
+
+    Args:
+        user_access_token: The access token from the upstream service
+
+    Returns:
+        UserIdentity with the token's tid/oid claims, or a token hash as fallback
+    """
+    claims: dict = {}
+    try:
+        payload = user_access_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (IndexError, ValueError, binascii.Error):
+        logger.debug("Access token is not a decodable JWT")
+    if not isinstance(claims, dict):
+        claims = {}
+
+    user_id = claims.get("oid") or claims.get("sub")
+    if not user_id:
+        user_id = hashlib.sha256(user_access_token.encode("utf-8")).hexdigest()[:32]
+    return UserIdentity(tenant_id=claims.get("tid") or settings.tenant_id, user_id=user_id)
+
+
 class AuthService:
     """Service for handling OBO authentication flow with Entra ID."""
 
     def __init__(self):
-        """Initialize MSAL confidential client application."""
-        self.app = msal.ConfidentialClientApplication(
-            client_id=settings.client_id,
-            client_credential=settings.client_secret,
-            authority=f"https://login.microsoftonline.com/{settings.tenant_id}",
+        """Initialize the OBO token cache; the MSAL client is created on first use."""
+        self._app: Optional[Any] = None
+        self.token_cache = TokenCache(
+            max_size=settings.obo_cache_max_size,
+            refresh_margin=settings.obo_cache_refresh_margin,
+            expiry_skew=settings.obo_cache_expiry_skew,
         )
+        # MSAL performs blocking HTTP calls; keep them off the event loop
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def app(self) -> Any:
+        """
+        Return the MSAL confidential client application, creating it on first use.
+
+        msal is imported here rather than at module import, and the client
+        resolves its authority over the network when it is built, so both are
+        deferred to worker warm-up (or the first token exchange).
+        """
+        if self._app is None:
+            import msal
+
+            self._app = msal.ConfidentialClientApplication(
+                client_id=settings.client_id,
+                client_credential=settings.client_secret,
+                authority=f"https://login.microsoftonline.com/{settings.tenant_id}",
+            )
+        return self._app
+
+    @app.setter
+    def app(self, app: Any) -> None:
+        self._app = app
+
+    def warm_up(self) -> None:
+        """Create the MSAL client ahead of the first request (blocking; run in a thread)."""
+        try:
+            self.app
+        except Exception as e:
+            logger.warning(f"MSAL client warm-up failed: {e}")
 
     async def get_obo_token(self, user_access_token: str) -> Optional[str]:
         """
         Exchange user access token for Graph API token via OBO flow.
 
+        Tokens are served from the in-process cache while valid and refreshed
+        in the background shortly before they expire.
+
         Args:
             user_access_token: The access token from the upstream service
 
         Returns:
             Graph API access token or None if authentication fails
         """
+        return await self.token_cache.get_or_acquire(
+            user_access_token, tuple(settings.obo_scopes), self._acquire_obo_token
+        )
+
+    async def _acquire_obo_token(
+        self, user_assertion: str, scopes: tuple[str, ...]
+    ) -> Optional[tuple[str, int]]:
+        """
+        Perform the OBO token exchange against Entra ID.
+
+        Args:
+            user_assertion: The access token from the upstream service
+            scopes: Requested Graph API scopes
+
+        Returns:
+            Tuple of (access token, lifetime in seconds) or None if authentication fails
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.obo_max_workers, thread_name_prefix="obo"
+            )
+
+        start = time.perf_counter()
         try:
-            result = self.app.acquire_token_on_behalf_of(
-                user_assertion=user_access_token,
-                scopes=settings.obo_scopes,
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._executor,
+                functools.partial(self._exchange, user_assertion, list(scopes)),
             )
 
+            OBO_LATENCY.labels().observe(time.perf_counter() - start)
             if "access_token" in result:
+                OBO_ACQUISITIONS.labels("ok").inc()
                 logger.info("Successfully acquired OBO token")
-                return result["access_token"]
+                return result["access_token"], int(result.get("expires_in", 3600))
             else:
                 error = result.get("error")
                 error_description = result.get("error_description")
+                OBO_ACQUISITIONS.labels("error").inc()
                 logger.error(f"OBO token acquisition failed: {error} - {error_description}")
                 return None
 
         except Exception as e:
+            OBO_ACQUISITIONS.labels("error").inc()
             logger.error(f"Exception during OBO token acquisition: {e}")
             return None
 
+    def _exchange(self, user_assertion: str, scopes: list[str]) -> dict:
+        """Call MSAL on the worker thread (the client is created there on first use)."""
+        return self.app.acquire_token_on_behalf_of(user_assertion=user_assertion, scopes=scopes)
+
+    def close(self) -> None:
+        """Release the token acquisition thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
 
 # Singleton instance
 auth_service = AuthService()
@@ -0,0 +1,185 @@
+"""Microsoft Graph JSON batching ($batch) helpers."""
+
+import base64
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from urllib.parse import urlencode
+
+# Graph accepts at most 20 sub-requests per $batch call
+GRAPH_BATCH_LIMIT = 20
+
+
+@dataclass
+class BatchRequest:
+    """A single sub-request of a Graph $batch call."""
+
+    id: str
+    url: str
+    method: str = "GET"
+    params: Optional[dict[str, Any]] = None
+    body: Optional[dict[str, Any]] = None
+    headers: Optional[dict[str, str]] = None
+    depends_on: list[str] = field(default_factory=list)
+
+    def to_payload(self) -> dict[str, Any]:
+        """
+        Serialize the sub-request into the $batch JSON format.
+
+        Returns:
+            Dictionary for the "requests" array of a $batch body
+        """
+        url = self.url
+        if self.params:
+            separator = "&" if "?" in url else "?"
+            url = f"{url}{separator}{urlencode(self.params, safe='$,')}"
+
+        payload: dict[str, Any] = {"id": self.id, "method": self.method, "url": url}
+        headers = dict(self.headers or {})
+        if self.body is not None:
+            payload["body"] = self.body
+            headers.setdefault("Content-Type", "application/json")
+        if headers:
+            payload["headers"] = headers
+        if self.depends_on:
+            payload["dependsOn"] = list(self.depends_on)
+        return payload
+
+
+@dataclass
+class BatchResponse:
+    """A single sub-response of a Graph $batch call."""
+
+    id: str
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: Any = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the sub-request succeeded."""
+        return 200 <= self.status < 300
+
+    def get_header(self, name: str) -> Optional[str]:
+        """
+        Look up a sub-response header case-insensitively.
+
+        Args:
+            name: Header name
+
+        Returns:
+            Header value or None if absent
+        """
+        lowered = name.lower()
+        return next(
+            (value for key, value in self.headers.items() if key.lower() == lowered), None
+        )
+
+    @property
+    def error_message(self) -> Optional[str]:
+        """Error message reported by Graph for a failed sub-request."""
+        if self.ok:
+            return None
+        if isinstance(self.body, dict):
+            error = self.body.get("error") or {}
+            if isinstance(error, dict) and error.get("message"):
+                return f"{self.status}: {error['message']}"
+        return f"{self.status}: request failed"
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> "BatchResponse":
+        """
+        Build a sub-response from the $batch JSON format.
+
+        Non-JSON bodies (such as page HTML) are returned base64 encoded by Graph
+        and are decoded to text here.
+
+        Args:
+            payload: Item of the "responses" array of a $batch response
+
+        Returns:
+            BatchResponse instance
+        """
+        response = cls(
+            id=str(payload.get("id")),
+            status=int(payload.get("status", 0)),
+            headers=payload.get("headers") or {},
+            body=payload.get("body"),
+        )
+        content_type = response.get_header("Content-Type") or ""
+        if isinstance(response.body, str) and "json" not in content_type.lower():
+            try:
+                response.body = base64.b64decode(response.body, validate=True).decode("utf-8")
+            except ValueError:
+                # Not base64 (binascii.Error), not UTF-8, or already text with non-ASCII characters
+                pass
+        return response
+
+
+@dataclass
+class BatchCollection:
+    """Items of a Graph collection fetched through $batch, or the error that stopped it."""
+
+    items: list[dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def plan_batches(
+    requests: list[BatchRequest], limit: int = GRAPH_BATCH_LIMIT
+) -> list[list[BatchRequest]]:
+    """
+    Pack sub-requests into $batch calls of at most ``limit`` requests.
+
+    Requests linked by ``depends_on`` must travel in the same $batch call, so
+    they are grouped first and each group is placed as a whole. Request order
+    is preserved within each call.
+
+    Args:
+        requests: Sub-requests to pack
+        limit: Maximum number of sub-requests per call
+
+    Returns:
+        List of sub-request chunks
+
+    Raises:
+        ValueError: If IDs are duplicated, a dependency is unknown or a
+            dependency group does not fit in a single call
+    """
+    index = {}
+    for position, request in enumerate(requests):
+        if request.id in index:
+            raise ValueError(f"Duplicate batch request id: {request.id}")
+        index[request.id] = position
+
+    # Union-find over dependency edges
+    parent = list(range(len(requests)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for position, request in enumerate(requests):
+        for dependency in request.depends_on:
+            if dependency not in index:
+                raise ValueError(f"Unknown batch dependency: {request.id} -> {dependency}")
+            parent[find(position)] = find(index[dependency])
+
+    groups: dict[int, list[BatchRequest]] = {}
+    for position, request in enumerate(requests):
+        groups.setdefault(find(position), []).append(request)
+
+    chunks: list[list[BatchRequest]] = []
+    current: list[BatchRequest] = []
+    for group in groups.values():
+        if len(group) > limit:
+            raise ValueError(
+                f"Dependency group of {len(group)} requests exceeds batch limit of {limit}"
+            )
+        if len(current) + len(group) > limit:
+            chunks.append(current)
+            current = []
+        current.extend(group)
+    if current:
+        chunks.append(current)
+    return chunks
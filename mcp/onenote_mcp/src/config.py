@@ -1,5 +1,8 @@
 """Configuration management for OneNote MCP Server."""
 
+from functools import lru_cache
+from typing import Any, Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -20,11 +23,89 @@ class Settings(BaseSettings):
 
     # Microsoft Graph API
     graph_api_base_url: str = "https://graph.microsoft.com/v1.0"
+    graph_page_size: int = 100
+
+    # Graph HTTP connection pool
+    graph_http2: bool = True
+    graph_max_connections: int = 100
+    graph_max_keepalive_connections: int = 20
+    graph_keepalive_expiry: float = 30.0
+    graph_timeout: float = 30.0
+    graph_connect_timeout: float = 5.0
+    graph_stream_chunk_size: int = 65536
+    # Share one upstream call between identical concurrent GETs of the same user
+    graph_coalesce_requests: bool = True
+
+    # Notebook tree walk (get_notebook_tree)
+    tree_max_concurrency: int = 8
+
+    # Page content returned by get_page_content
+    page_content_max_chars: int = 100_000
 
     # Server Configuration
     host: str = "0.0.0.0"
     port: int = 8000
 
+    # Production entry point (python -m src.serve)
+    workers: int = 0  # 0 = one worker process per CPU
+    warm_up: bool = True
+    listen_backlog: int = 2048
+    worker_shutdown_timeout: float = 30.0
+
+    # Graph retry policy for throttling (429/503/504)
+    graph_max_retries: int = 4
+    graph_retry_base_delay: float = 0.5
+    graph_retry_max_delay: float = 30.0
+    graph_retry_budget_ratio: float = 0.2
+    graph_retry_budget_max: float = 10.0
+
+    # Graph adaptive concurrency (AIMD) per tenant and per user
+    graph_tenant_concurrency_initial: int = 32
+    graph_tenant_concurrency_max: int = 128
+    graph_user_concurrency_initial: int = 8
+    graph_user_concurrency_max: int = 32
+    graph_concurrency_latency_tolerance: float = 5.0
+
+    # Listing response cache (per user)
+    response_cache_max_entries: int = 2048
+    response_cache_ttl: float = 60.0
+    response_cache_max_age: float = 3600.0
+    response_cache_path: Optional[str] = None
+
+    # Extracted page content cache (per process in memory, optionally on disk)
+    page_cache_max_bytes: int = 64 * 1024 * 1024
+    page_cache_compression_level: int = 6
+    page_cache_path: Optional[str] = None
+
+    # Background sync into a local page store (opt-in: stores page content on disk)
+    sync_enabled: bool = False
+    sync_store_path: str = "onenote_mirror.sqlite3"
+    sync_interval: float = 300.0
+    sync_max_staleness: float = 900.0
+    sync_max_concurrent_users: int = 4
+
+    # Local full-text index over the mirror (used by search_onenote when sync is enabled)
+    search_index_dir: str = "onenote_index"
+    search_index_flush_threshold: int = 2000
+    search_snippet_length: int = 160
+
+    # OBO token acquisition (MSAL is synchronous and runs on a thread pool)
+    obo_max_workers: int = 8
+
+    # OBO token cache
+    obo_cache_max_size: int = 1024
+    obo_cache_refresh_margin: float = 300.0
+    obo_cache_expiry_skew: float = 30.0
+
+    # In-process tracing (spans of sampled traces, exported in the background)
+    tracing_exporter: Literal["none", "memory", "file", "otlp"] = "none"
+    tracing_service_name: str = "onenote-mcp"
+    tracing_file_path: str = "traces.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_sample_ratio: float = 1.0
+    tracing_export_interval: float = 5.0
+    tracing_max_queue: int = 10000
+
     # Required scopes for OBO flow
     obo_scopes: list[str] = [
         "https://graph.microsoft.com/User.Read.All",
@@ -33,4 +114,22 @@ class Settings(BaseSettings):
     ]
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load the settings from the environment (once, on first use)."""
+    return Settings()
+
+
+class _LazySettings:
+    """Module-level settings handle that loads the environment on first attribute access."""
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_settings(), name, value)
+
+
+settings: Settings = _LazySettings()  # type: ignore[assignment]
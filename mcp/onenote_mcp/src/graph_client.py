@@ -1,35 +1,87 @@
 """Microsoft Graph API client for OneNote operations."""
 
+import asyncio
 import logging
-from typing import Any, Optional
+from contextlib import aclosing
+from dataclasses import replace
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+from urllib.parse import urlsplit
 
 import httpx
 
+from .auth import UserIdentity
+from .batch import BatchCollection, BatchRequest, BatchResponse, plan_batches
 from .config import settings
+from .http_pool import http_pool
+from .metrics import record_graph_bytes, record_graph_request
+from .singleflight import graph_flight
+from .throttling import (
+    RETRYABLE_STATUS_CODES,
+    THROTTLE_STATUS_CODES,
+    parse_retry_after,
+    throttle_controller,
+)
 from .trace_context import TraceContext
+from .tracing import SPAN_KIND_CLIENT, tracer
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Graph properties fetched for each listing ($select pushdown)
+NOTEBOOK_SELECT = ["id", "displayName", "createdDateTime", "lastModifiedDateTime"]
+SECTION_SELECT = ["id", "displayName", "createdDateTime", "lastModifiedDateTime"]
+SECTION_GROUP_SELECT = ["id", "displayName", "createdDateTime", "lastModifiedDateTime"]
+PAGE_SELECT = ["id", "title", "contentUrl", "createdDateTime", "lastModifiedDateTime"]
+
 
 class GraphClient:
-    """Client for interacting with Microsoft Graph API."""
+    """Client for interacting with Microsoft Graph API.
 
-    def __init__(self, access_token: str, trace_context: Optional[TraceContext] = None):
+    JSON GETs of clients created for a user identity are coalesced: identical
+    concurrent requests (same user, URL and query) share one upstream call
+    and its parsed response, which callers must not modify.
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        trace_context: Optional[TraceContext] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        identity: Optional[UserIdentity] = None,
+    ):
         """
         Initialize Graph API client.
 
         Args:
             access_token: Access token for Microsoft Graph API
             trace_context: W3C trace context for distributed tracing
+            http_client: AsyncClient to send requests with (defaults to the shared pool)
+            identity: Tenant and user the requests are made for (used for throttling
+                and for coalescing identical requests)
         """
         self.access_token = access_token
         self.trace_context = trace_context
         self.base_url = settings.graph_api_base_url
+        self._http_client = http_client
+        self.identity = identity or UserIdentity(
+            tenant_id=settings.tenant_id, user_id="anonymous"
+        )
+        # Requests are only shared between clients of the same known user
+        self.coalesce = identity is not None and settings.graph_coalesce_requests
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Return the AsyncClient used for requests (the shared pool by default)."""
+        return self._http_client or http_pool.client
 
-    def _get_headers(self) -> dict[str, str]:
+    def _get_headers(self, trace_context: Optional[TraceContext] = None) -> dict[str, str]:
         """
         Build HTTP headers including authorization and trace context.
 
+        Args:
+            trace_context: Context of the span sending the request (defaults to the caller's)
+
         Returns:
             Dictionary of HTTP headers
         """
@@ -39,8 +91,9 @@ class GraphClient:
         }
 
         # Add W3C trace context headers if available
-        if self.trace_context:
-            headers.update(self.trace_context.to_headers())
+        trace_context = trace_context or self.trace_context
+        if trace_context:
+            headers.update(trace_context.to_headers())
 
         return headers
 
@@ -55,16 +108,237 @@ class GraphClient:
         Returns:
             JSON response data
         """
-        url = f"{self.base_url}{endpoint}"
-        headers = self._get_headers()
+        return await self._get_url(f"{self.base_url}{endpoint}", params)
+
+    async def _get_url(
+        self, url: str, params: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:
+        """
+        Perform GET request against an absolute Graph API URL.
+
+        Concurrent identical requests of the same user share one upstream call.
+
+        Args:
+            url: Absolute URL (e.g., an @odata.nextLink)
+            params: Optional query parameters
+
+        Returns:
+            JSON response data (shared with coalesced callers; do not modify)
+        """
+        return await self.shared(
+            self.flight_key("GET", url, params), lambda: self._fetch_json(url, params)
+        )
+
+    async def shared(self, key: tuple, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn, sharing one run between identical concurrent calls of this user.
+
+        Args:
+            key: Coalescing key from flight_key()
+            fn: Starts the call
+
+        Returns:
+            Result of fn (shared with coalesced callers; do not modify)
+        """
+        if not self.coalesce:
+            return await fn()
+        return await graph_flight.do(key, fn)
 
-        logger.info(f"GET {url} with trace: {self.trace_context}")
+    def flight_key(
+        self, method: str, url: str, params: Optional[dict[str, Any]] = None, *extra: Any
+    ) -> tuple:
+        """
+        Build the coalescing key of a request made on behalf of this client's user.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            params: Query parameters
+            *extra: Further values that distinguish results (e.g., output options)
+
+        Returns:
+            Hashable key of (tenant, user, method, URL, params, extra)
+        """
+        query = tuple(sorted((k, str(v)) for k, v in params.items())) if params else ()
+        return (self.identity.tenant_id, self.identity.user_id, method, url, query, *extra)
+
+    async def _fetch_json(
+        self, url: str, params: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:
+        """Send a GET request and decode its JSON body."""
+        response = await self._send("GET", url, params=params)
+        return self._parse(response)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
+    def _parse(self, response: httpx.Response) -> dict[str, Any]:
+        """Decode a JSON response body under a graph.parse span."""
+        with tracer.span("graph.parse", self.trace_context, bytes=len(response.content)):
             return response.json()
 
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[dict[str, Any]] = None,
+        json: Optional[dict[str, Any]] = None,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """
+        Send a request under the shared throttling controls.
+
+        Each attempt holds a slot in the per-tenant and per-user adaptive
+        concurrency windows. Throttled (429/503) and gateway timeout (504)
+        responses are retried, honoring Retry-After, while the retry budget
+        allows. The request is timed as a graph.request span whose ID is sent
+        as the traceparent parent-id.
+
+        Args:
+            method: HTTP method
+            url: Absolute request URL
+            params: Optional query parameters
+            json: Optional JSON request body
+            stream: Return before the body is read (the caller must close the response)
+
+        Returns:
+            Successful HTTP response
+
+        Raises:
+            httpx.HTTPStatusError: If the final attempt fails
+        """
+        policy = throttle_controller.retry_policy
+        policy.record_attempt()
+
+        with tracer.span(
+            "graph.request",
+            self.trace_context,
+            kind=SPAN_KIND_CLIENT,
+            method=method,
+            path=urlsplit(url).path,
+        ) as span:
+            headers = self._get_headers(span.context if span else None)
+
+            attempt = 0
+            while True:
+                logger.info(f"{method} {url} with trace: {span.context if span else None}")
+
+                async with throttle_controller.slot(
+                    self.identity.tenant_id, self.identity.user_id
+                ) as outcome:
+                    request = self.http_client.build_request(
+                        method, url, headers=headers, params=params, json=json
+                    )
+                    response = await self.http_client.send(request, stream=stream)
+                    outcome["throttled"] = response.status_code in THROTTLE_STATUS_CODES
+                record_graph_request(len(request.content))
+                if not stream:
+                    record_graph_bytes(len(response.content))
+
+                if (
+                    response.status_code in RETRYABLE_STATUS_CODES
+                    and attempt < policy.max_retries
+                    and policy.try_spend()
+                ):
+                    delay = policy.compute_delay(
+                        attempt, parse_retry_after(response.headers.get("Retry-After"))
+                    )
+                    logger.warning(
+                        f"Graph returned {response.status_code} for {method} {url}; "
+                        f"retrying in {delay:.2f}s (attempt {attempt + 1})"
+                    )
+                    await response.aclose()
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+
+                if span:
+                    span.set("status_code", response.status_code)
+                    span.set("retries", attempt)
+                if stream and response.is_error:
+                    await response.aclose()
+                response.raise_for_status()
+                return response
+
+    async def iter_bytes(
+        self, endpoint: str, params: Optional[dict[str, Any]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream the raw body of a Graph resource, such as page HTML.
+
+        The response is closed when the iterator is exhausted or closed, so a
+        consumer can stop reading early without downloading the rest.
+
+        Args:
+            endpoint: API endpoint path (e.g., "/me/onenote/pages/{id}/content")
+            params: Optional query parameters
+
+        Yields:
+            Body chunks as they arrive
+        """
+        response = await self._send("GET", f"{self.base_url}{endpoint}", params=params, stream=True)
+        received = 0
+        try:
+            async for chunk in response.aiter_bytes(settings.graph_stream_chunk_size):
+                received += len(chunk)
+                yield chunk
+        finally:
+            record_graph_bytes(received)
+            await response.aclose()
+
+    async def iter_items(
+        self,
+        endpoint: str,
+        params: Optional[dict[str, Any]] = None,
+        top: Optional[int] = None,
+        select: Optional[list[str]] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Iterate over a Graph collection, following @odata.nextLink.
+
+        Items are yielded as each page arrives. The next page is requested
+        while the current one is being consumed, and at most two pages are
+        held in memory at a time.
+
+        Args:
+            endpoint: API endpoint path of the collection
+            params: Optional query parameters
+            top: Page size pushed down as $top
+            select: Properties pushed down as $select
+            limit: Maximum number of items to yield
+
+        Yields:
+            Collection items in server order
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        params = dict(params or {})
+        if top is not None:
+            params["$top"] = top if limit is None else min(top, limit)
+        if select:
+            params["$select"] = ",".join(select)
+
+        next_page = asyncio.create_task(self._get_url(f"{self.base_url}{endpoint}", params))
+        yielded = 0
+        try:
+            while next_page is not None:
+                page = await next_page
+                next_page = None
+
+                items = page.get("value", [])
+                next_link = page.get("@odata.nextLink")
+                # The nextLink already carries the original query options
+                if next_link and (limit is None or yielded + len(items) < limit):
+                    next_page = asyncio.create_task(self._get_url(next_link))
+
+                for item in items:
+                    yield item
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
     async def post(
         self, endpoint: str, data: Optional[dict[str, Any]] = None
     ) -> dict[str, Any]:
@@ -79,25 +353,253 @@ class GraphClient:
             JSON response data
         """
         url = f"{self.base_url}{endpoint}"
-        headers = self._get_headers()
+        response = await self._send("POST", url, json=data)
+        return self._parse(response)
 
-        logger.info(f"POST {url} with trace: {self.trace_context}")
+    async def get_last_modified(
+        self, endpoint: str, params: Optional[dict[str, Any]] = None
+    ) -> Optional[str]:
+        """
+        Fetch only the lastModifiedDateTime of a resource or of a collection's newest item.
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            return response.json()
+        Args:
+            endpoint: API endpoint path of a single resource or a collection
+            params: Optional extra query parameters
+
+        Returns:
+            lastModifiedDateTime value or None if unavailable
+        """
+        query = {"$select": "lastModifiedDateTime", **(params or {})}
+        result = await self.get(endpoint, params=query)
+        if "value" in result:
+            items = result["value"]
+            return items[0].get("lastModifiedDateTime") if items else None
+        return result.get("lastModifiedDateTime")
 
-    async def search(self, query: str) -> dict[str, Any]:
+    async def get_collection_version(self, endpoint: str) -> Optional[str]:
         """
-        Search across all OneNote content.
+        Fetch a version marker of a collection: its item count and newest lastModifiedDateTime.
+
+        The count changes when items are removed, which the newest
+        lastModifiedDateTime alone does not reflect.
 
         Args:
-            query: Search query string
+            endpoint: API endpoint path of the collection
+
+        Returns:
+            Version marker, or None if the collection reports neither value
+        """
+        result = await self.get(
+            endpoint,
+            params={
+                "$select": "lastModifiedDateTime",
+                "$orderby": "lastModifiedDateTime desc",
+                "$top": 1,
+                "$count": "true",
+            },
+        )
+        items = result.get("value") or []
+        newest = items[0].get("lastModifiedDateTime") if items else None
+        count = result.get("@odata.count")
+        if count is None and newest is None:
+            return None
+        return f"{count}:{newest}"
+
+    async def batch(self, requests: list[BatchRequest]) -> dict[str, BatchResponse]:
+        """
+        Send sub-requests through Graph JSON batching.
+
+        Requests are packed into $batch calls of up to 20 sub-requests (keeping
+        dependsOn chains together) and the calls are sent concurrently.
+
+        Args:
+            requests: Sub-requests with unique IDs
+
+        Returns:
+            Sub-responses keyed by request ID, including per-item errors
+        """
+        policy = throttle_controller.retry_policy
+        responses: dict[str, BatchResponse] = {}
+        pending = list(requests)
+        attempt = 0
+
+        while pending:
+            chunks = plan_batches(pending)
+            results = await asyncio.gather(*(self._send_batch(chunk) for chunk in chunks))
+            for result in results:
+                responses.update(result)
+
+            # Sub-requests are throttled individually; retry only those
+            throttled = [
+                request
+                for request in pending
+                if responses[request.id].status in RETRYABLE_STATUS_CODES
+            ]
+            if not throttled or attempt >= policy.max_retries or not policy.try_spend():
+                break
+
+            retry_after = max(
+                (
+                    parse_retry_after(responses[request.id].get_header("Retry-After")) or 0.0
+                    for request in throttled
+                ),
+                default=0.0,
+            )
+            delay = policy.compute_delay(attempt, retry_after or None)
+            logger.warning(
+                f"{len(throttled)} $batch sub-requests throttled; retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+
+            retried_ids = {request.id for request in throttled}
+            pending = [
+                replace(
+                    request,
+                    depends_on=[d for d in request.depends_on if d in retried_ids],
+                )
+                for request in throttled
+            ]
+            attempt += 1
+
+        return responses
+
+    async def _send_batch(self, chunk: list[BatchRequest]) -> dict[str, BatchResponse]:
+        """
+        Send a single $batch call and correlate its sub-responses.
+
+        Args:
+            chunk: Sub-requests fitting in one $batch call
 
         Returns:
-            Search results from Graph API
+            Sub-responses keyed by request ID
+        """
+        result = await self.post("/$batch", {"requests": [r.to_payload() for r in chunk]})
+
+        responses: dict[str, BatchResponse] = {}
+        for payload in result.get("responses", []):
+            response = BatchResponse.from_payload(payload)
+            responses[response.id] = response
+
+        if any(r.status in THROTTLE_STATUS_CODES for r in responses.values()):
+            throttle_controller.report_throttled(self.identity.tenant_id, self.identity.user_id)
+
+        for request in chunk:
+            if request.id not in responses:
+                logger.warning(f"No $batch response for request {request.id}")
+                responses[request.id] = BatchResponse(id=request.id, status=502)
+        return responses
+
+    async def batch_collections(
+        self,
+        endpoints: dict[str, str],
+        params: Optional[dict[str, Any]] = None,
+        top: Optional[int] = None,
+        select: Optional[list[str]] = None,
+    ) -> dict[str, BatchCollection]:
+        """
+        Fetch several Graph collections through $batch, following @odata.nextLink.
+
+        Each round trip requests the next page of every unfinished collection.
+
+        Args:
+            endpoints: API endpoint paths keyed by caller-defined keys
+            params: Optional query parameters applied to every collection
+            top: Page size pushed down as $top
+            select: Properties pushed down as $select
+
+        Returns:
+            Collected items (or error) keyed by the same keys
+        """
+        params = dict(params or {})
+        if top is not None:
+            params["$top"] = top
+        if select:
+            params["$select"] = ",".join(select)
+
+        keys = list(endpoints)
+        results = {key: BatchCollection() for key in keys}
+        pending = {
+            str(i): BatchRequest(id=str(i), url=endpoints[key], params=params)
+            for i, key in enumerate(keys)
+        }
+
+        while pending:
+            responses = await self.batch(list(pending.values()))
+            next_pending: dict[str, BatchRequest] = {}
+            for request_id, response in responses.items():
+                collection = results[keys[int(request_id)]]
+                if not response.ok:
+                    collection.error = response.error_message
+                    continue
+
+                body = response.body if isinstance(response.body, dict) else {}
+                collection.items.extend(body.get("value", []))
+                next_link = body.get("@odata.nextLink")
+                if next_link:
+                    next_pending[request_id] = BatchRequest(
+                        id=request_id, url=self._relative_url(next_link)
+                    )
+            pending = next_pending
+
+        return results
+
+    def _relative_url(self, url: str) -> str:
+        """
+        Convert an absolute Graph URL into a path relative to the API version root.
+
+        Args:
+            url: Absolute URL such as an @odata.nextLink
+
+        Returns:
+            Relative URL usable inside a $batch request
+        """
+        base_path = urlsplit(self.base_url).path.rstrip("/")
+        parts = urlsplit(url)
+        path = parts.path
+        if base_path and path.startswith(base_path):
+            path = path[len(base_path):]
+        return f"{path}?{parts.query}" if parts.query else path
+
+    async def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        notebook_id: Optional[str] = None,
+        section_id: Optional[str] = None,
+        select: Optional[list[str]] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Search across OneNote content.
+
+        Args:
+            query: Search query string
+            limit: Maximum number of results to yield
+            notebook_id: Only yield pages of this notebook
+            section_id: Only yield pages of this section
+            select: Page properties pushed down as $select
+
+        Yields:
+            Matching pages from Graph API
         """
         endpoint = "/me/onenote/pages"
         params = {"search": query}
-        return await self.get(endpoint, params=params)
+        filter_notebook = None
+        if section_id:
+            endpoint = f"/me/onenote/sections/{section_id}/pages"
+        elif notebook_id:
+            # Graph has no notebook-scoped page search, so filter on the parent notebook
+            params["$expand"] = "parentNotebook($select=id)"
+            filter_notebook = notebook_id
+
+        yielded = 0
+        pages = self.iter_items(
+            endpoint, params=params, select=select, limit=None if filter_notebook else limit
+        )
+        async with aclosing(pages) as items:
+            async for item in items:
+                if filter_notebook and (item.get("parentNotebook") or {}).get("id") != filter_notebook:
+                    continue
+                yield item
+                yielded += 1
+                if limit is not None and yielded >= limit:
+                    return
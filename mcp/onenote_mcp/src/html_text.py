@@ -0,0 +1,246 @@
+"""Plain-text and markdown extraction from OneNote page HTML."""
+
+import codecs
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import AsyncIterator, Literal, Optional
+
+# Elements whose boundaries separate lines of text
+BLOCK_TAGS = frozenset(
+    {
+        "br", "div", "p", "li", "tr", "td", "th", "table", "ul", "ol",
+        "h1", "h2", "h3", "h4", "h5", "h6", "title", "pre", "blockquote",
+    }
+)
+# Elements whose content is never text
+SKIP_TAGS = frozenset({"script", "style", "head"})
+HEADING_LEVELS = {f"h{level}": level for level in range(1, 7)}
+
+ImageMode = Literal["drop", "reference"]
+
+_SPACES = re.compile(r"[ \t\r\f\v ]+")
+
+
+@dataclass
+class ExtractedText:
+    """Text extracted from a page, and whether it was cut at the size cap."""
+
+    text: str
+    truncated: bool = False
+
+
+class TextExtractor(HTMLParser):
+    """HTML parser that collects visible text, one line per block element.
+
+    Lines are collapsed as soon as they end, so only the current line and the
+    emitted output are held in memory. Once ``max_chars`` is reached the
+    extractor is ``truncated`` and ignores further input.
+    """
+
+    def __init__(
+        self,
+        markdown: bool = False,
+        images: ImageMode = "drop",
+        max_chars: Optional[int] = None,
+    ):
+        """
+        Initialize extractor.
+
+        Args:
+            markdown: Emit headings and list items as markdown
+            images: Drop embedded images, ink and attachments, or emit a reference to them
+            max_chars: Maximum length of the extracted text
+        """
+        super().__init__(convert_charrefs=True)
+        self.markdown = markdown
+        self.images = images
+        self.max_chars = max_chars
+        self.truncated = False
+        self._lines: list[str] = []
+        self._length = 0
+        self._line: list[str] = []
+        self._line_length = 0
+        self._prefix = ""
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        if self.truncated:
+            return
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif self._skip_depth:
+            return
+        elif tag in BLOCK_TAGS:
+            self._end_line()
+            if self.markdown:
+                if tag in HEADING_LEVELS:
+                    self._prefix = "#" * HEADING_LEVELS[tag] + " "
+                elif tag == "li":
+                    self._prefix = "- "
+        elif tag in ("img", "object") and self.images == "reference":
+            self._line.append(self._reference(tag, dict(attrs)))
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.truncated:
+            return
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS and not self._skip_depth:
+            self._end_line()
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip_depth and not self.truncated:
+            self._line.append(data)
+            self._line_length += len(data)
+            # A line longer than the remaining room is cut without waiting for its end
+            if self.max_chars is not None and self._line_length > self.max_chars - self._length:
+                self._end_line()
+
+    def _reference(self, tag: str, attrs: dict[str, Optional[str]]) -> str:
+        """Describe an embedded image, ink drawing or attachment without inlining it."""
+        if tag == "img":
+            label = attrs.get("alt") or "image"
+            url = attrs.get("data-fullres-src") or attrs.get("src") or ""
+        else:
+            label = attrs.get("data-attachment") or "attachment"
+            url = attrs.get("data") or ""
+        # data: URIs carry the object itself
+        if url.startswith("data:"):
+            url = ""
+        label = _SPACES.sub(" ", label).strip()
+        if self.markdown:
+            marker = "!" if tag == "img" else ""
+            return f" {marker}[{label}]({url}) " if url else f" [{label}] "
+        return f" [{label}: {url}] " if url else f" [{label}] "
+
+    def _end_line(self) -> None:
+        """Collapse the current line and append it to the output."""
+        line = _SPACES.sub(" ", "".join(self._line)).strip()
+        self._line = []
+        self._line_length = 0
+        prefix, self._prefix = self._prefix, ""
+        if not line:
+            return
+        line = prefix + line
+        separator = 1 if self._lines else 0
+        if self.max_chars is not None and self._length + separator + len(line) > self.max_chars:
+            room = self.max_chars - self._length - separator
+            if room > 0:
+                self._lines.append(line[:room])
+                self._length += separator + room
+            self.truncated = True
+            return
+        self._lines.append(line)
+        self._length += separator + len(line)
+
+    def close(self) -> None:
+        super().close()
+        if not self.truncated:
+            self._end_line()
+
+    def text(self) -> str:
+        """Return the collected text with whitespace collapsed and blank lines dropped."""
+        return "\n".join(self._lines)
+
+
+def extract_text(
+    html: str,
+    markdown: bool = False,
+    images: ImageMode = "drop",
+    max_chars: Optional[int] = None,
+) -> ExtractedText:
+    """
+    Extract the visible text of an HTML document.
+
+    Args:
+        html: HTML document
+        markdown: Emit headings and list items as markdown
+        images: Drop embedded images, ink and attachments, or emit a reference to them
+        max_chars: Maximum length of the extracted text
+
+    Returns:
+        Text with one line per block element, and whether it was truncated
+    """
+    extractor = TextExtractor(markdown=markdown, images=images, max_chars=max_chars)
+    extractor.feed(html)
+    extractor.close()
+    return ExtractedText(extractor.text(), extractor.truncated)
+
+
+def html_to_text(html: str) -> str:
+    """
+    Extract the full visible text of an HTML document, without images.
+
+    Args:
+        html: HTML document
+
+    Returns:
+        Text with one line per block element
+    """
+    return extract_text(html).text
+
+
+async def stream_html_to_text(
+    chunks: AsyncIterator[bytes],
+    markdown: bool = False,
+    images: ImageMode = "drop",
+    max_chars: Optional[int] = None,
+    encoding: str = "utf-8",
+) -> ExtractedText:
+    """
+    Extract the visible text of an HTML document read as a byte stream.
+
+    Chunks are decoded and parsed as they arrive; reading stops as soon as
+    the size cap is reached.
+
+    Args:
+        chunks: Byte chunks of the HTML document
+        markdown: Emit headings and list items as markdown
+        images: Drop embedded images, ink and attachments, or emit a reference to them
+        max_chars: Maximum length of the extracted text
+        encoding: Character encoding of the document
+
+    Returns:
+        Extracted text and whether it was truncated
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    extractor = TextExtractor(markdown=markdown, images=images, max_chars=max_chars)
+    async for chunk in chunks:
+        extractor.feed(decoder.decode(chunk))
+        if extractor.truncated:
+            break
+    else:
+        extractor.feed(decoder.decode(b"", final=True))
+    extractor.close()
+    return ExtractedText(extractor.text(), extractor.truncated)
+
+
+async def read_text(
+    chunks: AsyncIterator[bytes],
+    max_chars: Optional[int] = None,
+    encoding: str = "utf-8",
+) -> ExtractedText:
+    """
+    Read a byte stream as text, stopping at a size cap.
+
+    Args:
+        chunks: Byte chunks of the document
+        max_chars: Maximum length of the text
+        encoding: Character encoding of the document
+
+    Returns:
+        Decoded text and whether it was truncated
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parts: list[str] = []
+    length = 0
+    async for chunk in chunks:
+        part = decoder.decode(chunk)
+        if max_chars is not None and length + len(part) > max_chars:
+            parts.append(part[: max_chars - length])
+            return ExtractedText("".join(parts), truncated=True)
+        parts.append(part)
+        length += len(part)
+    parts.append(decoder.decode(b"", final=True))
+    return ExtractedText("".join(parts))
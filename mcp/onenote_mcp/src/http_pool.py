@@ -0,0 +1,82 @@
+"""Process-wide HTTP connection pool for Microsoft Graph API calls."""
+
+import logging
+from typing import Optional
+
+import httpx
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClientPool:
+    """Lifecycle-managed ``httpx.AsyncClient`` shared by all Graph requests.
+
+    The pool is opened at server startup and closed at shutdown so that DNS
+    lookups, TCP and TLS handshakes are amortized across tool calls. Only the
+    bearer token varies per request; it is passed as a request header rather
+    than being baked into the client.
+    """
+
+    def __init__(self):
+        """Initialize an unopened pool."""
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def open(self) -> httpx.AsyncClient:
+        """
+        Create the shared client if it does not exist yet.
+
+        Returns:
+            The shared AsyncClient instance
+        """
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=settings.graph_max_connections,
+                max_keepalive_connections=settings.graph_max_keepalive_connections,
+                keepalive_expiry=settings.graph_keepalive_expiry,
+            )
+            self._client = httpx.AsyncClient(
+                http2=settings.graph_http2,
+                limits=limits,
+                timeout=httpx.Timeout(
+                    settings.graph_timeout, connect=settings.graph_connect_timeout
+                ),
+            )
+            logger.info(
+                f"Opened Graph HTTP pool (http2={settings.graph_http2}, "
+                f"max_connections={settings.graph_max_connections}, "
+                f"max_keepalive={settings.graph_max_keepalive_connections})"
+            )
+        return self._client
+
+    async def warm_up(self) -> None:
+        """Open the pool and a first Graph connection (DNS, TCP and TLS) before serving."""
+        client = await self.open()
+        try:
+            await client.head(settings.graph_api_base_url)
+        except httpx.HTTPError as e:
+            logger.warning(f"Graph connection warm-up failed: {e}")
+
+    async def close(self) -> None:
+        """Close the shared client and release all pooled connections."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("Closed Graph HTTP pool")
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Return the shared client.
+
+        Raises:
+            RuntimeError: If the pool has not been opened
+        """
+        if self._client is None or self._client.is_closed:
+            raise RuntimeError("HTTP pool is not open; call open() at server startup")
+        return self._client
+
+
+# Singleton instance
+http_pool = HttpClientPool()
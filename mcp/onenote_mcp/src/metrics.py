@@ -0,0 +1,315 @@
+"""Per-tool metrics with Prometheus text exposition."""
+
+import functools
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers cache hits through multi-page tree walks
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """Value that goes up and down."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram.
+
+    Observing a value is a binary search over the bucket bounds and three
+    additions; cumulative counts are only computed when rendering.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricFamily:
+    """A named metric and its children per label values."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        label_names: tuple[str, ...],
+        factory: Callable[[], Any],
+    ):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.label_names = label_names
+        self._factory = factory
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str) -> Any:
+        """
+        Return the child for the label values, creating it on first use.
+
+        Resolve children once (e.g., per tool at registration) and keep them
+        to avoid the lookup on hot paths.
+        """
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._factory()
+        return child
+
+    def render(self) -> list[str]:
+        """Return the family in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            labels = ",".join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, values)
+            )
+            if self.kind != "histogram":
+                series = f"{self.name}{{{labels}}}" if labels else self.name
+                lines.append(f"{series} {child.value}")
+                continue
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(child.bounds, child.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {child.count}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {child.sum}")
+            lines.append(f"{self.name}_count{suffix} {child.count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """Holds metric families and stats collectors and renders them for /metrics."""
+
+    def __init__(self):
+        self._families: list[MetricFamily] = []
+        self._collectors: list[tuple[str, str, Callable[[], dict[str, Any]]]] = []
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        self._families.append(family)
+        return family
+
+    def counter(self, name: str, help: str, label_names: tuple[str, ...] = ()) -> MetricFamily:
+        """Register a counter family."""
+        return self._register(MetricFamily(name, help, "counter", label_names, Counter))
+
+    def gauge(self, name: str, help: str, label_names: tuple[str, ...] = ()) -> MetricFamily:
+        """Register a gauge family."""
+        return self._register(MetricFamily(name, help, "gauge", label_names, Gauge))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> MetricFamily:
+        """Register a histogram family."""
+        return self._register(
+            MetricFamily(name, help, "histogram", label_names, lambda: Histogram(buckets))
+        )
+
+    def register_collector(
+        self, prefix: str, help: str, collect: Callable[[], dict[str, Any]]
+    ) -> None:
+        """
+        Export the numeric entries of a stats() dictionary as gauges at scrape time.
+
+        Args:
+            prefix: Metric name prefix (entries become <prefix>_<key>)
+            help: Help text shared by the gauges
+            collect: Function returning the stats dictionary
+        """
+        self._collectors.append((prefix, help, collect))
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text ending with a newline
+        """
+        lines: list[str] = []
+        for family in self._families:
+            lines.extend(family.render())
+        for prefix, help, collect in self._collectors:
+            try:
+                stats = collect()
+            except Exception as e:
+                logger.warning(f"Metrics collector {prefix} failed: {e}")
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"# HELP {prefix}_{key} {help}")
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+TOOL_CALLS = registry.counter(
+    "onenote_mcp_tool_calls_total", "MCP tool calls by outcome", ("tool", "outcome")
+)
+TOOL_LATENCY = registry.histogram(
+    "onenote_mcp_tool_duration_seconds", "MCP tool call latency", ("tool",)
+)
+TOOL_IN_FLIGHT = registry.gauge(
+    "onenote_mcp_tool_in_flight", "MCP tool calls in progress", ("tool",)
+)
+GRAPH_REQUESTS_PER_CALL = registry.histogram(
+    "onenote_mcp_graph_requests_per_call",
+    "Graph requests (including retries and nextLink pages) per tool call",
+    ("tool",),
+    COUNT_BUCKETS,
+)
+GRAPH_REQUESTS = registry.counter(
+    "onenote_mcp_graph_requests_total", "Graph HTTP requests by originating tool", ("tool",)
+)
+GRAPH_BYTES = registry.counter(
+    "onenote_mcp_graph_bytes_total",
+    "Graph request bytes sent and response bytes received",
+    ("tool", "direction"),
+)
+OBO_ACQUISITIONS = registry.counter(
+    "onenote_mcp_obo_acquisitions_total",
+    "OBO token exchanges with Entra ID (cache misses and refreshes)",
+    ("outcome",),
+)
+OBO_LATENCY = registry.histogram(
+    "onenote_mcp_obo_duration_seconds", "OBO token exchange latency"
+)
+
+# Tool label for Graph requests made outside a tool call (background sync)
+BACKGROUND = "background"
+
+
+class ToolMetrics:
+    """Metric children of one tool, resolved once so recording skips label lookups."""
+
+    __slots__ = (
+        "ok", "error", "latency", "in_flight", "requests_per_call",
+        "graph_requests", "bytes_sent", "bytes_received",
+    )
+
+    def __init__(self, tool: str, graph_only: bool = False):
+        """
+        Args:
+            tool: Tool name used as the label value
+            graph_only: Resolve only the Graph request counters (for background work)
+        """
+        if not graph_only:
+            self.ok = TOOL_CALLS.labels(tool, "ok")
+            self.error = TOOL_CALLS.labels(tool, "error")
+            self.latency = TOOL_LATENCY.labels(tool)
+            self.in_flight = TOOL_IN_FLIGHT.labels(tool)
+            self.requests_per_call = GRAPH_REQUESTS_PER_CALL.labels(tool)
+        self.graph_requests = GRAPH_REQUESTS.labels(tool)
+        self.bytes_sent = GRAPH_BYTES.labels(tool, "sent")
+        self.bytes_received = GRAPH_BYTES.labels(tool, "received")
+
+
+class ToolCall:
+    """Graph requests made by one tool call (shared with the tasks it spawns)."""
+
+    __slots__ = ("metrics", "graph_requests")
+
+    def __init__(self, metrics: ToolMetrics):
+        self.metrics = metrics
+        self.graph_requests = 0
+
+
+current_call: ContextVar[Optional[ToolCall]] = ContextVar("current_call", default=None)
+_background = ToolCall(ToolMetrics(BACKGROUND, graph_only=True))
+
+
+def record_graph_request(bytes_sent: int) -> None:
+    """Count a Graph HTTP request against the current tool call."""
+    call = current_call.get() or _background
+    call.graph_requests += 1
+    call.metrics.graph_requests.value += 1
+    call.metrics.bytes_sent.value += bytes_sent
+
+
+def record_graph_bytes(bytes_received: int) -> None:
+    """Count Graph response bytes against the current tool call."""
+    (current_call.get() or _background).metrics.bytes_received.value += bytes_received
+
+
+def instrument_tool(fn: F) -> F:
+    """
+    Record call count, latency, in-flight calls and Graph requests of a tool.
+
+    Apply below ``@mcp.tool()`` so the tool keeps the function's signature.
+    """
+    metrics = ToolMetrics(fn.__name__)
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        call = ToolCall(metrics)
+        token = current_call.set(call)
+        metrics.in_flight.value += 1
+        start = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException:
+            metrics.error.value += 1
+            raise
+        else:
+            metrics.ok.value += 1
+            return result
+        finally:
+            metrics.latency.observe(time.perf_counter() - start)
+            metrics.requests_per_call.observe(call.graph_requests)
+            metrics.in_flight.value -= 1
+            current_call.reset(token)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,158 @@
+"""Concurrent walk of a notebook's section groups, sections and pages."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+from .graph_client import PAGE_SELECT, SECTION_GROUP_SELECT, SECTION_SELECT, GraphClient
+
+logger = logging.getLogger(__name__)
+
+SectionCallback = Callable[[dict[str, Any], int, int], Awaitable[None]]
+
+
+class NotebookTreeWalker:
+    """Fetch the tree of a notebook with bounded fan-out.
+
+    The sections and section groups of every container are listed
+    concurrently, and the pages of every section are fetched as soon as the
+    section is known, so a full walk takes about as long as its slowest
+    branch. At most ``max_concurrency`` listings are in flight at a time.
+    """
+
+    def __init__(
+        self,
+        client: GraphClient,
+        max_concurrency: int = 8,
+        max_depth: Optional[int] = None,
+        max_items: Optional[int] = None,
+        include_pages: bool = True,
+        page_size: Optional[int] = None,
+        on_section: Optional[SectionCallback] = None,
+    ):
+        """
+        Initialize walker.
+
+        Args:
+            client: Graph client for the user
+            max_concurrency: Maximum number of concurrent Graph listings
+            max_depth: Maximum section group nesting to descend into (unlimited if None)
+            max_items: Maximum number of sections, section groups and pages in the tree
+            include_pages: Whether to list the pages of each section
+            page_size: Page size pushed down as $top
+            on_section: Awaited with each completed section and the completed
+                and discovered section counts, for streaming partial results
+        """
+        self.client = client
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.include_pages = include_pages
+        self.page_size = page_size
+        self.on_section = on_section
+        self.truncated = False
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._items = 0
+        self._sections_found = 0
+        self._sections_done = 0
+
+    async def walk(self, notebook_id: str) -> dict[str, Any]:
+        """
+        Fetch the tree of a notebook.
+
+        Args:
+            notebook_id: The ID of the notebook
+
+        Returns:
+            Node with "sections" and "sectionGroups"; sections carry "pages"
+            and failed branches carry an "error" message
+        """
+        node: dict[str, Any] = {"id": notebook_id}
+        await self._fill_container(node, f"/me/onenote/notebooks/{notebook_id}", depth=0)
+        return node
+
+    def _take(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Reserve room for items under the item limit, dropping the excess."""
+        if self.max_items is None:
+            return items
+        room = max(0, self.max_items - self._items)
+        if len(items) > room:
+            self.truncated = True
+            items = items[:room]
+        self._items += len(items)
+        return items
+
+    def _room(self) -> Optional[int]:
+        """Return how many more items fit under the item limit."""
+        return None if self.max_items is None else max(0, self.max_items - self._items)
+
+    def _fetch_limit(self, room: Optional[int]) -> Optional[int]:
+        """Return how many items to list: one more than fits, so _take sees a cut listing."""
+        return None if room is None else room + 1
+
+    async def _list(
+        self, endpoint: str, select: list[str], limit: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        """List a Graph collection while holding a fan-out slot."""
+        async with self._semaphore:
+            return [
+                item
+                async for item in self.client.iter_items(
+                    endpoint, top=self.page_size, select=select, limit=limit
+                )
+            ]
+
+    async def _fill_container(self, node: dict[str, Any], path: str, depth: int) -> None:
+        """List the sections and section groups of a notebook or section group and descend."""
+        try:
+            sections, groups = await asyncio.gather(
+                self._list(f"{path}/sections", SECTION_SELECT, self._fetch_limit(self._room())),
+                self._list(
+                    f"{path}/sectionGroups", SECTION_GROUP_SELECT, self._fetch_limit(self._room())
+                ),
+            )
+        except httpx.HTTPError as e:
+            logger.warning(f"Failed to list {path}: {e}")
+            node["error"] = str(e)
+            return
+
+        # Listings may be shared with coalesced requests, so annotate copies of the items
+        node["sections"] = [dict(item) for item in self._take(sections)]
+        node["sectionGroups"] = [dict(item) for item in self._take(groups)]
+        self._sections_found += len(node["sections"])
+        # Section groups below the depth limit are listed but not expanded
+        descend = self.max_depth is None or depth < self.max_depth
+        if node["sectionGroups"] and not descend:
+            self.truncated = True
+
+        await asyncio.gather(
+            *(self._fill_section(section) for section in node["sections"]),
+            *(
+                self._fill_container(group, f"/me/onenote/sectionGroups/{group['id']}", depth + 1)
+                for group in (node["sectionGroups"] if descend else [])
+            ),
+        )
+
+    async def _fill_section(self, section: dict[str, Any]) -> None:
+        """List the pages of a section and report it as completed."""
+        if self.include_pages:
+            room = self._room()
+            if room == 0:
+                self.truncated = True
+                section["pages"] = []
+            else:
+                try:
+                    pages = await self._list(
+                        f"/me/onenote/sections/{section['id']}/pages",
+                        PAGE_SELECT,
+                        self._fetch_limit(room),
+                    )
+                    section["pages"] = self._take(pages)
+                except httpx.HTTPError as e:
+                    logger.warning(f"Failed to list pages of section {section['id']}: {e}")
+                    section["error"] = str(e)
+
+        self._sections_done += 1
+        if self.on_section is not None:
+            await self.on_section(section, self._sections_done, self._sections_found)
@@ -0,0 +1,395 @@
+"""Compressed, byte-bounded cache of extracted page content."""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from .config import settings
+from .html_text import ExtractedText
+
+logger = logging.getLogger(__name__)
+
+# Approximate bookkeeping cost of an entry and of a stored body (keys, objects, dict slots)
+ENTRY_OVERHEAD = 256
+BLOB_OVERHEAD = 128
+# Content downloaded alongside the version probe is only cached for pages last
+# modified this long before the download started (allows for clock skew)
+SETTLE_SECONDS = 60.0
+
+
+def settled(version: str, before: float, margin: float = SETTLE_SECONDS) -> bool:
+    """
+    Check whether a page version was written well before a moment.
+
+    Args:
+        version: lastModifiedDateTime of the page
+        before: Unix time the page was read at
+        margin: Clock skew allowance in seconds
+
+    Returns:
+        True if content read at ``before`` is at least as new as the version
+    """
+    try:
+        modified = datetime.fromisoformat(version).timestamp()
+    except ValueError:
+        return False
+    return modified <= before - margin
+
+
+@dataclass
+class PageEntry:
+    """A cached page variant: the version it was read at and its content body."""
+
+    version: str
+    digest: str
+    truncated: bool
+    size: int
+
+
+@dataclass
+class Blob:
+    """A compressed content body shared by every entry with the same text."""
+
+    data: bytes
+    raw_size: int
+    refs: int = 0
+
+
+class SQLitePageStore:
+    """On-disk tier of the page cache; bodies are stored once per content hash."""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite database file path
+        """
+        self._lock = threading.Lock()
+        # Worker processes share the file: WAL lets readers proceed during a write
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS page_entries ("
+            "key TEXT PRIMARY KEY, version TEXT NOT NULL, digest TEXT NOT NULL, "
+            "truncated INTEGER NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS page_blobs ("
+            "digest TEXT PRIMARY KEY, data BLOB NOT NULL, raw_size INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS page_entries_digest ON page_entries (digest)"
+        )
+        self._conn.commit()
+
+    def load(self, key: str, version: str) -> Optional[tuple[str, bool, bytes, int]]:
+        """Read the digest, truncated flag and body of an entry at a version, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.digest, e.truncated, b.data, b.raw_size FROM page_entries e "
+                "JOIN page_blobs b ON b.digest = e.digest WHERE e.key = ? AND e.version = ?",
+                (key, version),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], bool(row[1]), row[2], row[3]
+
+    def save(self, key: str, version: str, digest: str, truncated: bool, blob: Blob) -> None:
+        """Insert or replace the entry of a key (older versions are replaced)."""
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT digest FROM page_entries WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR IGNORE INTO page_blobs VALUES (?, ?, ?)",
+                (digest, blob.data, blob.raw_size),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_entries VALUES (?, ?, ?, ?, ?)",
+                (key, version, digest, int(truncated), time.time()),
+            )
+            if previous is not None and previous[0] != digest:
+                self._conn.execute(
+                    "DELETE FROM page_blobs WHERE digest = ? AND NOT EXISTS "
+                    "(SELECT 1 FROM page_entries WHERE digest = ?)",
+                    (previous[0], previous[0]),
+                )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class PageCache:
+    """Byte-bounded LRU of extracted page content, compressed and deduplicated.
+
+    An entry is one variant (format, image mode, size cap) of a user's page,
+    stamped with the page's lastModifiedDateTime: a lookup at another version
+    is a miss and drops the entry, so edits are never served stale. Bodies are
+    zlib-compressed and stored once per content hash, shared by every entry
+    with the same text (the same page in two variants whose output is equal,
+    or a page shared by several users). Memory is accounted per entry and per
+    body, and least recently used entries are evicted once ``max_bytes`` is
+    exceeded; bodies are freed with their last entry.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        compression_level: int = 6,
+        store: Optional[SQLitePageStore] = None,
+        store_path: Optional[str] = None,
+    ):
+        """
+        Initialize page cache.
+
+        Args:
+            max_bytes: Memory budget of the in-memory tier (0 disables the cache)
+            compression_level: zlib compression level (1 fastest .. 9 smallest)
+            store: Optional on-disk tier
+            store_path: Path of an on-disk tier opened by open() (in each worker process)
+        """
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self.store = store
+        self.store_path = store_path
+        self._entries: OrderedDict[str, PageEntry] = OrderedDict()
+        self._blobs: dict[str, Blob] = {}
+        self.bytes = 0
+        self.compressed_bytes = 0
+        self.raw_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.stale = 0
+        self.evictions = 0
+        self.dedup_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything."""
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(user_id: str, page_id: str, variant: tuple[Hashable, ...]) -> str:
+        """Build the cache key of a user's page variant."""
+        return "\x1f".join((user_id, page_id, *map(str, variant)))
+
+    async def get(
+        self, user_id: str, page_id: str, version: str, variant: tuple[Hashable, ...]
+    ) -> Optional[ExtractedText]:
+        """
+        Return the cached content of a page variant at a version.
+
+        Args:
+            user_id: User the page was read for
+            page_id: Page ID
+            version: Current lastModifiedDateTime of the page
+            variant: Output options the content was produced with
+
+        Returns:
+            Cached content, or None on a miss
+        """
+        key = self.make_key(user_id, page_id, variant)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return ExtractedText(self._read(entry.digest), truncated=entry.truncated)
+            self.stale += 1
+            self._drop(key)
+
+        if self.store is not None:
+            row = await asyncio.to_thread(self.store.load, key, version)
+            if row is not None:
+                digest, truncated, data, raw_size = row
+                self.disk_hits += 1
+                entry = PageEntry(version, digest, truncated, 0)
+                self._remember(key, entry, Blob(data, raw_size))
+                return ExtractedText(zlib.decompress(data).decode("utf-8"), truncated=truncated)
+
+        self.misses += 1
+        return None
+
+    async def put(
+        self,
+        user_id: str,
+        page_id: str,
+        version: str,
+        variant: tuple[Hashable, ...],
+        content: ExtractedText,
+    ) -> None:
+        """
+        Store the content of a page variant read at a version.
+
+        Args:
+            user_id: User the page was read for
+            page_id: Page ID
+            version: lastModifiedDateTime the page had before it was read
+            variant: Output options the content was produced with
+            content: Extracted content
+        """
+        if not self.enabled:
+            return
+        raw = content.text.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        key = self.make_key(user_id, page_id, variant)
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version and entry.digest == digest:
+            # Already stored by a concurrent reader of the same download
+            self._entries.move_to_end(key)
+            return
+
+        blob = self._blobs.get(digest)
+        if blob is None:
+            blob = Blob(zlib.compress(raw, self.compression_level), len(raw))
+        else:
+            self.dedup_hits += 1
+
+        self._remember(key, PageEntry(version, digest, content.truncated, 0), blob)
+        if self.store is not None:
+            await asyncio.to_thread(
+                self.store.save, key, version, digest, content.truncated, blob
+            )
+
+    async def read_through(
+        self,
+        user_id: str,
+        page_id: str,
+        variant: tuple[Hashable, ...],
+        probe: Callable[[], Awaitable[Optional[str]]],
+        load: Callable[[], Awaitable[ExtractedText]],
+    ) -> tuple[ExtractedText, bool]:
+        """
+        Serve a page variant from the cache, or load it and cache it.
+
+        The version probe and the download start together, so a miss costs
+        one round trip rather than two; the download is dropped on a hit. As
+        the download may have been read before the probed version was written,
+        it is only cached when the version is settled (written well before the
+        download started); pages being edited right now are not cached.
+
+        Args:
+            user_id: User the page is read for
+            page_id: Page ID
+            variant: Output options the content is produced with
+            probe: Fetches the page's current lastModifiedDateTime
+            load: Downloads and converts the page
+
+        Returns:
+            Tuple of (content, whether it came from the cache)
+        """
+        if not self.enabled:
+            return await load(), False
+
+        started = time.time()
+        loading = asyncio.ensure_future(load())
+        # Retrieve the outcome of a download that is dropped, so it is not reported as lost
+        loading.add_done_callback(lambda task: task.cancelled() or task.exception())
+        try:
+            version = await probe()
+            if version is not None:
+                cached = await self.get(user_id, page_id, version, variant)
+                if cached is not None:
+                    return cached, True
+            content = await loading
+        finally:
+            loading.cancel()
+
+        if version is not None and settled(version, started):
+            await self.put(user_id, page_id, version, variant, content)
+        return content, False
+
+    def _read(self, digest: str) -> str:
+        return zlib.decompress(self._blobs[digest].data).decode("utf-8")
+
+    def _remember(self, key: str, entry: PageEntry, blob: Blob) -> None:
+        """Insert an entry and its body in memory, evicting least recently used entries."""
+        stored = self._blobs.get(entry.digest)
+        if stored is None:
+            stored = self._blobs[entry.digest] = blob
+            self.bytes += len(blob.data) + BLOB_OVERHEAD
+            self.compressed_bytes += len(blob.data)
+            self.raw_bytes += blob.raw_size
+        # Reference the body before replacing an entry that may share it
+        stored.refs += 1
+        if key in self._entries:
+            self._drop(key)
+        entry.size = ENTRY_OVERHEAD + len(key)
+        self.bytes += entry.size
+        self._entries[key] = entry
+
+        while self.bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        """Remove an entry, freeing its body when no other entry shares it."""
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        blob = self._blobs[entry.digest]
+        blob.refs -= 1
+        if blob.refs == 0:
+            del self._blobs[entry.digest]
+            self.bytes -= len(blob.data) + BLOB_OVERHEAD
+            self.compressed_bytes -= len(blob.data)
+            self.raw_bytes -= blob.raw_size
+
+    def open(self) -> None:
+        """Open the on-disk tier at store_path, if configured and not open yet."""
+        if self.store is None and self.store_path and self.enabled:
+            self.store = SQLitePageStore(self.store_path)
+
+    def close(self) -> None:
+        """Close the on-disk tier."""
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return cache counters and memory accounting.
+
+        Returns:
+            Dictionary of hit, miss and eviction counters, the hit ratio, and
+            the bytes held and saved by compression and deduplication
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        shared = sum((blob.refs - 1) * len(blob.data) for blob in self._blobs.values())
+        return {
+            "entries": len(self._entries),
+            "bodies": len(self._blobs),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "uncompressed_bytes": self.raw_bytes,
+            "compressed_bytes": self.compressed_bytes,
+            "compression_bytes_saved": self.raw_bytes - self.compressed_bytes,
+            "dedup_bytes_saved": shared,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "dedup_hits": self.dedup_hits,
+        }
+
+
+# Singleton instance
+page_cache = PageCache(
+    max_bytes=settings.page_cache_max_bytes,
+    compression_level=settings.page_cache_compression_level,
+    store_path=settings.page_cache_path,
+)
@@ -0,0 +1,389 @@
+"""Local SQLite mirror of OneNote notebooks, sections and pages."""
+
+import sqlite3
+import threading
+from typing import Any, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notebooks (
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    created_datetime TEXT,
+    last_modified_datetime TEXT,
+    PRIMARY KEY (user_id, id)
+);
+CREATE TABLE IF NOT EXISTS sections (
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    notebook_id TEXT,
+    display_name TEXT NOT NULL,
+    created_datetime TEXT,
+    last_modified_datetime TEXT,
+    synced_modified_datetime TEXT,
+    section_group_id TEXT,
+    PRIMARY KEY (user_id, id)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    section_id TEXT NOT NULL,
+    notebook_id TEXT,
+    title TEXT NOT NULL,
+    content_url TEXT,
+    created_datetime TEXT,
+    last_modified_datetime TEXT,
+    content TEXT,
+    content_modified_datetime TEXT,
+    PRIMARY KEY (user_id, id)
+);
+CREATE INDEX IF NOT EXISTS pages_by_section ON pages (user_id, section_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    user_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    pass_started_at REAL,
+    last_completed_at REAL,
+    last_completed_started_at REAL,
+    last_error TEXT
+);
+"""
+
+# Page columns aliased to Graph property names
+PAGE_COLUMNS = (
+    "id, title, content_url AS contentUrl, created_datetime AS createdDateTime, "
+    "last_modified_datetime AS lastModifiedDateTime, section_id AS sectionId, "
+    "notebook_id AS notebookId"
+)
+
+
+def _sql_limit(limit: Optional[int]) -> int:
+    """Translate an optional limit into SQLite's LIMIT value (-1 means no limit)."""
+    return -1 if limit is None else limit
+
+
+class PageStore:
+    """Thread-safe SQLite store for the per-user OneNote mirror.
+
+    Methods are synchronous and are expected to be called through
+    ``asyncio.to_thread`` from async code. Read methods return dictionaries
+    keyed by Graph property names so that callers can treat mirrored and
+    live items alike.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the mirror database.
+
+        Args:
+            path: SQLite database file path
+        """
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sections)")}
+        if "section_group_id" not in columns:
+            # Mirrors created before section groups were tracked; the next pass fills it in
+            self._conn.execute("ALTER TABLE sections ADD COLUMN section_group_id TEXT")
+        self._conn.commit()
+
+    def _query(self, sql: str, params: tuple = ()) -> list[dict[str, Any]]:
+        """Run a read query and return rows as dictionaries."""
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    # Notebooks
+
+    def replace_notebooks(self, user_id: str, notebooks: list[dict[str, Any]]) -> None:
+        """
+        Replace a user's notebooks with the given Graph notebook resources.
+
+        Args:
+            user_id: Owner of the mirror partition
+            notebooks: Graph notebook resources
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM notebooks WHERE user_id = ?", (user_id,))
+            self._conn.executemany(
+                "INSERT INTO notebooks VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        user_id,
+                        item["id"],
+                        item["displayName"],
+                        item.get("createdDateTime"),
+                        item.get("lastModifiedDateTime"),
+                    )
+                    for item in notebooks
+                ],
+            )
+
+    def list_notebooks(
+        self, user_id: str, limit: Optional[int] = None, offset: int = 0
+    ) -> list[dict[str, Any]]:
+        """Return a user's notebooks."""
+        return self._query(
+            "SELECT id, display_name AS displayName, created_datetime AS createdDateTime, "
+            "last_modified_datetime AS lastModifiedDateTime FROM notebooks "
+            "WHERE user_id = ? ORDER BY display_name LIMIT ? OFFSET ?",
+            (user_id, _sql_limit(limit), offset),
+        )
+
+    # Sections
+
+    def sync_sections(self, user_id: str, sections: list[dict[str, Any]]) -> list[str]:
+        """
+        Upsert a user's sections and drop sections that no longer exist.
+
+        Sync checkpoints of unchanged sections are preserved; pages of removed
+        sections are deleted.
+
+        Args:
+            user_id: Owner of the mirror partition
+            sections: Graph section resources (with expanded parentNotebook and
+                parentSectionGroup)
+
+        Returns:
+            IDs of sections whose pages need to be synced
+        """
+        with self._lock, self._conn:
+            existing = {
+                row[0]: row[1]
+                for row in self._conn.execute(
+                    "SELECT id, synced_modified_datetime FROM sections WHERE user_id = ?",
+                    (user_id,),
+                )
+            }
+            seen = set()
+            changed = []
+            for item in sections:
+                seen.add(item["id"])
+                modified = item.get("lastModifiedDateTime")
+                self._conn.execute(
+                    "INSERT INTO sections (user_id, id, notebook_id, display_name, "
+                    "created_datetime, last_modified_datetime, section_group_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, id) DO UPDATE SET notebook_id = excluded.notebook_id, "
+                    "display_name = excluded.display_name, "
+                    "created_datetime = excluded.created_datetime, "
+                    "last_modified_datetime = excluded.last_modified_datetime, "
+                    "section_group_id = excluded.section_group_id",
+                    (
+                        user_id,
+                        item["id"],
+                        (item.get("parentNotebook") or {}).get("id"),
+                        item["displayName"],
+                        item.get("createdDateTime"),
+                        modified,
+                        (item.get("parentSectionGroup") or {}).get("id"),
+                    ),
+                )
+                if modified is None or existing.get(item["id"]) != modified:
+                    changed.append(item["id"])
+
+            for section_id in set(existing) - seen:
+                self._conn.execute(
+                    "DELETE FROM sections WHERE user_id = ? AND id = ?", (user_id, section_id)
+                )
+                self._conn.execute(
+                    "DELETE FROM pages WHERE user_id = ? AND section_id = ?", (user_id, section_id)
+                )
+            return changed
+
+    def mark_section_synced(self, user_id: str, section_id: str) -> None:
+        """
+        Checkpoint a section as fully synced at its current lastModifiedDateTime.
+
+        Args:
+            user_id: Owner of the mirror partition
+            section_id: Section whose pages and contents are up to date
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE sections SET synced_modified_datetime = last_modified_datetime "
+                "WHERE user_id = ? AND id = ?",
+                (user_id, section_id),
+            )
+
+    def list_sections(
+        self, user_id: str, notebook_id: str, limit: Optional[int] = None, offset: int = 0
+    ) -> list[dict[str, Any]]:
+        """Return the sections directly under a notebook (not those in section groups)."""
+        return self._query(
+            "SELECT id, display_name AS displayName, created_datetime AS createdDateTime, "
+            "last_modified_datetime AS lastModifiedDateTime FROM sections "
+            "WHERE user_id = ? AND notebook_id = ? AND section_group_id IS NULL "
+            "ORDER BY display_name LIMIT ? OFFSET ?",
+            (user_id, notebook_id, _sql_limit(limit), offset),
+        )
+
+    # Pages
+
+    def sync_pages(
+        self, user_id: str, section_id: str, notebook_id: Optional[str], pages: list[dict[str, Any]]
+    ) -> list[str]:
+        """
+        Upsert the page metadata of a section and drop pages that no longer exist.
+
+        Args:
+            user_id: Owner of the mirror partition
+            section_id: Section the pages belong to
+            notebook_id: Notebook the section belongs to
+            pages: Graph page resources
+
+        Returns:
+            IDs of pages whose content is missing or outdated
+        """
+        with self._lock, self._conn:
+            existing = {
+                row[0]: row[1]
+                for row in self._conn.execute(
+                    "SELECT id, content_modified_datetime FROM pages "
+                    "WHERE user_id = ? AND section_id = ?",
+                    (user_id, section_id),
+                )
+            }
+            seen = set()
+            outdated = []
+            for item in pages:
+                seen.add(item["id"])
+                modified = item.get("lastModifiedDateTime")
+                self._conn.execute(
+                    "INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL) "
+                    "ON CONFLICT (user_id, id) DO UPDATE SET section_id = excluded.section_id, "
+                    "notebook_id = excluded.notebook_id, title = excluded.title, "
+                    "content_url = excluded.content_url, "
+                    "created_datetime = excluded.created_datetime, "
+                    "last_modified_datetime = excluded.last_modified_datetime",
+                    (
+                        user_id,
+                        item["id"],
+                        section_id,
+                        notebook_id,
+                        item.get("title") or "",
+                        item.get("contentUrl"),
+                        item.get("createdDateTime"),
+                        modified,
+                    ),
+                )
+                if modified is None or existing.get(item["id"]) != modified:
+                    outdated.append(item["id"])
+
+            for page_id in set(existing) - seen:
+                self._conn.execute(
+                    "DELETE FROM pages WHERE user_id = ? AND id = ?", (user_id, page_id)
+                )
+            return outdated
+
+    def save_page_content(self, user_id: str, page_id: str, content: str) -> None:
+        """
+        Store the content of a page, stamped with its current lastModifiedDateTime.
+
+        Args:
+            user_id: Owner of the mirror partition
+            page_id: Page the content belongs to
+            content: Page content
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET content = ?, content_modified_datetime = last_modified_datetime "
+                "WHERE user_id = ? AND id = ?",
+                (content, user_id, page_id),
+            )
+
+    def list_pages(
+        self, user_id: str, section_id: str, limit: Optional[int] = None, offset: int = 0
+    ) -> list[dict[str, Any]]:
+        """Return the page metadata of a section."""
+        return self._query(
+            f"SELECT {PAGE_COLUMNS} FROM pages WHERE user_id = ? AND section_id = ? "
+            "ORDER BY last_modified_datetime DESC LIMIT ? OFFSET ?",
+            (user_id, section_id, _sql_limit(limit), offset),
+        )
+
+    def get_page_content(self, user_id: str, page_id: str) -> Optional[str]:
+        """Return the up-to-date content of a page, or None if it is not mirrored."""
+        rows = self._query(
+            "SELECT content FROM pages WHERE user_id = ? AND id = ? "
+            "AND content_modified_datetime = last_modified_datetime",
+            (user_id, page_id),
+        )
+        return rows[0]["content"] if rows else None
+
+    def page_ids(self, user_id: str) -> set[str]:
+        """Return the IDs of all mirrored pages of a user."""
+        return {row["id"] for row in self._query("SELECT id FROM pages WHERE user_id = ?", (user_id,))}
+
+    def page_versions(self, user_id: str) -> dict[str, Optional[str]]:
+        """Return the lastModifiedDateTime of every page whose content is up to date."""
+        rows = self._query(
+            "SELECT id, last_modified_datetime FROM pages WHERE user_id = ? "
+            "AND content_modified_datetime = last_modified_datetime",
+            (user_id,),
+        )
+        return {row["id"]: row["last_modified_datetime"] for row in rows}
+
+    def get_pages_with_content(self, user_id: str, page_ids: list[str]) -> list[dict[str, Any]]:
+        """Return page metadata and content of the given pages."""
+        rows = []
+        for start in range(0, len(page_ids), 500):
+            chunk = page_ids[start : start + 500]
+            rows.extend(
+                self._query(
+                    f"SELECT {PAGE_COLUMNS}, content FROM pages WHERE user_id = ? "
+                    f"AND id IN ({', '.join('?' * len(chunk))})",
+                    (user_id, *chunk),
+                )
+            )
+        return rows
+
+    def page_counts(self, user_id: str) -> dict[str, int]:
+        """Return total and content-pending page counts for a user."""
+        rows = self._query(
+            "SELECT COUNT(*) AS total, "
+            "SUM(CASE WHEN content_modified_datetime IS NULL "
+            "OR content_modified_datetime != last_modified_datetime THEN 1 ELSE 0 END) AS pending "
+            "FROM pages WHERE user_id = ?",
+            (user_id,),
+        )
+        return {"pages": rows[0]["total"] or 0, "pages_pending": rows[0]["pending"] or 0}
+
+    # Sync state
+
+    def set_sync_state(self, user_id: str, **fields: Any) -> None:
+        """
+        Update sync bookkeeping for a user.
+
+        Args:
+            user_id: Owner of the mirror partition
+            **fields: Columns of the sync_state table to set
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sync_state (user_id, status) VALUES (?, 'idle') "
+                "ON CONFLICT (user_id) DO NOTHING",
+                (user_id,),
+            )
+            for column, value in fields.items():
+                if column not in {
+                    "status",
+                    "pass_started_at",
+                    "last_completed_at",
+                    "last_completed_started_at",
+                    "last_error",
+                }:
+                    raise ValueError(f"Unknown sync state column: {column}")
+                self._conn.execute(
+                    f"UPDATE sync_state SET {column} = ? WHERE user_id = ?", (value, user_id)
+                )
+
+    def get_sync_state(self, user_id: str) -> Optional[dict[str, Any]]:
+        """Return sync bookkeeping for a user, or None if never synced."""
+        rows = self._query("SELECT * FROM sync_state WHERE user_id = ?", (user_id,))
+        return rows[0] if rows else None
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,167 @@
+"""Field projection and continuation cursors for the listing tools."""
+
+import base64
+import binascii
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+
+@dataclass(frozen=True)
+class Projection:
+    """Fields selected by a caller, as (output name, Graph property) pairs."""
+
+    fields: tuple[tuple[str, str], ...]
+    graph_properties: frozenset[str]
+
+    @property
+    def select(self) -> list[str]:
+        """Graph properties to push down as $select."""
+        return [source for _, source in self.fields if source in self.graph_properties]
+
+    @property
+    def key(self) -> str:
+        """Stable identifier of the projection (for cache keys)."""
+        return ",".join(name for name, _ in self.fields)
+
+    def apply(self, items: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Build the output dictionaries of Graph-shaped items.
+
+        One dictionary per item with only the selected fields; no model is
+        validated, so large lists cost one small allocation per item.
+
+        Args:
+            items: Graph-shaped items (from Graph, the mirror or the index)
+
+        Returns:
+            Projected items
+        """
+        fields = self.fields
+        return [{name: item.get(source) for name, source in fields} for item in items]
+
+
+class FieldSet:
+    """The fields a listing tool can return and their Graph properties."""
+
+    def __init__(
+        self,
+        fields: dict[str, str],
+        required: tuple[str, ...] = ("id",),
+        computed: tuple[str, ...] = (),
+    ):
+        """
+        Args:
+            fields: Output field names mapped to Graph properties, in output order
+            required: Fields always returned
+            computed: Graph-shaped keys that are not Graph properties (never pushed down)
+        """
+        self.fields = fields
+        self.required = required
+        graph_properties = frozenset(fields.values()) - frozenset(computed)
+        self.default = Projection(tuple(fields.items()), graph_properties)
+        self._graph_properties = graph_properties
+
+    @property
+    def names(self) -> list[str]:
+        """Selectable field names."""
+        return list(self.fields)
+
+    def project(self, names: Optional[list[str]]) -> Projection:
+        """
+        Resolve the fields requested by a caller.
+
+        Args:
+            names: Requested field names (all fields if omitted)
+
+        Returns:
+            Projection in output order, including the required fields
+
+        Raises:
+            ValueError: If a name is not a field of this listing
+        """
+        if not names:
+            return self.default
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(
+                f"Unknown fields {unknown}; choose from {', '.join(self.fields)}"
+            )
+        wanted = set(names) | set(self.required)
+        return Projection(
+            tuple((name, source) for name, source in self.fields.items() if name in wanted),
+            self._graph_properties,
+        )
+
+
+def _scope_digest(scope: str) -> str:
+    return hashlib.sha256(scope.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(scope: str, offset: int) -> str:
+    """
+    Build an opaque continuation cursor.
+
+    Args:
+        scope: Listing the cursor belongs to (tool and its scoping arguments)
+        offset: Number of items already returned
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps({"s": _scope_digest(scope), "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str], scope: str) -> int:
+    """
+    Read the offset of a continuation cursor.
+
+    Args:
+        cursor: Cursor from a previous response (None for the first page)
+        scope: Listing the cursor must belong to
+
+    Returns:
+        Number of items to skip
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another listing
+    """
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = payload["o"]
+        digest = payload["s"]
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+    if digest != _scope_digest(scope) or not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor for this listing")
+    return offset
+
+
+def paginate(
+    items: list[dict[str, Any]], scope: str, offset: int, max_items: Optional[int]
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """
+    Cut a page from items fetched with one extra item, and build the next cursor.
+
+    Args:
+        items: Items starting at offset, up to max_items + 1 of them
+        scope: Listing the cursor belongs to
+        offset: Offset of the first item
+        max_items: Page size (everything remaining if None)
+
+    Returns:
+        Tuple of (page items, cursor of the next page or None at the end)
+    """
+    if max_items is None or len(items) <= max_items:
+        return items, None
+    return items[:max_items], encode_cursor(scope, offset + max_items)
+
+
+def fetch_limit(max_items: Optional[int]) -> Optional[int]:
+    """Number of items to fetch for a page: one more than returned, to detect a next page."""
+    return None if max_items is None else max_items + 1
@@ -0,0 +1,266 @@
+"""Per-user response cache for OneNote listings."""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Loader returns the listing; probe returns a cheap version marker for revalidation
+Loader = Callable[[], Awaitable[Any]]
+VersionProbe = Callable[[], Awaitable[Optional[str]]]
+
+
+@dataclass
+class CacheEntry:
+    """A cached listing and the version marker it was fetched at."""
+
+    value: Any
+    version: Optional[str]
+    stored_at: float
+    validated_at: float
+
+
+class SQLiteCacheStore:
+    """On-disk tier so that cached listings survive restarts."""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite database file path
+        """
+        self._lock = threading.Lock()
+        # Worker processes share the file: WAL lets readers proceed during a write
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, version TEXT, "
+            "stored_at REAL NOT NULL, validated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, key: str) -> Optional[CacheEntry]:
+        """Read an entry, or None if it is not stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, version, stored_at, validated_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(
+            value=json.loads(row[0]), version=row[1], stored_at=row[2], validated_at=row[3]
+        )
+
+    def save(self, key: str, entry: CacheEntry) -> None:
+        """Insert or replace an entry."""
+        value = json.dumps(entry.value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, value, entry.version, entry.stored_at, entry.validated_at),
+            )
+            self._conn.commit()
+
+    def delete_prefix(self, prefix: str) -> None:
+        """Delete all entries whose key starts with the prefix."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM responses WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Bounded in-memory LRU of listings with TTL and version revalidation.
+
+    Entries are partitioned by user. Once the TTL has passed, an entry is
+    revalidated with a cheap version probe (the parent resource's
+    lastModifiedDateTime) and only re-fetched when the version changed or the
+    entry exceeded its maximum age.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl: float = 60.0,
+        max_age: float = 3600.0,
+        store: Optional[SQLiteCacheStore] = None,
+        store_path: Optional[str] = None,
+    ):
+        """
+        Initialize response cache.
+
+        Args:
+            max_entries: Maximum number of in-memory entries
+            ttl: Seconds an entry is served without revalidation
+            max_age: Seconds after which an entry is re-fetched regardless of version
+            store: Optional on-disk tier
+            store_path: Path of an on-disk tier opened by open() (in each worker process)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_age = max_age
+        self.store = store
+        self.store_path = store_path
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.revalidations = 0
+        self.stale_reloads = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(user_id: str, key: str) -> str:
+        """Build the partitioned cache key for a user."""
+        return f"{user_id}\x1f{key}"
+
+    async def get_or_load(
+        self,
+        user_id: str,
+        key: str,
+        loader: Loader,
+        probe: Optional[VersionProbe] = None,
+    ) -> Any:
+        """
+        Return a cached listing, revalidating or loading it as needed.
+
+        Args:
+            user_id: User the listing belongs to
+            key: Listing key within the user's partition
+            loader: Fetches the listing from Graph
+            probe: Fetches the current version marker of the listing
+
+        Returns:
+            Cached or freshly loaded listing
+        """
+        cache_key = self.make_key(user_id, key)
+        now = time.time()
+        entry = await self._lookup(cache_key)
+
+        if entry is not None and now - entry.stored_at < self.max_age:
+            if now - entry.validated_at < self.ttl:
+                self.hits += 1
+                return entry.value
+
+            if probe is not None and entry.version is not None:
+                if await probe() == entry.version:
+                    self.revalidations += 1
+                    entry.validated_at = now
+                    await self._save(cache_key, entry)
+                    return entry.value
+            self.stale_reloads += 1
+        else:
+            self.misses += 1
+
+        # Probe before loading: the listing is then at least as new as its version, so a
+        # change made during the load is caught by the next revalidation
+        version = await probe() if probe is not None else None
+        value = await loader()
+
+        await self._store(cache_key, CacheEntry(value, version, now, now))
+        return value
+
+    async def _lookup(self, cache_key: str) -> Optional[CacheEntry]:
+        """Find an entry in memory, falling back to the on-disk tier."""
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            self._entries.move_to_end(cache_key)
+            return entry
+        if self.store is None:
+            return None
+
+        entry = await asyncio.to_thread(self.store.load, cache_key)
+        if entry is not None:
+            self.disk_hits += 1
+            self._remember(cache_key, entry)
+        return entry
+
+    async def _store(self, cache_key: str, entry: CacheEntry) -> None:
+        """Insert an entry in memory and on disk."""
+        self._remember(cache_key, entry)
+        await self._save(cache_key, entry)
+
+    async def _save(self, cache_key: str, entry: CacheEntry) -> None:
+        """Persist an entry to the on-disk tier, if configured."""
+        if self.store is not None:
+            await asyncio.to_thread(self.store.save, cache_key, entry)
+
+    def _remember(self, cache_key: str, entry: CacheEntry) -> None:
+        """Insert an entry in memory, evicting least recently used entries."""
+        self._entries[cache_key] = entry
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def invalidate(self, user_id: str, key_prefix: str = "") -> None:
+        """
+        Drop cached listings of a user.
+
+        Args:
+            user_id: User whose entries are dropped
+            key_prefix: Only drop keys starting with this prefix (all if empty)
+        """
+        prefix = self.make_key(user_id, key_prefix)
+        for cache_key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[cache_key]
+        if self.store is not None:
+            await asyncio.to_thread(self.store.delete_prefix, prefix)
+        self.invalidations += 1
+
+    def open(self) -> None:
+        """Open the on-disk tier at store_path, if configured and not open yet."""
+        if self.store is None and self.store_path:
+            self.store = SQLiteCacheStore(self.store_path)
+
+    def close(self) -> None:
+        """Close the on-disk tier."""
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return cache counters.
+
+        Returns:
+            Dictionary of hit, miss, revalidation and eviction counters
+        """
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "revalidations": self.revalidations,
+            "stale_reloads": self.stale_reloads,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instance
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    ttl=settings.response_cache_ttl,
+    max_age=settings.response_cache_max_age,
+    store_path=settings.response_cache_path,
+)
@@ -0,0 +1,760 @@
+"""Local inverted full-text index over mirrored OneNote pages."""
+
+import hashlib
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import unicodedata
+import zlib
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Scripts without word separators are indexed as overlapping character bigrams
+_CJK = (
+    "\u3040-\u30ff"  # Hiragana, Katakana
+    "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"  # CJK ideographs
+    "\uac00-\ud7af"  # Hangul syllables
+)
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+# BM25 parameters; title terms count TITLE_BOOST times
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 3
+
+# Segment file layout: header, docs (JSON), term table, term strings, postings, stored texts
+SEGMENT_MAGIC = b"ONIX"
+SEGMENT_VERSION = 1
+HEADER = struct.Struct("<4sHHIIQQQQQQ")
+# String offset, string length, postings offset, doc freq. Postings are uint32 doc
+# numbers, uint16 term frequencies and float32 BM25 impacts (without idf), computed
+# with the segment's average document length when the segment is written
+TERM_ENTRY = struct.Struct("<QIQI")
+MAX_FREQUENCY = 0xFFFF
+
+
+def normalize(text: str) -> str:
+    """Fold width and compatibility variants (NFKC) so that e.g. half-width katakana match."""
+    return unicodedata.normalize("NFKC", text)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into index terms.
+
+    Words of space-separated scripts become lowercased terms; runs of CJK
+    characters become overlapping bigrams (a single character stays a unigram).
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        Terms in order of appearance
+    """
+    terms = []
+    for match in _TOKEN_RE.finditer(normalize(text).lower()):
+        token = match.group()
+        if _CJK_RE.match(token):
+            if len(token) == 1:
+                terms.append(token)
+            else:
+                terms.extend(token[i : i + 2] for i in range(len(token) - 1))
+        else:
+            terms.append(token)
+    return terms
+
+
+@dataclass
+class IndexedPage:
+    """Metadata of an indexed page."""
+
+    id: str
+    title: str
+    section_id: Optional[str] = None
+    notebook_id: Optional[str] = None
+    content_url: Optional[str] = None
+    last_modified: Optional[str] = None
+    length: int = 0
+
+
+@dataclass
+class _PendingPage:
+    """A page indexed since the last segment was written."""
+
+    page: IndexedPage
+    text: str
+    frequencies: dict[str, int] = field(default_factory=dict)
+
+
+def _to_bytes(values: array) -> bytes:
+    """Serialize an array in little-endian order."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    """Deserialize a little-endian array."""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class _Segment:
+    """Immutable on-disk index segment accessed through mmap.
+
+    Only the document table is decoded into memory; terms are looked up by
+    binary search over the fixed-width term table, and postings and
+    (compressed) stored texts are read from the mapping on demand.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        (
+            magic,
+            version,
+            _,
+            self.doc_count,
+            self.term_count,
+            docs_offset,
+            docs_length,
+            self._terms_offset,
+            self._strings_offset,
+            self._postings_offset,
+            self._texts_offset,
+        ) = HEADER.unpack_from(self._mm, 0)
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported index segment: {path}")
+
+        docs = json.loads(self._mm[docs_offset : docs_offset + docs_length])
+        self.pages = [IndexedPage(*doc[:7]) for doc in docs]
+        self.lengths = [page.length for page in self.pages]
+        self._text_spans = [(doc[7], doc[8]) for doc in docs]
+        self.numbers = {page.id: number for number, page in enumerate(self.pages)}
+        self._bigrams: Optional[dict[str, list[str]]] = None
+        self.by_notebook: dict[Optional[str], set[int]] = {}
+        self.by_section: dict[Optional[str], set[int]] = {}
+        for number, page in enumerate(self.pages):
+            self.by_notebook.setdefault(page.notebook_id, set()).add(number)
+            self.by_section.setdefault(page.section_id, set()).add(number)
+
+    def _term_at(self, index: int) -> tuple[bytes, int, int]:
+        offset, length, postings, freq = TERM_ENTRY.unpack_from(
+            self._mm, self._terms_offset + index * TERM_ENTRY.size
+        )
+        start = self._strings_offset + offset
+        return self._mm[start : start + length], postings, freq
+
+    def _find(self, term: str) -> Optional[tuple[int, int]]:
+        """Binary search the term table; return (postings offset, doc freq)."""
+        key = term.encode("utf-8")
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            candidate, offset, freq = self._term_at(middle)
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return offset, freq
+        return None
+
+    def impacts(self, term: str) -> tuple[array, array]:
+        """Return the doc numbers and BM25 impacts of a term."""
+        found = self._find(term)
+        if found is None:
+            return array("I"), array("f")
+        offset, freq = found
+        start = self._postings_offset + offset
+        impacts = start + freq * 6
+        return (
+            _from_bytes("I", self._mm[start : start + freq * 4]),
+            _from_bytes("f", self._mm[impacts : impacts + freq * 4]),
+        )
+
+    def bigrams_with(self, char: str) -> list[str]:
+        """Return the CJK bigram terms that start or end with a character.
+
+        The character-to-bigrams map is built from the term table on the first
+        call and kept, since the segment never changes.
+        """
+        if self._bigrams is None:
+            bigrams: dict[str, list[str]] = {}
+            for index in range(self.term_count):
+                key = self._term_at(index)[0].decode("utf-8")
+                if len(key) == 2 and _CJK_RE.match(key):
+                    bigrams.setdefault(key[0], []).append(key)
+                    if key[1] != key[0]:
+                        bigrams.setdefault(key[1], []).append(key)
+            self._bigrams = bigrams
+        return self._bigrams.get(char, [])
+
+    def terms(self) -> Iterable[tuple[str, array, array]]:
+        """Iterate over all terms with their doc numbers and term frequencies."""
+        for index in range(self.term_count):
+            key, offset, freq = self._term_at(index)
+            start = self._postings_offset + offset
+            middle = start + freq * 4
+            yield (
+                key.decode("utf-8"),
+                _from_bytes("I", self._mm[start:middle]),
+                _from_bytes("H", self._mm[middle : middle + freq * 2]),
+            )
+
+    def text(self, number: int) -> str:
+        """Return the stored text of a document."""
+        offset, length = self._text_spans[number]
+        start = self._texts_offset + offset
+        return zlib.decompress(self._mm[start : start + length]).decode("utf-8")
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+
+def write_segment(
+    path: str,
+    pages: list[IndexedPage],
+    texts: list[bytes],
+    postings: dict[str, tuple[array, array]],
+) -> None:
+    """
+    Write an index segment atomically.
+
+    Args:
+        path: Destination file path
+        pages: Documents, numbered by position
+        texts: zlib-compressed stored text of each document
+        postings: Term to ascending doc numbers and their term frequencies
+    """
+    average_length = sum(page.length for page in pages) / len(pages) if pages else 1.0
+    norms = [
+        BM25_K1 * (1 - BM25_B + BM25_B * page.length / (average_length or 1.0)) for page in pages
+    ]
+    docs = []
+    text_offset = 0
+    for page, blob in zip(pages, texts):
+        docs.append(
+            [
+                page.id,
+                page.title,
+                page.section_id,
+                page.notebook_id,
+                page.content_url,
+                page.last_modified,
+                page.length,
+                text_offset,
+                len(blob),
+            ]
+        )
+        text_offset += len(blob)
+    docs_blob = json.dumps(docs, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    terms = sorted(postings, key=lambda term: term.encode("utf-8"))
+    term_table = bytearray()
+    strings = bytearray()
+    postings_blob = bytearray()
+    for term in terms:
+        key = term.encode("utf-8")
+        numbers, frequencies = postings[term]
+        term_table += TERM_ENTRY.pack(len(strings), len(key), len(postings_blob), len(numbers))
+        strings += key
+        postings_blob += _to_bytes(numbers)
+        postings_blob += _to_bytes(frequencies)
+        postings_blob += _to_bytes(
+            array(
+                "f",
+                [f * (BM25_K1 + 1) / (f + norms[n]) for n, f in zip(numbers, frequencies)],
+            )
+        )
+
+    docs_offset = HEADER.size
+    terms_offset = docs_offset + len(docs_blob)
+    strings_offset = terms_offset + len(term_table)
+    postings_offset = strings_offset + len(strings)
+    texts_offset = postings_offset + len(postings_blob)
+
+    # Unique per process so that concurrent writers never share a temp file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                SEGMENT_MAGIC,
+                SEGMENT_VERSION,
+                0,
+                len(pages),
+                len(terms),
+                docs_offset,
+                len(docs_blob),
+                terms_offset,
+                strings_offset,
+                postings_offset,
+                texts_offset,
+            )
+        )
+        f.write(docs_blob)
+        f.write(term_table)
+        f.write(strings)
+        f.write(postings_blob)
+        for blob in texts:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def make_snippet(text: str, terms: Iterable[str], length: int = 160) -> str:
+    """
+    Cut the window of text that covers the most distinct query terms.
+
+    Args:
+        text: Stored page text
+        terms: Query terms as produced by tokenize
+        length: Snippet length in characters
+
+    Returns:
+        Snippet with ellipses where the text was cut
+    """
+    flat = " ".join(text.split())
+    lowered = flat.lower()
+    occurrences: list[tuple[int, str]] = []
+    for term in set(terms):
+        start = lowered.find(term)
+        while start != -1 and len(occurrences) < 1000:
+            occurrences.append((start, term))
+            start = lowered.find(term, start + 1)
+    occurrences.sort()
+
+    # Slide a window over the occurrences, tracking distinct terms inside it
+    best_start, best_count = 0, 0
+    window: Counter = Counter()
+    end = 0
+    for position, term in occurrences:
+        while end < len(occurrences) and occurrences[end][0] < position + length:
+            window[occurrences[end][1]] += 1
+            end += 1
+        if len(window) > best_count:
+            best_start, best_count = position, len(window)
+        window[term] -= 1
+        if not window[term]:
+            del window[term]
+
+    # Show some context before the first matching term
+    start = max(0, min(best_start - length // 4, len(flat) - length))
+    snippet = flat[start : start + length]
+    if start > 0:
+        snippet = "…" + snippet
+    if start + length < len(flat):
+        snippet += "…"
+    return snippet
+
+
+class SearchIndex:
+    """BM25-ranked inverted index of one user's pages.
+
+    Pages written so far live in an immutable mmap segment; pages indexed
+    since then are kept in an in-memory delta and superseded or removed
+    segment pages are masked, so updates are incremental. ``flush`` merges the
+    delta into a new segment without blocking searches.
+    """
+
+    def __init__(self, path: str, snippet_length: int = 160):
+        """
+        Open (or create) the index of a user.
+
+        Args:
+            path: Segment file path
+            snippet_length: Length of generated snippets in characters
+        """
+        self.path = path
+        self.snippet_length = snippet_length
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._segment: Optional[_Segment] = None
+        self._segment_length = 0
+        self._masked: set[int] = set()
+        self._pending: dict[str, _PendingPage] = {}
+        self._pending_postings: dict[str, dict[str, int]] = {}
+        self._pending_length = 0
+        if os.path.exists(path):
+            try:
+                self._segment = _Segment(path)
+                self._segment_length = sum(self._segment.lengths)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Discarding unreadable search index {path}: {e}")
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are changes not yet written to the segment."""
+        return bool(self._pending or self._masked)
+
+    @property
+    def pending_count(self) -> int:
+        """Number of pages indexed since the last flush."""
+        return len(self._pending)
+
+    def __len__(self) -> int:
+        return self._live_count()
+
+    def _live_count(self) -> int:
+        segment_count = self._segment.doc_count if self._segment is not None else 0
+        return segment_count - len(self._masked) + len(self._pending)
+
+    def versions(self) -> dict[str, Optional[str]]:
+        """Return the lastModifiedDateTime each indexed page was indexed at."""
+        with self._lock:
+            versions = {}
+            if self._segment is not None:
+                versions.update(
+                    (page.id, page.last_modified)
+                    for number, page in enumerate(self._segment.pages)
+                    if number not in self._masked
+                )
+            versions.update(
+                (page_id, pending.page.last_modified) for page_id, pending in self._pending.items()
+            )
+            return versions
+
+    def add(self, page: IndexedPage, text: str) -> None:
+        """
+        Index (or re-index) a page.
+
+        Args:
+            page: Page metadata; ``length`` is computed here
+            text: Extracted page text
+        """
+        text = normalize(text)
+        frequencies = Counter(tokenize(text))
+        for term in tokenize(page.title):
+            frequencies[term] += TITLE_BOOST
+        page.length = sum(frequencies.values())
+
+        with self._lock:
+            self._drop_pending(page.id)
+            self._mask(page.id)
+            self._pending[page.id] = _PendingPage(page, text, dict(frequencies))
+            self._pending_length += page.length
+            for term, frequency in frequencies.items():
+                self._pending_postings.setdefault(term, {})[page.id] = frequency
+
+    def remove(self, page_id: str) -> None:
+        """
+        Remove a page from the index.
+
+        Args:
+            page_id: Page to remove
+        """
+        with self._lock:
+            self._drop_pending(page_id)
+            self._mask(page_id)
+
+    def retain(self, page_ids: set[str]) -> None:
+        """
+        Remove every page that is not in the given set.
+
+        Args:
+            page_ids: Pages that still exist
+        """
+        with self._lock:
+            for page_id in [page_id for page_id in self._pending if page_id not in page_ids]:
+                self._drop_pending(page_id)
+            if self._segment is not None:
+                for page_id in self._segment.numbers.keys() - page_ids:
+                    self._mask(page_id)
+
+    def _mask(self, page_id: str) -> None:
+        """Hide the segment copy of a page (caller holds the lock)."""
+        if self._segment is None:
+            return
+        number = self._segment.numbers.get(page_id)
+        if number is not None and number not in self._masked:
+            self._masked.add(number)
+            self._segment_length -= self._segment.lengths[number]
+
+    def _drop_pending(self, page_id: str) -> None:
+        """Remove a page from the in-memory delta (caller holds the lock)."""
+        pending = self._pending.pop(page_id, None)
+        if pending is None:
+            return
+        self._pending_length -= pending.page.length
+        for term in pending.frequencies:
+            documents = self._pending_postings.get(term)
+            if documents is not None:
+                documents.pop(page_id, None)
+                if not documents:
+                    del self._pending_postings[term]
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        notebook_id: Optional[str] = None,
+        section_id: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Rank pages against a query with BM25.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results (all matches if omitted)
+            notebook_id: Only return pages of this notebook
+            section_id: Only return pages of this section
+
+        Returns:
+            Graph-shaped page dictionaries with ``preview`` snippet and ``score``
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            segment = self._segment
+            live = self._live_count()
+            if live == 0:
+                return []
+            lookup = self._expand(terms)
+            average_length = (self._segment_length + self._pending_length) / live or 1.0
+
+            # Segment postings carry precomputed impacts; pending pages are scored here
+            segment_scores = [0.0] * segment.doc_count if segment is not None else []
+            matched: list[array] = []
+            pending_scores: dict[str, float] = {}
+            for term in lookup:
+                numbers, impacts = (
+                    segment.impacts(term) if segment is not None else (array("I"), array("f"))
+                )
+                pending_postings = self._pending_postings.get(term, {})
+                # Masked segment copies still count, so clamp to keep idf positive
+                doc_freq = min(live, len(numbers) + len(pending_postings))
+                if doc_freq == 0:
+                    continue
+                idf = math.log(1 + (live - doc_freq + 0.5) / (doc_freq + 0.5))
+
+                for number, impact in zip(numbers, impacts):
+                    segment_scores[number] += impact * idf
+                matched.append(numbers)
+                for page_id, frequency in pending_postings.items():
+                    page = self._pending[page_id].page
+                    if (notebook_id is not None and page.notebook_id != notebook_id) or (
+                        section_id is not None and page.section_id != section_id
+                    ):
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * page.length / average_length)
+                    pending_scores[page_id] = pending_scores.get(page_id, 0.0) + (
+                        idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                    )
+
+            for number in self._masked:
+                segment_scores[number] = 0.0
+            if sum(len(numbers) for numbers in matched) < len(segment_scores):
+                candidates: Iterable[int] = set().union(*matched)
+            else:
+                candidates = range(len(segment_scores))
+            if segment is not None and (notebook_id is not None or section_id is not None):
+                scopes = []
+                if section_id is not None:
+                    scopes.append(segment.by_section.get(section_id, set()))
+                if notebook_id is not None:
+                    scopes.append(segment.by_notebook.get(notebook_id, set()))
+                allowed = set.intersection(*scopes)
+                candidates = allowed if isinstance(candidates, range) else allowed & candidates
+
+            count = len(segment_scores) + len(pending_scores) if limit is None else limit
+            ranked = [
+                (segment_scores[number], number)
+                for number in heapq.nlargest(count, candidates, key=segment_scores.__getitem__)
+                if segment_scores[number] > 0
+            ]
+            ranked.extend((score, page_id) for page_id, score in pending_scores.items())
+            results = []
+            for score, key in heapq.nlargest(count, ranked, key=lambda x: x[0]):
+                if isinstance(key, int):
+                    page = segment.pages[key]
+                    text = segment.text(key)
+                else:
+                    page = self._pending[key].page
+                    text = self._pending[key].text
+                results.append(
+                    {
+                        "id": page.id,
+                        "title": page.title,
+                        "contentUrl": page.content_url,
+                        "lastModifiedDateTime": page.last_modified,
+                        "preview": make_snippet(text, terms, self.snippet_length),
+                        "score": round(score, 4),
+                    }
+                )
+            return results
+
+    def _expand(self, terms: list[str]) -> list[str]:
+        """
+        Add the bigrams a single-character CJK query term occurs in (caller holds the lock).
+
+        CJK text is indexed as bigrams, so a one-character query such as 税
+        matches pages through every bigram starting or ending with it (税金,
+        納税); the character itself only matches single-character runs.
+        """
+        expanded = []
+        for term in terms:
+            expanded.append(term)
+            if len(term) == 1 and _CJK_RE.match(term):
+                if self._segment is not None:
+                    expanded.extend(self._segment.bigrams_with(term))
+                expanded.extend(
+                    key
+                    for key in self._pending_postings
+                    if len(key) == 2 and term in key and _CJK_RE.match(key)
+                )
+        return list(dict.fromkeys(expanded))
+
+    def flush(self) -> None:
+        """Merge pending changes into a new segment and swap it in.
+
+        The segment is built from a snapshot, so searches and updates continue
+        while it is written; changes made meanwhile stay pending.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self.dirty:
+                    return
+                segment = self._segment
+                snapshot = dict(self._pending)
+                masked = set(self._masked)
+
+            pages: list[IndexedPage] = []
+            texts: list[bytes] = []
+            postings: dict[str, tuple[array, array]] = {}
+            if segment is not None:
+                # Segment texts are copied compressed; postings are renumbered
+                renumber = array("i", [-1]) * segment.doc_count
+                for number, page in enumerate(segment.pages):
+                    if number not in masked:
+                        renumber[number] = len(pages)
+                        pages.append(page)
+                        offset, length = segment._text_spans[number]
+                        start = segment._texts_offset + offset
+                        texts.append(segment._mm[start : start + length])
+                for term, numbers, frequencies in segment.terms():
+                    if masked:
+                        kept = [(renumber[n], f) for n, f in zip(numbers, frequencies) if renumber[n] >= 0]
+                        if not kept:
+                            continue
+                        numbers = array("I", [n for n, _ in kept])
+                        frequencies = array("H", [f for _, f in kept])
+                    postings[term] = (numbers, frequencies)
+            for item in snapshot.values():
+                number = len(pages)
+                pages.append(item.page)
+                texts.append(zlib.compress(item.text.encode("utf-8")))
+                for term, frequency in item.frequencies.items():
+                    numbers, frequencies = postings.setdefault(term, (array("I"), array("H")))
+                    numbers.append(number)
+                    frequencies.append(min(frequency, MAX_FREQUENCY))
+
+            write_segment(self.path, pages, texts, postings)
+            replacement = _Segment(self.path)
+
+            with self._lock:
+                # Pages changed or removed after the snapshot stay masked in the new segment
+                current_masked = self._masked
+                self._segment = replacement
+                self._segment_length = 0
+                self._masked = set()
+                for number, page in enumerate(replacement.pages):
+                    item = snapshot.get(page.id)
+                    if item is not None:
+                        current = self._pending.get(page.id) is item
+                        if current:
+                            self._drop_pending(page.id)
+                    else:
+                        current = segment.numbers[page.id] not in current_masked
+                    if current:
+                        self._segment_length += page.length
+                    else:
+                        self._masked.add(number)
+            if segment is not None:
+                segment.close()
+        logger.info(f"Wrote search index segment with {len(pages)} pages to {self.path}")
+
+    def close(self) -> None:
+        """Close the segment mapping (pending changes are discarded)."""
+        with self._flush_lock, self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+
+class SearchIndexManager:
+    """Opens one SearchIndex per user under a common directory."""
+
+    def __init__(self, directory: str, snippet_length: int = 160):
+        """
+        Initialize index manager.
+
+        Args:
+            directory: Directory holding per-user segment files
+            snippet_length: Length of generated snippets in characters
+        """
+        self.directory = directory
+        self.snippet_length = snippet_length
+        self._indexes: dict[str, SearchIndex] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> SearchIndex:
+        """
+        Return the index of a user, opening it on first use.
+
+        Args:
+            user_id: Owner of the index
+
+        Returns:
+            SearchIndex instance
+        """
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                os.makedirs(self.directory, exist_ok=True)
+                name = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+                index = SearchIndex(
+                    os.path.join(self.directory, f"{name}.idx"), self.snippet_length
+                )
+                self._indexes[user_id] = index
+            return index
+
+    def close(self) -> None:
+        """Close all open indexes."""
+        with self._lock:
+            for index in self._indexes.values():
+                index.close()
+            self._indexes.clear()
+
+
+# Singleton instance
+search_index = SearchIndexManager(
+    directory=settings.search_index_dir,
+    snippet_length=settings.search_snippet_length,
+)
@@ -0,0 +1,192 @@
+"""
+Production entry point: pre-forked uvicorn workers on one shared socket.
+
+The supervisor binds the listening socket, imports the server (and its
+dependencies) once and forks the workers, so each worker starts from a warm
+interpreter and shares the imported modules copy-on-write. Each worker runs
+the server lifespan, which opens its own HTTP pool and cache store and warms up
+the MSAL client and the Graph connection before it accepts connections.
+Crashed workers are replaced; SIGTERM/SIGINT stop all workers gracefully.
+
+State that is not shared between workers:
+
+- Background sync writes the mirror and the search index, so it only runs in
+  worker 0; the other workers serve every read from Graph.
+- Adaptive concurrency windows are per process; the configured tenant and
+  user limits are divided between the workers to keep the aggregate.
+- /metrics reports the worker that answers the scrape.
+- MCP sessions are not shared, so workers serve the stateless HTTP transport.
+
+Usage:
+    python -m src.serve
+"""
+
+import logging
+import math
+import os
+import signal
+import socket
+import time
+from typing import Optional
+
+import uvicorn
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# A worker that exits sooner than this after its start is treated as failing to boot
+MIN_WORKER_UPTIME = 5.0
+
+# Per-process concurrency limits divided between the workers
+SHARED_LIMITS = (
+    "graph_tenant_concurrency_initial",
+    "graph_tenant_concurrency_max",
+    "graph_user_concurrency_initial",
+    "graph_user_concurrency_max",
+)
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """
+    Create the listening socket shared by all workers.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind
+        backlog: Listen queue length (connections wait here during worker warm-up)
+
+    Returns:
+        Bound, listening socket
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def configure_worker(slot: int, workers: int) -> None:
+    """
+    Adjust the settings of one worker before its lifespan starts.
+
+    Args:
+        slot: Worker index (kept when a worker is replaced)
+        workers: Number of worker processes
+    """
+    if workers == 1:
+        return
+    if settings.sync_enabled and slot != 0:
+        settings.sync_enabled = False
+    for name in SHARED_LIMITS:
+        setattr(settings, name, max(1, math.ceil(getattr(settings, name) / workers)))
+
+
+def run_worker(sock: socket.socket, stateless: bool) -> None:
+    """
+    Serve the MCP app on the shared socket until SIGTERM/SIGINT.
+
+    Args:
+        sock: Listening socket bound by the supervisor
+        stateless: Serve the stateless HTTP transport (required with several workers)
+    """
+    from .server import mcp
+
+    config = uvicorn.Config(
+        mcp.http_app(stateless_http=stateless),
+        host=settings.host,
+        port=settings.port,
+        lifespan="on",
+        access_log=False,
+        timeout_graceful_shutdown=settings.worker_shutdown_timeout,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """Forks the workers, replaces those that exit and stops them on shutdown."""
+
+    def __init__(self, sock: socket.socket, workers: int):
+        """
+        Args:
+            sock: Listening socket inherited by the workers
+            workers: Number of worker processes
+        """
+        self.sock = sock
+        self.workers = workers
+        self._children: dict[int, tuple[int, float]] = {}
+        self._stopping = False
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            # Worker: uvicorn installs its own shutdown handlers
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                configure_worker(slot, self.workers)
+                run_worker(self.sock, stateless=True)
+            except BaseException:
+                logger.exception(f"Worker {slot} failed")
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[pid] = (slot, time.monotonic())
+        logger.info(f"Started worker {slot} (pid {pid})")
+
+    def _stop(self, signum: int, frame: Optional[object]) -> None:
+        self._stopping = True
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        """Run until all workers have exited after a shutdown signal."""
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            child = self._children.pop(pid, None)
+            if child is None or self._stopping:
+                continue
+            slot, started = child
+            code = os.waitstatus_to_exitcode(status)
+            logger.warning(f"Worker {slot} (pid {pid}) exited with {code}; starting a replacement")
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                # Avoid a fork loop when workers cannot boot (e.g., bad configuration)
+                time.sleep(MIN_WORKER_UPTIME)
+            if not self._stopping:
+                self._spawn(slot)
+        self.sock.close()
+
+
+def main() -> None:
+    """Bind the socket, preload the server and serve with the configured workers."""
+    workers = settings.workers or os.cpu_count() or 1
+    sock = bind_socket(settings.host, settings.port, settings.listen_backlog)
+
+    # Preload: import fastmcp, the tools and the singletons once, before forking
+    from . import server  # noqa: F401
+
+    logger.info(
+        f"Starting OneNote MCP Server on {settings.host}:{settings.port} with {workers} workers"
+    )
+    if workers == 1:
+        run_worker(sock, stateless=False)
+        return
+    Supervisor(sock, workers).run()
+
+
+if __name__ == "__main__":
+    main()
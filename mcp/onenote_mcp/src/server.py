@@ -1,15 +1,32 @@
 """OneNote MCP Server with FastMCP, OBO flow and W3C trace-context support."""
 
+import asyncio
 import logging
-from typing import Annotated, Optional
+from contextlib import aclosing, asynccontextmanager
+from typing import Annotated, Any, AsyncIterator, Iterator, Literal, Optional, TypedDict
 
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 from pydantic import BaseModel, Field
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
-from .auth import auth_service
+from .auth import auth_service, get_user_identity
+from .batch import BatchRequest
 from .config import settings
-from .graph_client import GraphClient
+from .graph_client import PAGE_SELECT, GraphClient
+from .html_text import ExtractedText, ImageMode, extract_text, read_text, stream_html_to_text
+from .http_pool import http_pool
+from .metrics import instrument_tool, registry
+from .notebook_tree import NotebookTreeWalker
+from .page_cache import page_cache
+from .projection import FieldSet, decode_cursor, fetch_limit, paginate
+from .response_cache import response_cache
+from .search_index import search_index
+from .singleflight import graph_flight
+from .sync_engine import sync_engine
+from .throttling import throttle_controller
 from .trace_context import TraceContext
+from .tracing import tracer
 
 # Configure logging
 logging.basicConfig(
@@ -18,26 +35,125 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """
+    Own process-wide resources for the lifetime of the server.
+
+    Args:
+        server: The FastMCP server instance
+    """
+    await http_pool.open()
+    await asyncio.to_thread(response_cache.open)
+    await asyncio.to_thread(page_cache.open)
+    if settings.warm_up:
+        # Finish the slow first-use work before the worker accepts connections
+        await asyncio.gather(asyncio.to_thread(auth_service.warm_up), http_pool.warm_up())
+    if settings.sync_enabled:
+        await sync_engine.start()
+    try:
+        yield
+    finally:
+        await sync_engine.stop()
+        await http_pool.close()
+        auth_service.close()
+        response_cache.close()
+        page_cache.close()
+        tracer.shutdown()
+
+
 # Initialize FastMCP server
-mcp = FastMCP("OneNote MCP Server")
+mcp = FastMCP("OneNote MCP Server", lifespan=lifespan)
+
+registry.register_collector(
+    "onenote_mcp_obo_cache", "OBO token cache counter", auth_service.token_cache.stats
+)
+registry.register_collector(
+    "onenote_mcp_response_cache", "Listing response cache counter", response_cache.stats
+)
+registry.register_collector(
+    "onenote_mcp_graph_throttle", "Graph retry and throttling counter", throttle_controller.stats
+)
+registry.register_collector("onenote_mcp_tracing_spans", "Span export counter", tracer.stats)
+registry.register_collector(
+    "onenote_mcp_graph_singleflight", "Coalesced Graph request counter", graph_flight.stats
+)
+registry.register_collector(
+    "onenote_mcp_page_cache", "Page content cache counter and size", page_cache.stats
+)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Expose per-tool and upstream metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
-class NotebookInfo(BaseModel):
-    """OneNote notebook information."""
+class NotebookItem(TypedDict, total=False):
+    """OneNote notebook information (only the requested fields are present)."""
 
     id: str
     display_name: str
-    created_datetime: Optional[str] = None
-    last_modified_datetime: Optional[str] = None
+    created_datetime: Optional[str]
+    last_modified_datetime: Optional[str]
 
 
-class SectionInfo(BaseModel):
-    """OneNote section information."""
+class SectionItem(TypedDict, total=False):
+    """OneNote section information (only the requested fields are present)."""
 
     id: str
     display_name: str
-    created_datetime: Optional[str] = None
-    last_modified_datetime: Optional[str] = None
+    created_datetime: Optional[str]
+    last_modified_datetime: Optional[str]
+
+
+class PageItem(TypedDict, total=False):
+    """OneNote page information (only the requested fields are present)."""
+
+    id: str
+    title: str
+    content_url: Optional[str]
+    created_datetime: Optional[str]
+    last_modified_datetime: Optional[str]
+
+
+class SearchItem(TypedDict, total=False):
+    """OneNote search result (only the requested fields are present)."""
+
+    page_id: str
+    title: str
+    preview: Optional[str]
+    content_url: Optional[str]
+    score: Optional[float]
+
+
+class NotebookList(BaseModel):
+    """A page of notebooks and the cursor of the next page."""
+
+    items: list[NotebookItem]
+    next_cursor: Optional[str] = None
+
+
+class SectionList(BaseModel):
+    """A page of sections and the cursor of the next page."""
+
+    items: list[SectionItem]
+    next_cursor: Optional[str] = None
+
+
+class PageList(BaseModel):
+    """A page of pages and the cursor of the next page."""
+
+    items: list[PageItem]
+    next_cursor: Optional[str] = None
+
+
+class SearchResults(BaseModel):
+    """A page of search results and the cursor of the next page."""
+
+    items: list[SearchItem]
+    next_cursor: Optional[str] = None
 
 
 class PageInfo(BaseModel):
@@ -50,13 +166,152 @@ class PageInfo(BaseModel):
     last_modified_datetime: Optional[str] = None
 
 
-class SearchResult(BaseModel):
-    """OneNote search result."""
+class SectionPages(BaseModel):
+    """Pages of a single section returned by a bulk listing."""
+
+    section_id: str
+    pages: list[PageInfo] = []
+    error: Optional[str] = None
+
+
+class PageContent(BaseModel):
+    """Content of a single page."""
 
     page_id: str
-    title: str
-    preview: Optional[str] = None
-    content_url: Optional[str] = None
+    content: Optional[str] = None
+    truncated: bool = False
+    error: Optional[str] = None
+
+
+class SectionNode(BaseModel):
+    """Section of a notebook tree with its pages."""
+
+    id: str
+    display_name: str
+    last_modified_datetime: Optional[str] = None
+    pages: list[PageInfo] = []
+    error: Optional[str] = None
+
+
+class SectionGroupNode(BaseModel):
+    """Section group of a notebook tree, linked to its parent by ID."""
+
+    id: str
+    display_name: str
+    parent_id: Optional[str] = None
+    last_modified_datetime: Optional[str] = None
+    sections: list[SectionNode] = []
+    error: Optional[str] = None
+
+
+class NotebookTree(BaseModel):
+    """Sections, section groups and pages of a notebook.
+
+    Section groups are listed flat, parents before their children; ``parent_id``
+    is None for groups directly under the notebook.
+    """
+
+    notebook_id: str
+    sections: list[SectionNode] = []
+    # Flat rather than nested: a recursive model makes the tool's output schema
+    # self-referencing, which fastmcp 2.x/3.0 cannot serialize in tools/list
+    section_groups: list[SectionGroupNode] = []
+    truncated: bool = False
+    error: Optional[str] = None
+
+
+# Output fields of the listing tools mapped to the Graph properties they come from
+NotebookField = Literal["id", "display_name", "created_datetime", "last_modified_datetime"]
+PageField = Literal["id", "title", "content_url", "created_datetime", "last_modified_datetime"]
+SearchField = Literal["page_id", "title", "preview", "content_url", "score"]
+
+NOTEBOOK_FIELDS = FieldSet(
+    {
+        "id": "id",
+        "display_name": "displayName",
+        "created_datetime": "createdDateTime",
+        "last_modified_datetime": "lastModifiedDateTime",
+    }
+)
+SECTION_FIELDS = NOTEBOOK_FIELDS
+PAGE_FIELDS = FieldSet(
+    {
+        "id": "id",
+        "title": "title",
+        "content_url": "contentUrl",
+        "created_datetime": "createdDateTime",
+        "last_modified_datetime": "lastModifiedDateTime",
+    }
+)
+SEARCH_FIELDS = FieldSet(
+    {
+        "page_id": "id",
+        "title": "title",
+        "preview": "preview",
+        "content_url": "contentUrl",
+        "score": "score",
+    },
+    required=("page_id",),
+    computed=("preview", "score"),
+)
+
+
+async def _collect(items: AsyncIterator[dict]) -> list[dict]:
+    """Drain an async iterator of Graph items into a list."""
+    return [item async for item in items]
+
+
+def _convert_html(html: str, format: str, images: ImageMode, max_chars: int) -> ExtractedText:
+    """Convert a page's HTML to the requested format, cut at max_chars (CPU-bound)."""
+    if format == "html":
+        return ExtractedText(html[:max_chars], truncated=len(html) > max_chars)
+    return extract_text(html, format == "markdown", images, max_chars)
+
+
+def _listing_params(orderby: str, offset: int) -> dict[str, Any]:
+    """Query options of a cursor page: a stable order and the items to skip."""
+    params: dict[str, Any] = {"$orderby": orderby}
+    if offset:
+        params["$skip"] = offset
+    return params
+
+
+def _to_page_info(item: dict) -> PageInfo:
+    """Build PageInfo from a Graph page resource."""
+    return PageInfo(
+        id=item["id"],
+        title=item["title"],
+        content_url=item.get("contentUrl"),
+        created_datetime=item.get("createdDateTime"),
+        last_modified_datetime=item.get("lastModifiedDateTime"),
+    )
+
+
+def _to_section_node(item: dict) -> SectionNode:
+    """Build SectionNode from a section visited by the tree walker."""
+    return SectionNode(
+        id=item["id"],
+        display_name=item["displayName"],
+        last_modified_datetime=item.get("lastModifiedDateTime"),
+        pages=[_to_page_info(page) for page in item.get("pages", [])],
+        error=item.get("error"),
+    )
+
+
+def _to_section_group_nodes(
+    groups: list[dict], parent_id: Optional[str] = None
+) -> Iterator[SectionGroupNode]:
+    """Flatten section groups visited by the tree walker, parents before their children."""
+    for item in groups:
+        yield SectionGroupNode(
+            id=item["id"],
+            display_name=item["displayName"],
+            parent_id=parent_id,
+            last_modified_datetime=item.get("lastModifiedDateTime"),
+            sections=[_to_section_node(section) for section in item.get("sections", [])],
+            error=item.get("error"),
+        )
+        yield from _to_section_group_nodes(item.get("sectionGroups", []), item["id"])
 
 
 async def get_graph_client(
@@ -87,24 +342,40 @@ async def get_graph_client(
         if tracestate:
             headers["tracestate"] = tracestate
         trace_context = TraceContext.from_headers(headers)
+    if trace_context is None:
+        trace_context = tracer.root_context()
 
     # Acquire OBO token
-    obo_token = await auth_service.get_obo_token(access_token)
+    with tracer.span("obo.acquire", trace_context):
+        obo_token = await auth_service.get_obo_token(access_token)
     if not obo_token:
         logger.error("Failed to acquire OBO token")
         raise ValueError("Authentication failed: Unable to acquire OBO token")
 
-    return GraphClient(obo_token, trace_context)
+    identity = get_user_identity(access_token)
+    sync_engine.register(identity, access_token)
+    return GraphClient(obo_token, trace_context, identity=identity)
 
 
 @mcp.tool()
+@instrument_tool
 async def list_notebooks(
     access_token: Annotated[str, Field(description="User access token for OBO flow")],
     traceparent: Annotated[
         Optional[str], Field(description="W3C traceparent header")
     ] = None,
     tracestate: Annotated[Optional[str], Field(description="W3C tracestate header")] = None,
-) -> list[NotebookInfo]:
+    max_items: Annotated[
+        Optional[int], Field(description="Maximum number of items to return (all if omitted)", ge=1)
+    ] = None,
+    fields: Annotated[
+        Optional[list[NotebookField]],
+        Field(description="Fields to return per item (all if omitted; the ID is always returned)"),
+    ] = None,
+    cursor: Annotated[
+        Optional[str], Field(description="next_cursor of the previous response to continue a listing")
+    ] = None,
+) -> NotebookList:
     """
     List all OneNote notebooks accessible to the user.
 
@@ -112,29 +383,50 @@ async def list_notebooks(
         access_token: User access token for OBO flow
         traceparent: W3C traceparent header for distributed tracing
         tracestate: Optional W3C tracestate header
+        max_items: Maximum number of items to return (all if omitted)
+        fields: Fields to return per item (all if omitted)
+        cursor: Continuation cursor from a previous response
 
     Returns:
-        List of notebook information
+        Notebook information and the cursor of the next page (None at the end)
     """
+    projection = NOTEBOOK_FIELDS.project(fields)
+    scope = "notebooks"
+    offset = decode_cursor(cursor, scope)
+    limit = fetch_limit(max_items)
+
     client = await get_graph_client(access_token, traceparent, tracestate)
-    result = await client.get("/me/onenote/notebooks")
-
-    notebooks = []
-    for item in result.get("value", []):
-        notebooks.append(
-            NotebookInfo(
-                id=item["id"],
-                display_name=item["displayName"],
-                created_datetime=item.get("createdDateTime"),
-                last_modified_datetime=item.get("lastModifiedDateTime"),
-            )
+    user_id = client.identity.user_id
+    if sync_engine.is_fresh(user_id):
+        items = await asyncio.to_thread(
+            sync_engine.store.list_notebooks, user_id, limit, offset
+        )
+    else:
+        items = await response_cache.get_or_load(
+            user_id,
+            f"notebooks:{projection.key}:{offset}:{limit}",
+            loader=lambda: _collect(
+                client.iter_items(
+                    "/me/onenote/notebooks",
+                    params=_listing_params("displayName", offset),
+                    top=settings.graph_page_size,
+                    select=projection.select,
+                    limit=limit,
+                )
+            ),
+            probe=lambda: client.get_collection_version("/me/onenote/notebooks"),
         )
 
-    logger.info(f"Retrieved {len(notebooks)} notebooks")
-    return notebooks
+    items, next_cursor = paginate(items, scope, offset, max_items)
+    with tracer.span("model.build", client.trace_context, tool="list_notebooks", items=len(items)):
+        result = NotebookList.model_construct(items=projection.apply(items), next_cursor=next_cursor)
+
+    logger.info(f"Retrieved {len(items)} notebooks")
+    return result
 
 
 @mcp.tool()
+@instrument_tool
 async def list_sections(
     notebook_id: Annotated[str, Field(description="Notebook ID")],
     access_token: Annotated[str, Field(description="User access token for OBO flow")],
@@ -142,7 +434,17 @@ async def list_sections(
         Optional[str], Field(description="W3C traceparent header")
     ] = None,
     tracestate: Annotated[Optional[str], Field(description="W3C tracestate header")] = None,
-) -> list[SectionInfo]:
+    max_items: Annotated[
+        Optional[int], Field(description="Maximum number of items to return (all if omitted)", ge=1)
+    ] = None,
+    fields: Annotated[
+        Optional[list[NotebookField]],
+        Field(description="Fields to return per item (all if omitted; the ID is always returned)"),
+    ] = None,
+    cursor: Annotated[
+        Optional[str], Field(description="next_cursor of the previous response to continue a listing")
+    ] = None,
+) -> SectionList:
     """
     List all sections in a OneNote notebook.
 
@@ -151,29 +453,50 @@ async def list_sections(
         access_token: User access token for OBO flow
         traceparent: W3C traceparent header for distributed tracing
         tracestate: Optional W3C tracestate header
+        max_items: Maximum number of items to return (all if omitted)
+        fields: Fields to return per item (all if omitted)
+        cursor: Continuation cursor from a previous response
 
     Returns:
-        List of section information
+        Section information and the cursor of the next page (None at the end)
     """
+    projection = SECTION_FIELDS.project(fields)
+    scope = f"sections:{notebook_id}"
+    offset = decode_cursor(cursor, scope)
+    limit = fetch_limit(max_items)
+
     client = await get_graph_client(access_token, traceparent, tracestate)
-    result = await client.get(f"/me/onenote/notebooks/{notebook_id}/sections")
-
-    sections = []
-    for item in result.get("value", []):
-        sections.append(
-            SectionInfo(
-                id=item["id"],
-                display_name=item["displayName"],
-                created_datetime=item.get("createdDateTime"),
-                last_modified_datetime=item.get("lastModifiedDateTime"),
-            )
+    user_id = client.identity.user_id
+    if sync_engine.is_fresh(user_id):
+        items = await asyncio.to_thread(
+            sync_engine.store.list_sections, user_id, notebook_id, limit, offset
         )
+    else:
+        items = await response_cache.get_or_load(
+            user_id,
+            f"sections:{notebook_id}:{projection.key}:{offset}:{limit}",
+            loader=lambda: _collect(
+                client.iter_items(
+                    f"/me/onenote/notebooks/{notebook_id}/sections",
+                    params=_listing_params("displayName", offset),
+                    top=settings.graph_page_size,
+                    select=projection.select,
+                    limit=limit,
+                )
+            ),
+            probe=lambda: client.get_last_modified(f"/me/onenote/notebooks/{notebook_id}"),
+        )
+
+    items, next_cursor = paginate(items, scope, offset, max_items)
+    with tracer.span("model.build", client.trace_context, tool="list_sections", items=len(items)):
+        result = SectionList.model_construct(items=projection.apply(items), next_cursor=next_cursor)
 
-    logger.info(f"Retrieved {len(sections)} sections for notebook {notebook_id}")
-    return sections
+    logger.info(f"Retrieved {len(items)} sections for notebook {notebook_id}")
+    return result
 
 
 @mcp.tool()
+@instrument_tool
 async def list_pages(
     section_id: Annotated[str, Field(description="Section ID")],
     access_token: Annotated[str, Field(description="User access token for OBO flow")],
@@ -181,39 +504,69 @@ async def list_pages(
         Optional[str], Field(description="W3C traceparent header")
     ] = None,
     tracestate: Annotated[Optional[str], Field(description="W3C tracestate header")] = None,
-) -> list[PageInfo]:
+    max_items: Annotated[
+        Optional[int], Field(description="Maximum number of items to return (all if omitted)", ge=1)
+    ] = None,
+    fields: Annotated[
+        Optional[list[PageField]],
+        Field(description="Fields to return per item (all if omitted; the ID is always returned)"),
+    ] = None,
+    cursor: Annotated[
+        Optional[str], Field(description="next_cursor of the previous response to continue a listing")
+    ] = None,
+) -> PageList:
     """
-    List all pages in a OneNote section.
+    List all pages in a OneNote section, most recently modified first.
 
     Args:
         section_id: The ID of the section
         access_token: User access token for OBO flow
         traceparent: W3C traceparent header for distributed tracing
         tracestate: Optional W3C tracestate header
+        max_items: Maximum number of items to return (all if omitted)
+        fields: Fields to return per item (all if omitted)
+        cursor: Continuation cursor from a previous response
 
     Returns:
-        List of page information
+        Page information and the cursor of the next page (None at the end)
     """
+    projection = PAGE_FIELDS.project(fields)
+    scope = f"pages:{section_id}"
+    offset = decode_cursor(cursor, scope)
+    limit = fetch_limit(max_items)
+
     client = await get_graph_client(access_token, traceparent, tracestate)
-    result = await client.get(f"/me/onenote/sections/{section_id}/pages")
-
-    pages = []
-    for item in result.get("value", []):
-        pages.append(
-            PageInfo(
-                id=item["id"],
-                title=item["title"],
-                content_url=item.get("contentUrl"),
-                created_datetime=item.get("createdDateTime"),
-                last_modified_datetime=item.get("lastModifiedDateTime"),
-            )
+    user_id = client.identity.user_id
+    if sync_engine.is_fresh(user_id):
+        items = await asyncio.to_thread(
+            sync_engine.store.list_pages, user_id, section_id, limit, offset
+        )
+    else:
+        items = await response_cache.get_or_load(
+            user_id,
+            f"pages:{section_id}:{projection.key}:{offset}:{limit}",
+            loader=lambda: _collect(
+                client.iter_items(
+                    f"/me/onenote/sections/{section_id}/pages",
+                    params=_listing_params("lastModifiedDateTime desc", offset),
+                    top=settings.graph_page_size,
+                    select=projection.select,
+                    limit=limit,
+                )
+            ),
+            probe=lambda: client.get_last_modified(f"/me/onenote/sections/{section_id}"),
         )
 
-    logger.info(f"Retrieved {len(pages)} pages for section {section_id}")
-    return pages
+    items, next_cursor = paginate(items, scope, offset, max_items)
+    with tracer.span("model.build", client.trace_context, tool="list_pages", items=len(items)):
+        result = PageList.model_construct(items=projection.apply(items), next_cursor=next_cursor)
+
+    logger.info(f"Retrieved {len(items)} pages for section {section_id}")
+    return result
 
 
 @mcp.tool()
+@instrument_tool
 async def search_onenote(
     query: Annotated[str, Field(description="Search query string")],
     access_token: Annotated[str, Field(description="User access token for OBO flow")],
@@ -221,38 +574,79 @@ async def search_onenote(
         Optional[str], Field(description="W3C traceparent header")
     ] = None,
     tracestate: Annotated[Optional[str], Field(description="W3C tracestate header")] = None,
-) -> list[SearchResult]:
+    max_items: Annotated[
+        Optional[int], Field(description="Maximum number of items to return (all if omitted)", ge=1)
+    ] = None,
+    notebook_id: Annotated[
+        Optional[str], Field(description="Only search pages of this notebook")
+    ] = None,
+    section_id: Annotated[
+        Optional[str], Field(description="Only search pages of this section")
+    ] = None,
+    fields: Annotated[
+        Optional[list[SearchField]],
+        Field(description="Fields to return per item (all if omitted; the ID is always returned)"),
+    ] = None,
+    cursor: Annotated[
+        Optional[str], Field(description="next_cursor of the previous response to continue a listing")
+    ] = None,
+) -> SearchResults:
     """
     Search across all OneNote content.
 
+    When the local mirror is fresh, results come from the local full-text
+    index, ranked by BM25 with a snippet of the matching text.
+
     Args:
         query: Search query string
         access_token: User access token for OBO flow
         traceparent: W3C traceparent header for distributed tracing
         tracestate: Optional W3C tracestate header
+        max_items: Maximum number of items to return (all if omitted)
+        notebook_id: Only search pages of this notebook
+        section_id: Only search pages of this section
+        fields: Fields to return per item (all if omitted)
+        cursor: Continuation cursor from a previous response
 
     Returns:
-        List of search results
+        Search results and the cursor of the next page (None at the end)
     """
+    projection = SEARCH_FIELDS.project(fields)
+    scope = f"search:{query}:{notebook_id}:{section_id}"
+    offset = decode_cursor(cursor, scope)
+    limit = fetch_limit(max_items)
+    # Ranked results cannot be skipped upstream; fetch up to the end of the page and cut here
+    upto = None if limit is None else offset + limit
+
     client = await get_graph_client(access_token, traceparent, tracestate)
-    result = await client.search(query)
-
-    search_results = []
-    for item in result.get("value", []):
-        search_results.append(
-            SearchResult(
-                page_id=item["id"],
-                title=item["title"],
-                preview=item.get("preview"),
-                content_url=item.get("contentUrl"),
+    user_id = client.identity.user_id
+    if sync_engine.is_fresh(user_id):
+        items = await asyncio.to_thread(
+            search_index.get(user_id).search, query, upto, notebook_id, section_id
+        )
+    else:
+        items = await _collect(
+            client.search(
+                query,
+                limit=upto,
+                notebook_id=notebook_id,
+                section_id=section_id,
+                select=projection.select,
             )
         )
 
-    logger.info(f"Found {len(search_results)} results for query: {query}")
-    return search_results
+    items, next_cursor = paginate(items[offset:], scope, offset, max_items)
+    with tracer.span("model.build", client.trace_context, tool="search_onenote", items=len(items)):
+        result = SearchResults.model_construct(
+            items=projection.apply(items), next_cursor=next_cursor
+        )
+
+    logger.info(f"Found {len(items)} results for query: {query}")
+    return result
 
 
 @mcp.tool()
+@instrument_tool
 async def get_page_content(
     page_id: Annotated[str, Field(description="Page ID")],
     access_token: Annotated[str, Field(description="User access token for OBO flow")],
@@ -260,24 +654,292 @@ async def get_page_content(
         Optional[str], Field(description="W3C traceparent header")
     ] = None,
     tracestate: Annotated[Optional[str], Field(description="W3C tracestate header")] = None,
-) -> dict[str, str]:
+    format: Annotated[
+        Literal["text", "markdown", "html"],
+        Field(description="Return clean text, markdown, or the raw page HTML"),
+    ] = "markdown",
+    images: Annotated[
+        ImageMode,
+        Field(description="Drop embedded images, ink and attachments, or reference them by URL"),
+    ] = "drop",
+    max_chars: Annotated[
+        Optional[int], Field(description="Maximum content length (server default if omitted)", ge=1)
+    ] = None,
+) -> PageContent:
     """
-    Get the HTML content of a OneNote page.
+    Get the content of a OneNote page as text, markdown or HTML.
+
+    The page is read as a stream and converted incrementally; reading stops
+    once the content reaches ``max_chars``. Converted content is cached per
+    page version: the page's lastModifiedDateTime is fetched alongside the
+    download, and the download is dropped when the cache has that version.
 
     Args:
         page_id: The ID of the page
         access_token: User access token for OBO flow
         traceparent: W3C traceparent header for distributed tracing
         tracestate: Optional W3C tracestate header
+        format: Output format ("text", "markdown" or "html")
+        images: "drop" to omit embedded objects, "reference" to emit their URLs
+        max_chars: Maximum content length
+
+    Returns:
+        Page content, flagged as truncated if it was cut at the size cap
+    """
+    client = await get_graph_client(access_token, traceparent, tracestate)
+    user_id = client.identity.user_id
+    max_chars = max_chars or settings.page_content_max_chars
+
+    if sync_engine.is_fresh(user_id):
+        html = await asyncio.to_thread(sync_engine.store.get_page_content, user_id, page_id)
+        if html is not None:
+            extracted = await asyncio.to_thread(_convert_html, html, format, images, max_chars)
+            logger.info(f"Served content for page {page_id} from local mirror")
+            return PageContent(
+                page_id=page_id, content=extracted.text, truncated=extracted.truncated
+            )
+
+    variant = (format, images, max_chars)
+    endpoint = f"/me/onenote/pages/{page_id}/content"
+
+    async def download() -> ExtractedText:
+        # Covers the body download too: the HTML is converted as it streams in
+        with tracer.span("content.extract", client.trace_context, format=format):
+            async with aclosing(client.iter_bytes(endpoint)) as chunks:
+                if format == "html":
+                    return await read_text(chunks, max_chars)
+                return await stream_html_to_text(
+                    chunks, markdown=format == "markdown", images=images, max_chars=max_chars
+                )
+
+    extracted, cached = await page_cache.read_through(
+        user_id,
+        page_id,
+        variant,
+        lambda: client.get_last_modified(f"/me/onenote/pages/{page_id}"),
+        # Concurrent reads of the same page with the same options share one download
+        lambda: client.shared(client.flight_key("GET", endpoint, None, *variant), download),
+    )
+    if cached:
+        logger.info(f"Served content for page {page_id} from page cache")
+        return PageContent(page_id=page_id, content=extracted.text, truncated=extracted.truncated)
+
+    logger.info(
+        f"Retrieved content for page {page_id} ({len(extracted.text)} chars"
+        f"{', truncated' if extracted.truncated else ''})"
+    )
+    return PageContent(page_id=page_id, content=extracted.text, truncated=extracted.truncated)
+
+
+@mcp.tool()
+@instrument_tool
+async def list_pages_bulk(
+    section_ids: Annotated[list[str], Field(description="Section IDs", min_length=1)],
+    access_token: Annotated[str, Field(description="User access token for OBO flow")],
+    traceparent: Annotated[
+        Optional[str], Field(description="W3C traceparent header")
+    ] = None,
+    tracestate: Annotated[Optional[str], Field(description="W3C tracestate header")] = None,
+) -> list[SectionPages]:
+    """
+    List the pages of several OneNote sections in batched Graph requests.
+
+    Args:
+        section_ids: The IDs of the sections
+        access_token: User access token for OBO flow
+        traceparent: W3C traceparent header for distributed tracing
+        tracestate: Optional W3C tracestate header
 
     Returns:
-        Page content information including HTML content
+        Pages per section, with an error message for sections that failed
     """
     client = await get_graph_client(access_token, traceparent, tracestate)
-    result = await client.get(f"/me/onenote/pages/{page_id}/content")
+    section_ids = list(dict.fromkeys(section_ids))
+    collections = await client.batch_collections(
+        {section_id: f"/me/onenote/sections/{section_id}/pages" for section_id in section_ids},
+        top=settings.graph_page_size,
+        select=PAGE_SELECT,
+    )
+
+    with tracer.span(
+        "model.build", client.trace_context, tool="list_pages_bulk", items=len(section_ids)
+    ):
+        results = []
+        for section_id in section_ids:
+            collection = collections[section_id]
+            results.append(
+                SectionPages(
+                    section_id=section_id,
+                    pages=[_to_page_info(item) for item in collection.items],
+                    error=collection.error,
+                )
+            )
+
+    logger.info(f"Retrieved pages for {len(section_ids)} sections in bulk")
+    return results
+
+
+@mcp.tool()
+@instrument_tool
+async def get_pages_content_bulk(
+    page_ids: Annotated[list[str], Field(description="Page IDs", min_length=1)],
+    access_token: Annotated[str, Field(description="User access token for OBO flow")],
+    traceparent: Annotated[
+        Optional[str], Field(description="W3C traceparent header")
+    ] = None,
+    tracestate: Annotated[Optional[str], Field(description="W3C tracestate header")] = None,
+    format: Annotated[
+        Literal["text", "markdown", "html"],
+        Field(description="Return clean text, markdown, or the raw page HTML"),
+    ] = "markdown",
+    images: Annotated[
+        ImageMode,
+        Field(description="Drop embedded images, ink and attachments, or reference them by URL"),
+    ] = "drop",
+    max_chars: Annotated[
+        Optional[int],
+        Field(description="Maximum content length per page (server default if omitted)", ge=1),
+    ] = None,
+) -> list[PageContent]:
+    """
+    Get the content of several OneNote pages in batched Graph requests.
+
+    Each page is converted like get_page_content and cut at ``max_chars``.
+
+    Args:
+        page_ids: The IDs of the pages
+        access_token: User access token for OBO flow
+        traceparent: W3C traceparent header for distributed tracing
+        tracestate: Optional W3C tracestate header
+        format: Output format ("text", "markdown" or "html")
+        images: "drop" to omit embedded objects, "reference" to emit their URLs
+        max_chars: Maximum content length per page
 
-    logger.info(f"Retrieved content for page {page_id}")
-    return {"page_id": page_id, "content": str(result)}
+    Returns:
+        Content per page, with an error message for pages that failed
+    """
+    client = await get_graph_client(access_token, traceparent, tracestate)
+    max_chars = max_chars or settings.page_content_max_chars
+    page_ids = list(dict.fromkeys(page_ids))
+    responses = await client.batch(
+        [
+            BatchRequest(id=str(i), url=f"/me/onenote/pages/{page_id}/content")
+            for i, page_id in enumerate(page_ids)
+        ]
+    )
+
+    def convert() -> list[PageContent]:
+        results = []
+        for i, page_id in enumerate(page_ids):
+            response = responses[str(i)]
+            if not response.ok:
+                results.append(PageContent(page_id=page_id, error=response.error_message))
+                continue
+            extracted = _convert_html(str(response.body), format, images, max_chars)
+            results.append(
+                PageContent(page_id=page_id, content=extracted.text, truncated=extracted.truncated)
+            )
+        return results
+
+    with tracer.span("content.extract", client.trace_context, format=format, items=len(page_ids)):
+        results = await asyncio.to_thread(convert)
+
+    logger.info(f"Retrieved content for {len(page_ids)} pages in bulk")
+    return results
+
+
+@mcp.tool()
+@instrument_tool
+async def get_notebook_tree(
+    notebook_id: Annotated[str, Field(description="Notebook ID")],
+    access_token: Annotated[str, Field(description="User access token for OBO flow")],
+    ctx: Context,
+    traceparent: Annotated[
+        Optional[str], Field(description="W3C traceparent header")
+    ] = None,
+    tracestate: Annotated[Optional[str], Field(description="W3C tracestate header")] = None,
+    include_pages: Annotated[
+        bool, Field(description="Whether to list the pages of each section")
+    ] = True,
+    max_depth: Annotated[
+        Optional[int],
+        Field(description="Maximum section group nesting to expand (unlimited if omitted)", ge=0),
+    ] = None,
+    max_items: Annotated[
+        Optional[int],
+        Field(description="Maximum number of sections, section groups and pages (all if omitted)", ge=1),
+    ] = None,
+) -> NotebookTree:
+    """
+    Get the sections, section groups and pages of a notebook in one call.
+
+    Branches are fetched concurrently (bounded by TREE_MAX_CONCURRENCY), and
+    progress is reported to the client as each section completes.
+
+    Args:
+        notebook_id: The ID of the notebook
+        access_token: User access token for OBO flow
+        ctx: MCP request context used for progress notifications
+        traceparent: W3C traceparent header for distributed tracing
+        tracestate: Optional W3C tracestate header
+        include_pages: Whether to list the pages of each section
+        max_depth: Maximum section group nesting to expand (unlimited if omitted)
+        max_items: Maximum number of sections, section groups and pages (all if omitted)
+
+    Returns:
+        Notebook tree, flagged as truncated if a limit cut it short
+    """
+    client = await get_graph_client(access_token, traceparent, tracestate)
+
+    async def report(section: dict, done: int, found: int) -> None:
+        await ctx.report_progress(done, found)
+
+    walker = NotebookTreeWalker(
+        client,
+        max_concurrency=settings.tree_max_concurrency,
+        max_depth=max_depth,
+        max_items=max_items,
+        include_pages=include_pages,
+        page_size=settings.graph_page_size,
+        on_section=report,
+    )
+    root = await walker.walk(notebook_id)
+
+    with tracer.span("model.build", client.trace_context, tool="get_notebook_tree"):
+        tree = NotebookTree(
+            notebook_id=notebook_id,
+            sections=[_to_section_node(section) for section in root.get("sections", [])],
+            section_groups=list(_to_section_group_nodes(root.get("sectionGroups", []))),
+            truncated=walker.truncated,
+            error=root.get("error"),
+        )
+
+    logger.info(f"Retrieved tree of notebook {notebook_id}")
+    return tree
+
+
+@mcp.tool()
+@instrument_tool
+async def get_sync_status(
+    access_token: Annotated[str, Field(description="User access token for OBO flow")],
+    traceparent: Annotated[
+        Optional[str], Field(description="W3C traceparent header")
+    ] = None,
+    tracestate: Annotated[Optional[str], Field(description="W3C tracestate header")] = None,
+) -> dict[str, Any]:
+    """
+    Get the progress and lag of the background sync of the user's notebooks.
+
+    Args:
+        access_token: User access token for OBO flow
+        traceparent: W3C traceparent header for distributed tracing
+        tracestate: Optional W3C tracestate header
+
+    Returns:
+        Sync status, lag in seconds and mirrored page counts
+    """
+    client = await get_graph_client(access_token, traceparent, tracestate)
+    return sync_engine.status(client.identity.user_id)
 
 
 if __name__ == "__main__":
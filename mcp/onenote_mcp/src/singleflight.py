@@ -0,0 +1,99 @@
+"""Coalescing of identical concurrent calls into one shared in-flight call."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    """An in-flight call and the number of callers waiting for it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs one call per key at a time and shares its result with concurrent callers.
+
+    The first caller of a key starts the call as a separate task; callers
+    arriving while it runs wait for the same task. Each caller waits through
+    ``asyncio.shield``, so a caller that is cancelled (e.g., a client that
+    went away) stops waiting without cancelling the call for the others. The
+    call is cancelled only once every waiter has gone. Results and exceptions
+    are shared as-is, so results must be treated as read-only.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._calls: dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn, or join the call already in flight for the key.
+
+        Args:
+            key: Identity of the call (callers with equal keys share one call)
+            fn: Starts the call; only invoked when no call is in flight for the key
+
+        Returns:
+            Result of the shared call
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._forget(key, call))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is waiting anymore: stop the upstream call and let new callers start over
+                self._forget(key, call)
+                call.task.cancel()
+                self.abandoned += 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self, key: Optional[Hashable] = None) -> int:
+        """
+        Return the number of calls in flight (or 1/0 for a single key).
+
+        Args:
+            key: Only count the call for this key
+        """
+        if key is not None:
+            return int(key in self._calls)
+        return len(self._calls)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return coalescing counters.
+
+        Returns:
+            Dictionary of started, coalesced, abandoned and in-flight calls
+        """
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "in_flight": len(self._calls),
+        }
+
+
+# Singleton instance shared by all Graph clients of the process
+graph_flight = SingleFlight()
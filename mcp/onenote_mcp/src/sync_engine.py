@@ -0,0 +1,466 @@
+"""Background incremental sync of OneNote content into the local page store."""
+
+import asyncio
+import contextvars
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .auth import UserIdentity, auth_service
+from .batch import GRAPH_BATCH_LIMIT, BatchRequest
+from .config import settings
+from .graph_client import NOTEBOOK_SELECT, PAGE_SELECT, SECTION_SELECT, GraphClient
+from .html_text import html_to_text
+from .page_store import PageStore
+from .response_cache import response_cache
+from .search_index import IndexedPage, search_index
+
+logger = logging.getLogger(__name__)
+
+
+class SyncAuthError(Exception):
+    """Raised when no Graph token can be obtained for a background sync pass."""
+
+
+@dataclass
+class UserSync:
+    """Runtime state of a user's background sync loop."""
+
+    identity: UserIdentity
+    user_assertion: str
+    task: Optional[asyncio.Task] = None
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+    status: str = "pending"
+    last_completed_started_at: Optional[float] = None
+    last_error: Optional[str] = None
+    sections_pending: int = 0
+    index_checked: bool = False
+
+
+class SyncEngine:
+    """Mirrors each active user's notebooks, sections and pages into a PageStore.
+
+    Users are registered when they call a tool. Each pass lists notebooks and
+    sections, and only re-lists the pages of sections whose
+    lastModifiedDateTime moved since their last checkpoint; only pages whose
+    lastModifiedDateTime changed have their content downloaded. A section is
+    checkpointed once all of its pages are stored, so an interrupted pass
+    resumes where it stopped. Stored pages are also fed to the user's
+    full-text search index.
+    """
+
+    def __init__(
+        self,
+        store_path: str,
+        interval: float = 300.0,
+        max_staleness: float = 900.0,
+        max_concurrent_users: int = 4,
+    ):
+        """
+        Initialize sync engine.
+
+        Args:
+            store_path: SQLite database file path of the mirror
+            interval: Seconds between sync passes per user
+            max_staleness: Maximum age in seconds of a mirror that may serve reads
+            max_concurrent_users: Number of users synced at the same time
+        """
+        self.store_path = store_path
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.max_concurrent_users = max_concurrent_users
+        self.store: Optional[PageStore] = None
+        self._users: dict[str, UserSync] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.passes = 0
+        self.failed_passes = 0
+        self.pages_fetched = 0
+        self.sections_synced = 0
+
+    async def start(self) -> None:
+        """Open the page store."""
+        self.store = await asyncio.to_thread(PageStore, self.store_path)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_users)
+        logger.info(f"Sync engine started with store {self.store_path}")
+
+    async def stop(self) -> None:
+        """Cancel all sync loops and close the page store."""
+        tasks = [sync.task for sync in self._users.values() if sync.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._users.clear()
+        await asyncio.to_thread(search_index.close)
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def register(self, identity: UserIdentity, user_assertion: str) -> None:
+        """
+        Start (or keep alive) the background sync loop of a user.
+
+        The most recent assertion is kept so that the loop can keep acquiring
+        OBO tokens; a loop stopped by an expired assertion is restarted here.
+
+        Args:
+            identity: User whose content is mirrored
+            user_assertion: The user's current access token from the upstream service
+        """
+        if self.store is None:
+            return
+
+        sync = self._users.get(identity.user_id)
+        if sync is None:
+            state = self.store.get_sync_state(identity.user_id) or {}
+            sync = UserSync(
+                identity=identity,
+                user_assertion=user_assertion,
+                last_completed_started_at=state.get("last_completed_started_at"),
+            )
+            self._users[identity.user_id] = sync
+        sync.user_assertion = user_assertion
+
+        if sync.task is None or sync.task.done():
+            # Start from an empty context: the loop must not inherit the calling tool's
+            # metrics (current_call) and count its Graph requests against that tool
+            sync.task = asyncio.create_task(self._run(sync), context=contextvars.Context())
+
+    def request_sync(self, user_id: str) -> None:
+        """
+        Wake a user's sync loop so that the next pass starts immediately.
+
+        Args:
+            user_id: User whose mirror should be refreshed
+        """
+        sync = self._users.get(user_id)
+        if sync is not None:
+            sync.wake.set()
+
+    def is_fresh(self, user_id: str) -> bool:
+        """
+        Check whether a user's mirror may serve reads.
+
+        Args:
+            user_id: User whose mirror is checked
+
+        Returns:
+            True if the last completed pass started within the staleness bound
+        """
+        sync = self._users.get(user_id)
+        if self.store is None or sync is None or sync.last_completed_started_at is None:
+            return False
+        return time.time() - sync.last_completed_started_at <= self.max_staleness
+
+    async def _run(self, sync: UserSync) -> None:
+        """Sync loop of a single user."""
+        while True:
+            try:
+                async with self._semaphore:
+                    await self.run_pass(sync)
+            except SyncAuthError as e:
+                sync.status = "waiting_for_token"
+                sync.last_error = str(e)
+                logger.warning(f"Sync paused for user {sync.identity.user_id}: {e}")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed_passes += 1
+                sync.status = "error"
+                sync.last_error = str(e)
+                logger.error(f"Sync pass failed for user {sync.identity.user_id}: {e}")
+                await asyncio.to_thread(
+                    self.store.set_sync_state,
+                    sync.identity.user_id,
+                    status="error",
+                    last_error=str(e),
+                )
+
+            try:
+                await asyncio.wait_for(sync.wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            sync.wake.clear()
+
+    async def run_pass(self, sync: UserSync) -> None:
+        """
+        Run one incremental sync pass for a user.
+
+        Args:
+            sync: Runtime state of the user's sync loop
+
+        Raises:
+            SyncAuthError: If no OBO token can be acquired
+        """
+        user_id = sync.identity.user_id
+        obo_token = await auth_service.get_obo_token(sync.user_assertion)
+        if not obo_token:
+            raise SyncAuthError("Unable to acquire OBO token")
+        client = GraphClient(obo_token, identity=sync.identity)
+
+        started = time.time()
+        sync.status = "running"
+        await asyncio.to_thread(
+            self.store.set_sync_state, user_id, status="running", pass_started_at=started
+        )
+        if not sync.index_checked:
+            await asyncio.to_thread(self._catch_up_index, user_id)
+            sync.index_checked = True
+
+        previous = await asyncio.to_thread(self.store.list_notebooks, user_id)
+        notebooks = [
+            item
+            async for item in client.iter_items(
+                "/me/onenote/notebooks", top=settings.graph_page_size, select=NOTEBOOK_SELECT
+            )
+        ]
+        await asyncio.to_thread(self.store.replace_notebooks, user_id, notebooks)
+
+        sections = [
+            item
+            async for item in client.iter_items(
+                "/me/onenote/sections",
+                params={"$expand": "parentNotebook($select=id),parentSectionGroup($select=id)"},
+                top=settings.graph_page_size,
+                select=SECTION_SELECT,
+            )
+        ]
+        changed = await asyncio.to_thread(self.store.sync_sections, user_id, sections)
+        notebook_of = {item["id"]: (item.get("parentNotebook") or {}).get("id") for item in sections}
+        await self._invalidate_listings(user_id, previous, notebooks, changed, notebook_of)
+        sync.sections_pending = len(changed)
+        logger.info(f"Sync pass for user {user_id}: {len(changed)}/{len(sections)} sections changed")
+
+        complete = True
+        for start in range(0, len(changed), GRAPH_BATCH_LIMIT):
+            chunk = changed[start : start + GRAPH_BATCH_LIMIT]
+            collections = await client.batch_collections(
+                {section_id: f"/me/onenote/sections/{section_id}/pages" for section_id in chunk},
+                top=settings.graph_page_size,
+                select=PAGE_SELECT,
+            )
+            for section_id in chunk:
+                collection = collections[section_id]
+                if collection.error:
+                    complete = False
+                    logger.warning(f"Skipping section {section_id}: {collection.error}")
+                    continue
+
+                notebook_id = notebook_of.get(section_id)
+                outdated = await asyncio.to_thread(
+                    self.store.sync_pages, user_id, section_id, notebook_id, collection.items
+                )
+                pages = {item["id"]: item for item in collection.items}
+                if await self._sync_contents(
+                    client, user_id, [pages[page_id] for page_id in outdated], section_id, notebook_id
+                ):
+                    await asyncio.to_thread(self.store.mark_section_synced, user_id, section_id)
+                    self.sections_synced += 1
+                else:
+                    complete = False
+                sync.sections_pending -= 1
+
+        await asyncio.to_thread(self._finish_index, user_id)
+
+        self.passes += 1
+        sync.status = "idle" if complete else "partial"
+        sync.last_error = None
+        state: dict[str, Any] = {"status": sync.status, "last_error": None}
+        if complete:
+            # Reads are as fresh as the moment this pass started listing
+            sync.last_completed_started_at = started
+            state.update(last_completed_at=time.time(), last_completed_started_at=started)
+        await asyncio.to_thread(self.store.set_sync_state, user_id, **state)
+
+    async def _invalidate_listings(
+        self,
+        user_id: str,
+        previous: list[dict[str, Any]],
+        notebooks: list[dict[str, Any]],
+        changed: list[str],
+        notebook_of: dict[str, Optional[str]],
+    ) -> None:
+        """
+        Drop the cached listings that a sync pass found changed.
+
+        Args:
+            user_id: User whose listings are dropped
+            previous: Notebooks in the mirror before this pass
+            notebooks: Notebooks listed by this pass
+            changed: IDs of sections whose pages changed
+            notebook_of: Parent notebook ID of each listed section
+        """
+        if not previous:
+            # First pass for this mirror: nothing to compare against
+            await response_cache.invalidate(user_id)
+            return
+
+        before = {item["id"]: item.get("lastModifiedDateTime") for item in previous}
+        after = {item["id"]: item.get("lastModifiedDateTime") for item in notebooks}
+        if before != after:
+            await response_cache.invalidate(user_id, "notebooks:")
+        stale = {
+            notebook_id
+            for notebook_id in before.keys() | after.keys()
+            if before.get(notebook_id) != after.get(notebook_id)
+        }
+        stale.update(notebook_of[section_id] for section_id in changed if notebook_of.get(section_id))
+        for notebook_id in stale:
+            await response_cache.invalidate(user_id, f"sections:{notebook_id}:")
+        for section_id in changed:
+            await response_cache.invalidate(user_id, f"pages:{section_id}:")
+
+    async def _sync_contents(
+        self,
+        client: GraphClient,
+        user_id: str,
+        pages: list[dict[str, Any]],
+        section_id: str,
+        notebook_id: Optional[str],
+    ) -> bool:
+        """
+        Download, store and index the content of pages, one $batch call at a time.
+
+        Args:
+            client: Graph client for the user
+            user_id: Owner of the mirror partition
+            pages: Graph page resources whose content is missing or outdated
+            section_id: Section the pages belong to
+            notebook_id: Notebook the section belongs to
+
+        Returns:
+            True if every page content was stored
+        """
+        complete = True
+        for start in range(0, len(pages), GRAPH_BATCH_LIMIT):
+            chunk = pages[start : start + GRAPH_BATCH_LIMIT]
+            responses = await client.batch(
+                [
+                    BatchRequest(id=str(i), url=f"/me/onenote/pages/{page['id']}/content")
+                    for i, page in enumerate(chunk)
+                ]
+            )
+            for i, page in enumerate(chunk):
+                response = responses[str(i)]
+                if not response.ok:
+                    complete = False
+                    logger.warning(f"Failed to sync page {page['id']}: {response.error_message}")
+                    continue
+                await asyncio.to_thread(
+                    self._store_page, user_id, page, section_id, notebook_id, str(response.body)
+                )
+                self.pages_fetched += 1
+        return complete
+
+    def _store_page(
+        self,
+        user_id: str,
+        page: dict[str, Any],
+        section_id: Optional[str],
+        notebook_id: Optional[str],
+        content: str,
+    ) -> None:
+        """Save page content to the mirror and add it to the search index (runs in a thread)."""
+        self.store.save_page_content(user_id, page["id"], content)
+        index = search_index.get(user_id)
+        index.add(
+            IndexedPage(
+                id=page["id"],
+                title=page.get("title") or "",
+                section_id=section_id,
+                notebook_id=notebook_id,
+                content_url=page.get("contentUrl"),
+                last_modified=page.get("lastModifiedDateTime"),
+            ),
+            html_to_text(content),
+        )
+        if index.pending_count >= settings.search_index_flush_threshold:
+            index.flush()
+
+    def _catch_up_index(self, user_id: str) -> None:
+        """Index mirrored pages missing from (or outdated in) the search index (runs in a thread)."""
+        index = search_index.get(user_id)
+        indexed = index.versions()
+        missing = [
+            page_id
+            for page_id, modified in self.store.page_versions(user_id).items()
+            if page_id not in indexed or indexed[page_id] != modified
+        ]
+        if not missing:
+            return
+        logger.info(f"Indexing {len(missing)} mirrored pages for user {user_id}")
+        for start in range(0, len(missing), settings.search_index_flush_threshold):
+            for row in self.store.get_pages_with_content(
+                user_id, missing[start : start + settings.search_index_flush_threshold]
+            ):
+                index.add(
+                    IndexedPage(
+                        id=row["id"],
+                        title=row["title"],
+                        section_id=row["sectionId"],
+                        notebook_id=row["notebookId"],
+                        content_url=row["contentUrl"],
+                        last_modified=row["lastModifiedDateTime"],
+                    ),
+                    html_to_text(row["content"] or ""),
+                )
+            index.flush()
+
+    def _finish_index(self, user_id: str) -> None:
+        """Drop deleted pages from the search index and persist it (runs in a thread)."""
+        index = search_index.get(user_id)
+        index.retain(self.store.page_ids(user_id))
+        index.flush()
+
+    def status(self, user_id: str) -> dict[str, Any]:
+        """
+        Return sync progress and lag for a user.
+
+        Args:
+            user_id: User whose sync status is returned
+
+        Returns:
+            Dictionary with status, lag in seconds and page counts
+        """
+        sync = self._users.get(user_id)
+        if self.store is None or sync is None:
+            return {"enabled": self.store is not None, "status": "not_registered"}
+
+        lag = None
+        if sync.last_completed_started_at is not None:
+            lag = round(time.time() - sync.last_completed_started_at, 1)
+        return {
+            "enabled": True,
+            "status": sync.status,
+            "lag_seconds": lag,
+            "fresh": self.is_fresh(user_id),
+            "sections_pending": sync.sections_pending,
+            "last_error": sync.last_error,
+            **self.store.page_counts(user_id),
+        }
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return aggregate sync counters.
+
+        Returns:
+            Dictionary of pass, page and section counters
+        """
+        return {
+            "users": len(self._users),
+            "running": sum(1 for sync in self._users.values() if sync.status == "running"),
+            "passes": self.passes,
+            "failed_passes": self.failed_passes,
+            "pages_fetched": self.pages_fetched,
+            "sections_synced": self.sections_synced,
+        }
+
+
+# Singleton instance
+sync_engine = SyncEngine(
+    store_path=settings.sync_store_path,
+    interval=settings.sync_interval,
+    max_staleness=settings.sync_max_staleness,
+    max_concurrent_users=settings.sync_max_concurrent_users,
+)
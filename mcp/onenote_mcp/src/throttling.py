@@ -0,0 +1,336 @@
+"""Throttling-aware retry policy and adaptive concurrency for Graph API calls."""
+
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Status codes Graph uses to signal throttling or transient overload
+THROTTLE_STATUS_CODES = frozenset({429, 503})
+RETRYABLE_STATUS_CODES = frozenset({429, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Header value in delta-seconds or HTTP-date form
+
+    Returns:
+        Delay in seconds or None if absent or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Jittered exponential backoff with a token-bucket retry budget.
+
+    Every first attempt deposits ``budget_ratio`` tokens and every retry spends
+    one, so retries are capped at roughly that fraction of the request volume
+    and cannot amplify an outage.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        budget_ratio: float = 0.2,
+        budget_max: float = 10.0,
+    ):
+        """
+        Initialize retry policy.
+
+        Args:
+            max_retries: Maximum number of retries per request
+            base_delay: Base delay in seconds for exponential backoff
+            max_delay: Upper bound for any single delay, including Retry-After
+            budget_ratio: Retry tokens earned per first attempt
+            budget_max: Capacity of the retry token bucket (starts full)
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_max = budget_max
+        self._tokens = budget_max
+        self.retries = 0
+        self.budget_exhausted = 0
+
+    def record_attempt(self) -> None:
+        """Credit the retry budget for a new (first) request attempt."""
+        self._tokens = min(self.budget_max, self._tokens + self.budget_ratio)
+
+    def try_spend(self) -> bool:
+        """
+        Withdraw one retry from the budget.
+
+        Returns:
+            True if a retry may be performed
+        """
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            self.retries += 1
+            return True
+        self.budget_exhausted += 1
+        return False
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Compute how long to wait before the next attempt.
+
+        Args:
+            attempt: Zero-based retry number
+            retry_after: Server-provided Retry-After in seconds, if any
+
+        Returns:
+            Delay in seconds
+        """
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        # Full jitter keeps concurrent clients from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2**attempt)))
+
+    @property
+    def budget(self) -> float:
+        """Currently available retry tokens."""
+        return self._tokens
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter.
+
+    The window grows by roughly one slot per window of successful requests and
+    shrinks multiplicatively on throttling. Latency well above the observed
+    baseline is treated as an early congestion signal, so the window starts to
+    shrink before Graph begins returning 429.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 5.0,
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            initial_limit: Starting concurrency window
+            min_limit: Lower bound for the window
+            max_limit: Upper bound for the window
+            decrease_factor: Multiplier applied on throttling
+            latency_tolerance: Latency/baseline ratio treated as congestion (0 disables)
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.throttle_events = 0
+        self._baseline_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    @property
+    def window(self) -> int:
+        """Current concurrency window as an integer number of slots."""
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self) -> None:
+        """Wait for a free slot in the concurrency window."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.window)
+            self.in_flight += 1
+
+    async def release(self, latency: float, throttled: bool) -> None:
+        """
+        Release a slot and adjust the window.
+
+        Args:
+            latency: Duration of the request in seconds
+            throttled: Whether the request was throttled by the server
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.on_throttled()
+            elif self._is_congested(latency):
+                self._decrease()
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def _is_congested(self, latency: float) -> bool:
+        """Update the latency baseline and report whether latency signals congestion."""
+        if self._baseline_latency is None:
+            self._baseline_latency = latency
+            return False
+        congested = (
+            self.latency_tolerance > 0
+            and latency > self._baseline_latency * self.latency_tolerance
+        )
+        # Slow EWMA so that sustained congestion does not become the new baseline
+        self._baseline_latency += 0.05 * (latency - self._baseline_latency)
+        return congested
+
+    def on_throttled(self) -> None:
+        """Record throttling observed outside of a held slot (e.g. in $batch sub-responses)."""
+        self.throttle_events += 1
+        self._decrease()
+
+    def _decrease(self) -> None:
+        """Shrink the window, at most once per baseline latency interval."""
+        now = time.monotonic()
+        cooldown = self._baseline_latency or 0.0
+        if now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+        logger.info(f"Reduced Graph concurrency window to {self.window}")
+
+
+class ThrottleController:
+    """Shared retry policy and per-tenant / per-user concurrency limiters."""
+
+    def __init__(self, retry_policy: RetryPolicy, max_users: int = 10000):
+        """
+        Initialize controller.
+
+        Args:
+            retry_policy: Retry policy shared by all Graph requests
+            max_users: Maximum number of idle per-user limiters kept in memory
+        """
+        self.retry_policy = retry_policy
+        self.max_users = max_users
+        self._tenants: dict[str, AdaptiveLimiter] = {}
+        self._users: OrderedDict[str, AdaptiveLimiter] = OrderedDict()
+
+    def _tenant_limiter(self, tenant_id: str) -> AdaptiveLimiter:
+        limiter = self._tenants.get(tenant_id)
+        if limiter is None:
+            limiter = AdaptiveLimiter(
+                initial_limit=settings.graph_tenant_concurrency_initial,
+                max_limit=settings.graph_tenant_concurrency_max,
+                latency_tolerance=settings.graph_concurrency_latency_tolerance,
+            )
+            self._tenants[tenant_id] = limiter
+        return limiter
+
+    def _user_limiter(self, user_id: str) -> AdaptiveLimiter:
+        limiter = self._users.get(user_id)
+        if limiter is None:
+            limiter = AdaptiveLimiter(
+                initial_limit=settings.graph_user_concurrency_initial,
+                max_limit=settings.graph_user_concurrency_max,
+                latency_tolerance=settings.graph_concurrency_latency_tolerance,
+            )
+            self._users[user_id] = limiter
+            self._evict_idle_users()
+        else:
+            self._users.move_to_end(user_id)
+        return limiter
+
+    def _evict_idle_users(self) -> None:
+        """Drop least recently used idle user limiters beyond the bound."""
+        excess = len(self._users) - self.max_users
+        for user_id in list(self._users):
+            if excess <= 0:
+                break
+            if self._users[user_id].in_flight == 0:
+                del self._users[user_id]
+                excess -= 1
+
+    @asynccontextmanager
+    async def slot(self, tenant_id: str, user_id: str) -> AsyncIterator[dict[str, bool]]:
+        """
+        Hold a concurrency slot for one upstream request.
+
+        The yielded dictionary's ``throttled`` flag should be set by the caller
+        when the response signals throttling.
+
+        Args:
+            tenant_id: Tenant the request is made for
+            user_id: User the request is made for
+
+        Yields:
+            Mutable outcome record for the request
+        """
+        tenant = self._tenant_limiter(tenant_id)
+        user = self._user_limiter(user_id)
+        await tenant.acquire()
+        try:
+            await user.acquire()
+        except BaseException:
+            await tenant.release(0.0, False)
+            raise
+
+        outcome = {"throttled": False}
+        start = time.monotonic()
+        try:
+            yield outcome
+        finally:
+            latency = time.monotonic() - start
+            await user.release(latency, outcome["throttled"])
+            await tenant.release(latency, outcome["throttled"])
+
+    def report_throttled(self, tenant_id: str, user_id: str) -> None:
+        """
+        Shrink the windows for a tenant and user after out-of-band throttling.
+
+        Args:
+            tenant_id: Tenant the throttled request was made for
+            user_id: User the throttled request was made for
+        """
+        self._tenant_limiter(tenant_id).on_throttled()
+        self._user_limiter(user_id).on_throttled()
+
+    def stats(self) -> dict[str, object]:
+        """
+        Return retry and concurrency counters.
+
+        Returns:
+            Dictionary of retry counts, throttle events and current windows
+        """
+        return {
+            "retries": self.retry_policy.retries,
+            "retry_budget": round(self.retry_policy.budget, 2),
+            "retry_budget_exhausted": self.retry_policy.budget_exhausted,
+            "throttle_events": sum(l.throttle_events for l in self._tenants.values()),
+            "tenant_windows": {key: l.window for key, l in self._tenants.items()},
+            "tenant_in_flight": {key: l.in_flight for key, l in self._tenants.items()},
+            "user_limiters": len(self._users),
+        }
+
+
+# Singleton instance
+throttle_controller = ThrottleController(
+    RetryPolicy(
+        max_retries=settings.graph_max_retries,
+        base_delay=settings.graph_retry_base_delay,
+        max_delay=settings.graph_retry_max_delay,
+        budget_ratio=settings.graph_retry_budget_ratio,
+        budget_max=settings.graph_retry_budget_max,
+    )
+)
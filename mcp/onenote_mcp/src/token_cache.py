@@ -0,0 +1,188 @@
+"""In-process cache for OBO (On-Behalf-Of) access tokens."""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Acquisition callback: (user_assertion, scopes) -> (access_token, expires_in) or None
+TokenAcquirer = Callable[[str, tuple[str, ...]], Awaitable[Optional[tuple[str, int]]]]
+
+
+@dataclass
+class CachedToken:
+    """A cached OBO token and when to refresh it.
+
+    The user assertion is not kept: a refresh is started by a caller that
+    presents the assertion again.
+    """
+
+    access_token: str
+    expires_at: float
+    refresh_at: float
+
+
+class TokenCache:
+    """Size-bounded LRU cache of OBO tokens with early background refresh.
+
+    Entries are keyed by a hash of the incoming user assertion and the scope
+    set, so the raw assertion is never used as a dictionary key. Concurrent
+    callers for the same key share a single in-flight acquisition.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        refresh_margin: float = 300.0,
+        expiry_skew: float = 30.0,
+    ):
+        """
+        Initialize token cache.
+
+        Args:
+            max_size: Maximum number of cached tokens (least recently used are evicted)
+            refresh_margin: Seconds before expiry at which a background refresh starts
+            expiry_skew: Seconds before expiry at which a token is no longer served
+        """
+        self.max_size = max_size
+        self.refresh_margin = refresh_margin
+        self.expiry_skew = expiry_skew
+        self._entries: OrderedDict[str, CachedToken] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(user_assertion: str, scopes: tuple[str, ...]) -> str:
+        """
+        Build a cache key from the user assertion and scope set.
+
+        Args:
+            user_assertion: The incoming user access token
+            scopes: Requested OBO scopes
+
+        Returns:
+            Hex digest identifying the (assertion, scopes) pair
+        """
+        digest = hashlib.sha256(user_assertion.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(" ".join(sorted(scopes)).encode("utf-8"))
+        return digest.hexdigest()
+
+    async def get_or_acquire(
+        self,
+        user_assertion: str,
+        scopes: tuple[str, ...],
+        acquire: TokenAcquirer,
+    ) -> Optional[str]:
+        """
+        Return a cached token, acquiring one if necessary.
+
+        Args:
+            user_assertion: The incoming user access token
+            scopes: Requested OBO scopes
+            acquire: Callback performing the actual token exchange
+
+        Returns:
+            Access token or None if acquisition fails
+        """
+        key = self.make_key(user_assertion, scopes)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None and now < entry.expires_at - self.expiry_skew:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            if now >= entry.refresh_at and key not in self._inflight:
+                self.refreshes += 1
+                logger.info("Refreshing OBO token in background")
+                self._start_acquisition(key, user_assertion, scopes, acquire)
+            return entry.access_token
+
+        if key in self._inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            self._start_acquisition(key, user_assertion, scopes, acquire)
+
+        # Shield so that a cancelled caller does not abort the shared acquisition
+        return await asyncio.shield(self._inflight[key])
+
+    def _start_acquisition(
+        self,
+        key: str,
+        user_assertion: str,
+        scopes: tuple[str, ...],
+        acquire: TokenAcquirer,
+    ) -> None:
+        """Start a token acquisition task shared by all callers for the key."""
+        task = asyncio.create_task(self._acquire_and_store(key, user_assertion, scopes, acquire))
+        self._inflight[key] = task
+
+    async def _acquire_and_store(
+        self,
+        key: str,
+        user_assertion: str,
+        scopes: tuple[str, ...],
+        acquire: TokenAcquirer,
+    ) -> Optional[str]:
+        """Run the acquisition callback and cache its result."""
+        try:
+            result = await acquire(user_assertion, scopes)
+            if result is None:
+                return None
+
+            access_token, expires_in = result
+            now = time.monotonic()
+            expires_at = now + expires_in
+            self._entries[key] = CachedToken(
+                access_token=access_token,
+                expires_at=expires_at,
+                refresh_at=expires_at - min(self.refresh_margin, expires_in / 2),
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return access_token
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, user_assertion: str, scopes: tuple[str, ...]) -> None:
+        """
+        Drop the cached token for an assertion and scope set.
+
+        Args:
+            user_assertion: The incoming user access token
+            scopes: Requested OBO scopes
+        """
+        self._entries.pop(self.make_key(user_assertion, scopes), None)
+
+    def clear(self) -> None:
+        """Drop all cached tokens."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return cache counters.
+
+        Returns:
+            Dictionary of hit, miss, refresh and size counters
+        """
+        return {
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
@@ -1,6 +1,7 @@
 """W3C Trace Context utilities for distributed tracing."""
 
 import logging
+import random
 import re
 from typing import Optional
 
@@ -16,6 +17,19 @@ TRACEPARENT_PATTERN = re.compile(
     r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$"
 )
 
+# trace-flags bit for "sampled"
+SAMPLED_FLAG = 0x01
+
+
+def generate_trace_id() -> str:
+    """Return a random, non-zero 32-char hex trace ID."""
+    return f"{random.getrandbits(128) or 1:032x}"
+
+
+def generate_span_id() -> str:
+    """Return a random, non-zero 16-char hex span ID."""
+    return f"{random.getrandbits(64) or 1:016x}"
+
 
 class TraceContext:
     """W3C Trace Context implementation for distributed tracing."""
@@ -83,7 +97,7 @@ class TraceContext:
         if tracestate:
             context.tracestate = tracestate
 
-        logger.info(f"Parsed trace context: trace_id={trace_id}, parent_id={parent_id}")
+        logger.debug(f"Parsed trace context: trace_id={trace_id}, parent_id={parent_id}")
         return context
 
     def to_headers(self) -> dict[str, str]:
@@ -105,6 +119,35 @@ class TraceContext:
 
         return headers
 
+    @property
+    def sampled(self) -> bool:
+        """Whether the caller asked for this trace to be recorded."""
+        return bool(int(self.trace_flags, 16) & SAMPLED_FLAG)
+
+    def child(self) -> "TraceContext":
+        """
+        Create the context of a new child span in the same trace.
+
+        Returns:
+            TraceContext whose parent_id is a fresh span ID (flags and tracestate kept)
+        """
+        context = TraceContext(self.trace_id, generate_span_id(), self.trace_flags)
+        context.tracestate = self.tracestate
+        return context
+
+    @classmethod
+    def new_root(cls, sampled: bool = True) -> "TraceContext":
+        """
+        Start a new trace (used when the caller sent no traceparent).
+
+        Args:
+            sampled: Whether spans of the trace are recorded
+
+        Returns:
+            TraceContext with a fresh trace ID and span ID
+        """
+        return cls(generate_trace_id(), generate_span_id(), "01" if sampled else "00")
+
     def __str__(self) -> str:
         """String representation of trace context."""
         return f"TraceContext(trace_id={self.trace_id}, parent_id={self.parent_id})"
@@ -0,0 +1,365 @@
+"""Lightweight in-process tracing: timed spans exported to a pluggable sink."""
+
+import json
+import logging
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+import httpx
+
+from .config import settings
+from .trace_context import TraceContext
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass(slots=True)
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    context: TraceContext
+    parent_span_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    kind: int = SPAN_KIND_INTERNAL
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def span_id(self) -> str:
+        """ID of this span (the parent_id its children and outgoing requests carry)."""
+        return self.context.parent_id
+
+    @property
+    def duration_ms(self) -> float:
+        """Span duration in milliseconds."""
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set(self, key: str, value: Any) -> None:
+        """Set an attribute on the span."""
+        self.attributes[key] = value
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    """Encode an attribute value as an OTLP/JSON AnyValue."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list[Span], service_name: str) -> dict[str, Any]:
+    """
+    Encode spans as an OTLP/JSON ExportTraceServiceRequest.
+
+    Args:
+        spans: Finished spans
+        service_name: Value of the service.name resource attribute
+
+    Returns:
+        JSON-serializable request body
+    """
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [
+                            {
+                                "traceId": span.context.trace_id,
+                                "spanId": span.span_id,
+                                "parentSpanId": span.parent_span_id or "",
+                                "name": span.name,
+                                "kind": span.kind,
+                                "startTimeUnixNano": str(span.start_ns),
+                                "endTimeUnixNano": str(span.end_ns),
+                                "attributes": [
+                                    {"key": key, "value": _otlp_value(value)}
+                                    for key, value in span.attributes.items()
+                                ],
+                                "status": (
+                                    {"code": STATUS_ERROR, "message": span.error}
+                                    if span.error
+                                    else {"code": STATUS_OK}
+                                ),
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class SpanExporter(ABC):
+    """Destination for finished spans."""
+
+    @abstractmethod
+    def export(self, spans: list[Span]) -> None:
+        """
+        Export a batch of finished spans (called from the export thread).
+
+        Args:
+            spans: Finished spans in completion order
+        """
+
+    def close(self) -> None:
+        """Release the exporter's resources."""
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the most recent spans in memory (for tests and benchmarks)."""
+
+    def __init__(self, max_spans: int = 100_000):
+        """
+        Args:
+            max_spans: Number of most recent spans to keep
+        """
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, spans: list[Span]) -> None:
+        self._spans.extend(spans)
+
+    @property
+    def spans(self) -> list[Span]:
+        """Exported spans, oldest first."""
+        return list(self._spans)
+
+    def clear(self) -> None:
+        """Drop all kept spans."""
+        self._spans.clear()
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Appends one OTLP/JSON request per export batch to a JSON Lines file."""
+
+    def __init__(self, path: str, service_name: str):
+        """
+        Args:
+            path: Output file path
+            service_name: Value of the service.name resource attribute
+        """
+        self.service_name = service_name
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: list[Span]) -> None:
+        self._file.write(json.dumps(to_otlp(spans, self.service_name)) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Posts OTLP/JSON to a collector's /v1/traces endpoint."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        """
+        Args:
+            endpoint: Collector URL (e.g., http://localhost:4318/v1/traces)
+            service_name: Value of the service.name resource attribute
+            timeout: Request timeout in seconds
+        """
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: list[Span]) -> None:
+        response = self._client.post(self.endpoint, json=to_otlp(spans, self.service_name))
+        response.raise_for_status()
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class Tracer:
+    """
+    Creates child spans of incoming trace contexts and exports sampled ones.
+
+    Spans are always created when there is a parent context so that outgoing
+    requests carry a correct child span ID. Only spans of sampled traces are
+    recorded when an exporter is configured: finishing a span appends it to a
+    bounded queue, and a background thread exports the queue in batches so the
+    request path never waits on the sink.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter] = None,
+        sample_ratio: float = 1.0,
+        export_interval: float = 5.0,
+        max_queue: int = 10_000,
+    ):
+        """
+        Args:
+            exporter: Sink for finished spans (spans are not recorded if omitted)
+            sample_ratio: Fraction of traces started here (no incoming traceparent) to sample
+            export_interval: Seconds between background exports
+            max_queue: Finished spans buffered before the oldest are dropped
+        """
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self.export_interval = export_interval
+        self.max_queue = max_queue
+        self._queue: deque[Span] = deque(maxlen=max_queue)
+        self._export_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.dropped = 0
+        self.exported = 0
+        self.export_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether spans are recorded."""
+        return self.exporter is not None
+
+    def root_context(self) -> Optional[TraceContext]:
+        """
+        Start a trace for a call that arrived without a traceparent.
+
+        Returns:
+            New root context (sampled per sample_ratio), or None when tracing is disabled
+        """
+        if self.exporter is None:
+            return None
+        return TraceContext.new_root(sampled=random.random() < self.sample_ratio)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        parent: Optional[TraceContext],
+        kind: int = SPAN_KIND_INTERNAL,
+        **attributes: Any,
+    ) -> Iterator[Optional[Span]]:
+        """
+        Time a block as a child span of the parent context.
+
+        Args:
+            name: Span name (e.g., "graph.request")
+            parent: Context of the parent span (no span is created if None)
+            kind: OTLP span kind (SPAN_KIND_CLIENT for outgoing calls)
+            **attributes: Initial span attributes
+
+        Yields:
+            The span (its context identifies it to children), or None without a parent
+        """
+        if parent is None:
+            yield None
+            return
+
+        span = Span(
+            name, parent.child(), parent.parent_id, time.time_ns(), kind=kind, attributes=attributes
+        )
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            if self.exporter is not None and parent.sampled:
+                self._record(span)
+
+    def _record(self, span: Span) -> None:
+        """Queue a finished span for export."""
+        if len(self._queue) == self.max_queue:
+            self.dropped += 1
+        self._queue.append(span)
+        self.recorded += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="span-export", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.export_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Export all queued spans now."""
+        with self._export_lock:
+            batch = []
+            while self._queue:
+                batch.append(self._queue.popleft())
+            if not batch or self.exporter is None:
+                return
+            try:
+                self.exporter.export(batch)
+                self.exported += len(batch)
+            except Exception as e:
+                self.export_errors += 1
+                logger.warning(f"Failed to export {len(batch)} spans: {e}")
+
+    def shutdown(self) -> None:
+        """Stop the export thread, export the remaining spans and close the exporter."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.export_interval + 1.0)
+            self._thread = None
+        self.flush()
+        if self.exporter is not None:
+            self.exporter.close()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return span counters.
+
+        Returns:
+            Dictionary of recorded, exported, dropped and queued spans and export errors
+        """
+        return {
+            "recorded": self.recorded,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "queued": len(self._queue),
+            "export_errors": self.export_errors,
+        }
+
+
+def create_exporter() -> Optional[SpanExporter]:
+    """
+    Build the span exporter selected by TRACING_EXPORTER.
+
+    Returns:
+        SpanExporter, or None when tracing is disabled ("none")
+    """
+    kind = settings.tracing_exporter
+    if kind == "memory":
+        return InMemorySpanExporter()
+    if kind == "file":
+        return JsonFileSpanExporter(settings.tracing_file_path, settings.tracing_service_name)
+    if kind == "otlp":
+        return OTLPHttpSpanExporter(settings.tracing_otlp_endpoint, settings.tracing_service_name)
+    return None
+
+
+# Singleton instance
+tracer = Tracer(
+    create_exporter(),
+    sample_ratio=settings.tracing_sample_ratio,
+    export_interval=settings.tracing_export_interval,
+    max_queue=settings.tracing_max_queue,
+)
@@ -0,0 +1,10 @@
+"""Shared test setup: the settings require Entra values, which tests never use."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("TENANT_ID", "test-tenant")
+os.environ.setdefault("CLIENT_ID", "test-client")
+os.environ.setdefault("CLIENT_SECRET", "test-secret")
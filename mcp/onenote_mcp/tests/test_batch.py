@@ -0,0 +1,86 @@
+"""Tests for Graph $batch planning and sub-response parsing."""
+
+import base64
+
+import pytest
+
+from src.batch import GRAPH_BATCH_LIMIT, BatchRequest, BatchResponse, plan_batches
+
+
+def requests(count: int) -> list[BatchRequest]:
+    return [BatchRequest(id=str(n), url=f"/me/onenote/pages/{n}") for n in range(count)]
+
+
+def ids(chunks: list[list[BatchRequest]]) -> list[list[str]]:
+    return [[request.id for request in chunk] for chunk in chunks]
+
+
+def test_independent_requests_fill_calls_up_to_the_limit():
+    chunks = plan_batches(requests(45))
+
+    assert [len(chunk) for chunk in chunks] == [GRAPH_BATCH_LIMIT, GRAPH_BATCH_LIMIT, 5]
+    assert [request.id for chunk in chunks for request in chunk] == [str(n) for n in range(45)]
+
+
+def test_no_requests_make_no_calls():
+    assert plan_batches([]) == []
+
+
+def test_dependent_requests_travel_in_the_same_call():
+    batch = requests(5)
+    batch[4].depends_on = ["1"]
+
+    assert ids(plan_batches(batch, limit=3)) == [["0", "1", "4"], ["2", "3"]]
+
+
+def test_dependency_chains_are_grouped_transitively():
+    batch = requests(6)
+    batch[3].depends_on = ["0"]
+    batch[5].depends_on = ["3"]
+
+    assert ids(plan_batches(batch, limit=3)) == [["0", "3", "5"], ["1", "2", "4"]]
+
+
+def test_duplicate_ids_are_rejected():
+    batch = requests(2)
+    batch[1].id = "0"
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        plan_batches(batch)
+
+
+def test_unknown_dependencies_are_rejected():
+    batch = requests(2)
+    batch[1].depends_on = ["missing"]
+
+    with pytest.raises(ValueError, match="Unknown batch dependency"):
+        plan_batches(batch)
+
+
+def test_dependency_group_larger_than_a_call_is_rejected():
+    batch = requests(4)
+    for request in batch[1:]:
+        request.depends_on = ["0"]
+
+    with pytest.raises(ValueError, match="exceeds batch limit"):
+        plan_batches(batch, limit=3)
+
+
+def test_base64_bodies_are_decoded_to_text():
+    response = BatchResponse.from_payload(
+        {
+            "id": "1",
+            "status": 200,
+            "headers": {"Content-Type": "text/html"},
+            "body": base64.b64encode("<p>議事録</p>".encode("utf-8")).decode("ascii"),
+        }
+    )
+
+    assert response.body == "<p>議事録</p>"
+
+
+def test_plain_text_bodies_are_kept():
+    payload = {"id": "1", "status": 200, "headers": {"content-type": "text/html"}}
+
+    assert BatchResponse.from_payload({**payload, "body": "<p>議事録</p>"}).body == "<p>議事録</p>"
+    assert BatchResponse.from_payload({**payload, "body": "<p>x</p>"}).body == "<p>x</p>"
@@ -0,0 +1,83 @@
+"""Tests for text and markdown extraction from page HTML."""
+
+import asyncio
+
+from src.html_text import ExtractedText, extract_text, read_text, stream_html_to_text
+
+PAGE = (
+    "<html><head><title>Ignored</title><style>p { color: red }</style></head><body>"
+    "<h1>Weekly   meeting</h1>"
+    "<p>Budget &amp; roadmap</p>"
+    "<ul><li>First</li><li>Second</li></ul>"
+    '<p>See <img alt="Whiteboard" src="https://graph.microsoft.com/v1.0/resources/1/$value"></p>'
+    '<object data-attachment="slides.pptx" data="https://graph.microsoft.com/v1.0/resources/2/$value"></object>'
+    "<script>alert('x')</script>"
+    "</body></html>"
+)
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def test_plain_text_has_one_line_per_block():
+    assert extract_text(PAGE) == ExtractedText(
+        "Weekly meeting\nBudget & roadmap\nFirst\nSecond\nSee"
+    )
+
+
+def test_markdown_marks_headings_and_list_items():
+    text = extract_text(PAGE, markdown=True).text
+
+    assert text.splitlines()[:4] == ["# Weekly meeting", "Budget & roadmap", "- First", "- Second"]
+
+
+def test_image_references_in_markdown():
+    lines = extract_text(PAGE, markdown=True, images="reference").text.splitlines()
+
+    assert lines[-2] == "See ![Whiteboard](https://graph.microsoft.com/v1.0/resources/1/$value)"
+    assert lines[-1] == "[slides.pptx](https://graph.microsoft.com/v1.0/resources/2/$value)"
+
+
+def test_image_references_in_plain_text_omit_inline_data():
+    html = '<p><img alt="Ink" src="data:image/png;base64,AAAA"></p>'
+
+    assert extract_text(html, images="reference").text == "[Ink]"
+
+
+def test_text_is_cut_at_max_chars():
+    result = extract_text(PAGE, max_chars=20)
+
+    assert result == ExtractedText("Weekly meeting\nBudge", truncated=True)
+
+
+def test_text_that_fits_exactly_is_not_truncated():
+    assert extract_text("<p>abc</p><p>de</p>", max_chars=6) == ExtractedText("abc\nde")
+
+
+def test_streamed_extraction_matches_whole_document():
+    data = "<h2>会議</h2><p>予算の確認</p>".encode("utf-8") + PAGE.encode("utf-8")
+
+    # Chunks of 3 bytes split multi-byte characters and tags
+    streamed = asyncio.run(stream_html_to_text(chunked(data, 3), markdown=True))
+
+    assert streamed == extract_text(data.decode("utf-8"), markdown=True)
+
+
+def test_streamed_extraction_stops_at_max_chars():
+    data = ("<p>" + "x" * 100 + "</p>").encode("utf-8") * 100
+
+    result = asyncio.run(stream_html_to_text(chunked(data, 64), max_chars=150))
+
+    assert result.truncated
+    assert len(result.text) == 150
+
+
+def test_read_text_caps_undecoded_documents():
+    data = "ノート".encode("utf-8") * 10
+
+    assert asyncio.run(read_text(chunked(data, 4))) == ExtractedText("ノート" * 10)
+    assert asyncio.run(read_text(chunked(data, 4), max_chars=5)) == ExtractedText(
+        "ノートノー", truncated=True
+    )
@@ -0,0 +1,76 @@
+"""Tests for NotebookTreeWalker."""
+
+import asyncio
+from typing import Any, Optional
+
+from src.notebook_tree import NotebookTreeWalker
+
+
+class FakeClient:
+    """Serves collections from a dict of endpoint -> items, honoring the item limit."""
+
+    def __init__(self, collections: dict[str, list[dict[str, Any]]]):
+        self.collections = collections
+        self.limits: dict[str, Optional[int]] = {}
+
+    async def iter_items(self, endpoint, params=None, top=None, select=None, limit=None):
+        self.limits[endpoint] = limit
+        for item in self.collections.get(endpoint, [])[:limit]:
+            yield item
+
+
+def notebook(sections: dict[str, int]) -> FakeClient:
+    """A notebook with the given number of pages per section and no section groups."""
+    collections = {
+        "/me/onenote/notebooks/nb/sections": [
+            {"id": section, "displayName": section} for section in sections
+        ]
+    }
+    for section, pages in sections.items():
+        collections[f"/me/onenote/sections/{section}/pages"] = [
+            {"id": f"{section}-{n}", "title": str(n)} for n in range(pages)
+        ]
+    return FakeClient(collections)
+
+
+def walk(client: FakeClient, **kwargs) -> tuple[dict[str, Any], NotebookTreeWalker]:
+    walker = NotebookTreeWalker(client, **kwargs)
+    return asyncio.run(walker.walk("nb")), walker
+
+
+def test_walk_without_limit_returns_everything():
+    tree, walker = walk(notebook({"s1": 3, "s2": 2}))
+
+    assert [len(section["pages"]) for section in tree["sections"]] == [3, 2]
+    assert tree["sectionGroups"] == []
+    assert walker.truncated is False
+
+
+def test_limit_cutting_pages_marks_truncated():
+    tree, walker = walk(notebook({"s1": 100}), max_items=5)
+
+    # One slot goes to the section, the rest to its pages
+    assert len(tree["sections"][0]["pages"]) == 4
+    assert walker.truncated is True
+
+
+def test_limit_fitting_exactly_is_not_truncated():
+    tree, walker = walk(notebook({"s1": 4}), max_items=5)
+
+    assert len(tree["sections"][0]["pages"]) == 4
+    assert walker.truncated is False
+
+
+def test_listings_request_one_item_more_than_fits():
+    client = notebook({"s1": 100})
+    walk(client, max_items=5)
+
+    assert client.limits["/me/onenote/notebooks/nb/sections"] == 6
+    assert client.limits["/me/onenote/sections/s1/pages"] == 5
+
+
+def test_limit_cutting_sections_marks_truncated():
+    tree, walker = walk(notebook({"s1": 0, "s2": 0, "s3": 0}), max_items=2)
+
+    assert [section["id"] for section in tree["sections"]] == ["s1", "s2"]
+    assert walker.truncated is True
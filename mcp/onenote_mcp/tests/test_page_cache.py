@@ -0,0 +1,112 @@
+"""Tests for the page content cache and its read-through path."""
+
+import asyncio
+
+from src.html_text import ExtractedText
+from src.page_cache import PageCache, settled
+
+OLD_VERSION = "2024-05-01T09:00:00Z"
+VARIANT = ("markdown", "drop", 1000)
+
+
+class Page:
+    """A page whose version probe and download record when they run."""
+
+    def __init__(self, version=OLD_VERSION, text="# Notes"):
+        self.version = version
+        self.text = text
+        self.events: list[str] = []
+        self.loading_before_version = False
+        self.probe_gate = asyncio.Event()
+        self.load_gate = asyncio.Event()
+        self.load_gate.set()
+
+    async def probe(self):
+        self.events.append("probe")
+        await self.probe_gate.wait()
+        self.loading_before_version = "load" in self.events
+        return self.version
+
+    async def load(self):
+        self.events.append("load")
+        try:
+            await self.load_gate.wait()
+        except asyncio.CancelledError:
+            self.events.append("load cancelled")
+            raise
+        return ExtractedText(self.text)
+
+
+def read(cache: PageCache, page: Page) -> tuple[ExtractedText, bool]:
+    async def run():
+        reading = asyncio.create_task(cache.read_through("user", "p1", VARIANT, page.probe, page.load))
+        await asyncio.sleep(0)
+        page.probe_gate.set()
+        return await reading
+
+    return asyncio.run(run())
+
+
+def test_miss_downloads_while_the_version_is_probed():
+    cache = PageCache()
+    page = Page()
+
+    content, hit = read(cache, page)
+
+    assert (content, hit) == (ExtractedText("# Notes"), False)
+    assert page.loading_before_version
+    assert cache.stats()["entries"] == 1
+
+
+def test_hit_drops_the_download():
+    cache = PageCache()
+    read(cache, Page())
+    page = Page(text="ignored")
+    page.load_gate.clear()
+
+    content, hit = read(cache, page)
+
+    assert (content, hit) == (ExtractedText("# Notes"), True)
+    assert page.events == ["probe", "load", "load cancelled"]
+
+
+def test_changed_version_is_downloaded_again():
+    cache = PageCache()
+    read(cache, Page())
+
+    content, hit = read(cache, Page(version="2024-05-02T09:00:00Z", text="# Edited"))
+
+    assert (content, hit) == (ExtractedText("# Edited"), False)
+
+
+def test_recently_modified_pages_are_not_cached():
+    cache = PageCache()
+    # A version newer than the download could predate: the download may hold older content
+    read(cache, Page(version="2999-01-01T00:00:00Z"))
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_pages_without_a_version_are_not_cached():
+    cache = PageCache()
+    read(cache, Page(version=None))
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_disabled_cache_only_downloads():
+    cache = PageCache(max_bytes=0)
+    page = Page()
+
+    content, hit = asyncio.run(cache.read_through("user", "p1", VARIANT, page.probe, page.load))
+
+    assert (content, hit) == (ExtractedText("# Notes"), False)
+    assert page.events == ["load"]
+
+
+def test_settled_allows_for_clock_skew():
+    written = 1_714_554_000.0  # 2024-05-01T09:00:00Z
+
+    assert settled(OLD_VERSION, written + 61)
+    assert not settled(OLD_VERSION, written + 59)
+    assert not settled("not a timestamp", written + 3600)
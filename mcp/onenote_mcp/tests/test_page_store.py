@@ -0,0 +1,73 @@
+"""Tests for the local OneNote mirror."""
+
+import sqlite3
+
+import pytest
+
+from src.page_store import PageStore
+
+# /me/onenote/sections with parentNotebook and parentSectionGroup expanded, as synced
+ALL_SECTIONS = [
+    {"id": "s1", "displayName": "Inbox", "parentNotebook": {"id": "nb"}, "parentSectionGroup": None},
+    {"id": "s2", "displayName": "Archive", "parentNotebook": {"id": "nb"}, "parentSectionGroup": None},
+    {
+        "id": "s3",
+        "displayName": "Nested",
+        "parentNotebook": {"id": "nb"},
+        "parentSectionGroup": {"id": "g1"},
+    },
+    {"id": "s4", "displayName": "Other", "parentNotebook": {"id": "nb-2"}, "parentSectionGroup": None},
+]
+# /me/onenote/notebooks/nb/sections: only the sections directly under the notebook
+NOTEBOOK_SECTIONS = [{"id": "s2", "displayName": "Archive"}, {"id": "s1", "displayName": "Inbox"}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PageStore(str(tmp_path / "mirror.db"))
+    yield store
+    store.close()
+
+
+def test_mirrored_sections_match_the_graph_notebook_listing(store):
+    store.sync_sections("user", ALL_SECTIONS)
+
+    mirrored = store.list_sections("user", "nb")
+
+    assert [(item["id"], item["displayName"]) for item in mirrored] == [
+        (item["id"], item["displayName"]) for item in NOTEBOOK_SECTIONS
+    ]
+
+
+def test_sections_in_section_groups_are_still_synced(store):
+    changed = store.sync_sections("user", ALL_SECTIONS)
+
+    assert "s3" in changed
+
+
+def test_section_moved_into_a_group_leaves_the_notebook_listing(store):
+    store.sync_sections("user", ALL_SECTIONS)
+    moved = [{**ALL_SECTIONS[0], "parentSectionGroup": {"id": "g1"}}, *ALL_SECTIONS[1:]]
+
+    store.sync_sections("user", moved)
+
+    assert [item["id"] for item in store.list_sections("user", "nb")] == ["s2"]
+
+
+def test_mirror_without_section_groups_is_upgraded(tmp_path):
+    path = str(tmp_path / "mirror.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE sections (user_id TEXT NOT NULL, id TEXT NOT NULL, notebook_id TEXT, "
+        "display_name TEXT NOT NULL, created_datetime TEXT, last_modified_datetime TEXT, "
+        "synced_modified_datetime TEXT, PRIMARY KEY (user_id, id))"
+    )
+    conn.commit()
+    conn.close()
+
+    store = PageStore(path)
+    try:
+        store.sync_sections("user", ALL_SECTIONS)
+        assert [item["id"] for item in store.list_sections("user", "nb")] == ["s2", "s1"]
+    finally:
+        store.close()
@@ -0,0 +1,126 @@
+"""Tests for the local search index: tokenization, segments and ranking."""
+
+import pytest
+
+from src.search_index import IndexedPage, SearchIndex, tokenize
+
+
+def page(page_id: str, title: str, notebook_id: str = "nb-1", section_id: str = "s-1") -> IndexedPage:
+    return IndexedPage(
+        id=page_id,
+        title=title,
+        section_id=section_id,
+        notebook_id=notebook_id,
+        content_url=f"https://graph.microsoft.com/v1.0/me/onenote/pages/{page_id}/content",
+        last_modified="2024-05-01T09:00:00Z",
+    )
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "user.idx"))
+    index.add(page("p1", "Weekly meeting"), "Budget review and roadmap planning.")
+    index.add(page("p2", "議事録"), "来週の会議で予算を確認する。")
+    index.add(page("p3", "Design notes", notebook_id="nb-2"), "Release design for the mobile app.")
+    yield index
+    index.close()
+
+
+def ids(results: list[dict]) -> list[str]:
+    return [result["id"] for result in results]
+
+
+def test_cjk_runs_become_overlapping_bigrams():
+    assert tokenize("会議室") == ["会議", "議室"]
+    assert tokenize("会") == ["会"]
+
+
+def test_words_are_lowercased_and_width_folded():
+    assert tokenize("Budget REVIEW") == ["budget", "review"]
+    assert tokenize("ｶｲｷﾞ") == tokenize("カイギ")
+
+
+def test_mixed_scripts_split_at_script_boundaries():
+    assert tokenize("OneNoteの会議") == ["onenote", "の会", "会議"]
+
+
+def test_cjk_query_matches_by_bigram(index):
+    assert ids(index.search("会議")) == ["p2"]
+    assert ids(index.search("予算")) == ["p2"]
+    assert index.search("会社") == []
+
+
+def test_title_matches_rank_above_body_matches(index):
+    index.add(page("p4", "Budget"), "Numbers for the quarter.")
+
+    assert ids(index.search("budget")) == ["p4", "p1"]
+
+
+def test_segment_round_trip_preserves_results(tmp_path, index):
+    before = index.search("design")
+    index.flush()
+    assert not index.dirty
+    assert index.search("design") == before
+    index.close()
+
+    reopened = SearchIndex(str(tmp_path / "user.idx"))
+    try:
+        assert len(reopened) == 3
+        assert reopened.search("design") == before
+        assert ids(reopened.search("会議")) == ["p2"]
+        assert reopened.versions() == {
+            "p1": "2024-05-01T09:00:00Z",
+            "p2": "2024-05-01T09:00:00Z",
+            "p3": "2024-05-01T09:00:00Z",
+        }
+    finally:
+        reopened.close()
+
+
+def test_updates_and_removals_mask_segment_pages(index):
+    index.flush()
+    index.add(page("p1", "Weekly meeting"), "Hiring plan.")
+    index.remove("p3")
+
+    assert index.search("budget") == []
+    assert ids(index.search("hiring")) == ["p1"]
+    assert index.search("design") == []
+
+    index.flush()
+    assert len(index) == 2
+    assert ids(index.search("hiring")) == ["p1"]
+    assert index.search("design") == []
+
+
+def test_search_filters_by_notebook(index):
+    index.flush()
+
+    assert ids(index.search("design", notebook_id="nb-2")) == ["p3"]
+    assert index.search("design", notebook_id="nb-1") == []
+
+
+def test_results_carry_a_snippet_around_the_match(index):
+    result = index.search("roadmap")[0]
+
+    assert "roadmap" in result["preview"].lower()
+    assert result["score"] > 0
+
+
+@pytest.mark.parametrize("flushed", [False, True])
+def test_single_cjk_character_matches_the_bigrams_it_occurs_in(tmp_path, flushed):
+    index = SearchIndex(str(tmp_path / "user.idx"))
+    index.add(page("p1", "メモ"), "税金の申告")
+    index.add(page("p3", "メモ"), "会議")
+    index.add(page("p4", "税"), "")
+    if flushed:
+        index.flush()
+    # Pages indexed after the flush are matched from the pending delta
+    index.add(page("p2", "メモ"), "納税の期限")
+
+    try:
+        results = {result["id"]: result for result in index.search("税")}
+        assert sorted(results) == ["p1", "p2", "p4"]
+        assert "税金" in results["p1"]["preview"]
+        assert ids(index.search("税金")) == ["p1"]
+    finally:
+        index.close()
@@ -0,0 +1,44 @@
+"""Tests for the tool listing served to MCP clients."""
+
+import asyncio
+
+import pytest
+
+fastmcp = pytest.importorskip("fastmcp")
+
+from src.server import _to_section_group_nodes, mcp  # noqa: E402
+
+
+def test_every_tool_is_listed_with_its_schemas():
+    async def list_tools():
+        async with fastmcp.Client(mcp) as client:
+            return await client.list_tools()
+
+    tools = {tool.name: tool for tool in asyncio.run(list_tools())}
+
+    schema = tools["get_notebook_tree"].outputSchema
+    group = schema["properties"]["section_groups"]["items"]
+    assert "parent_id" in group["properties"]
+    assert "section_groups" not in group["properties"]
+
+
+def test_section_groups_are_flattened_parents_first():
+    walked = [
+        {
+            "id": "g1",
+            "displayName": "G1",
+            "sections": [{"id": "s1", "displayName": "S1", "pages": []}],
+            "sectionGroups": [{"id": "g2", "displayName": "G2", "sectionGroups": []}],
+        },
+        {"id": "g3", "displayName": "G3", "error": "403: Forbidden"},
+    ]
+
+    groups = list(_to_section_group_nodes(walked))
+
+    assert [(group.id, group.parent_id) for group in groups] == [
+        ("g1", None),
+        ("g2", "g1"),
+        ("g3", None),
+    ]
+    assert [section.id for section in groups[0].sections] == ["s1"]
+    assert groups[2].error == "403: Forbidden"
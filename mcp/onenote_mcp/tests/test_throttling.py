@@ -0,0 +1,110 @@
+"""Tests for the AIMD concurrency window of AdaptiveLimiter."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src import throttling
+from src.throttling import AdaptiveLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch) -> SimpleNamespace:
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(throttling, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def complete(limiter: AdaptiveLimiter, latency: float = 0.1, throttled: bool = False) -> None:
+    """Run one request through the limiter."""
+
+    async def run():
+        await limiter.acquire()
+        await limiter.release(latency, throttled)
+
+    asyncio.run(run())
+
+
+def test_window_grows_by_about_one_slot_per_window_of_successes(clock):
+    limiter = AdaptiveLimiter(initial_limit=4, latency_tolerance=0)
+
+    for _ in range(4):
+        complete(limiter)
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+
+    successes = 4
+    while limiter.window < 6:
+        complete(limiter)
+        successes += 1
+    assert successes == pytest.approx(4 + 5, abs=1)
+
+
+def test_window_does_not_grow_past_max_limit(clock):
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=3, latency_tolerance=0)
+
+    for _ in range(50):
+        complete(limiter)
+
+    assert limiter.limit == 3
+
+
+def test_throttling_halves_the_window(clock):
+    limiter = AdaptiveLimiter(initial_limit=16)
+
+    complete(limiter, throttled=True)
+
+    assert limiter.window == 8
+    assert limiter.throttle_events == 1
+
+
+def test_window_does_not_shrink_below_min_limit(clock):
+    limiter = AdaptiveLimiter(initial_limit=4, min_limit=2)
+
+    for _ in range(5):
+        clock.now += 10
+        limiter.on_throttled()
+
+    assert limiter.window == 2
+
+
+def test_decreases_are_spaced_by_the_baseline_latency(clock):
+    limiter = AdaptiveLimiter(initial_limit=16)
+    complete(limiter, latency=1.0)
+
+    limiter.on_throttled()
+    limiter.on_throttled()
+    assert limiter.window == 8
+
+    clock.now += 1.0
+    limiter.on_throttled()
+    assert limiter.window == 4
+
+
+def test_latency_far_above_baseline_shrinks_the_window(clock):
+    limiter = AdaptiveLimiter(initial_limit=8, latency_tolerance=5.0)
+    complete(limiter, latency=0.1)
+
+    complete(limiter, latency=0.4)
+    assert limiter.window == 8
+
+    clock.now += 1.0
+    complete(limiter, latency=1.0)
+    assert limiter.window == 4
+    assert limiter.throttle_events == 0
+
+
+def test_acquire_waits_for_a_free_slot(clock):
+    limiter = AdaptiveLimiter(initial_limit=1, latency_tolerance=0)
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        blocked = not waiter.done()
+        await limiter.release(0.1, throttled=False)
+        await asyncio.wait_for(waiter, timeout=1.0)
+        return blocked
+
+    assert asyncio.run(run())
+    assert limiter.in_flight == 1
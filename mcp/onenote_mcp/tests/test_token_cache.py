@@ -0,0 +1,168 @@
+"""Tests for TokenCache expiry, refresh and coalescing."""
+
+import asyncio
+import dataclasses
+from types import SimpleNamespace
+
+import pytest
+
+from src import token_cache
+from src.token_cache import CachedToken, TokenCache
+
+SCOPES = ("https://graph.microsoft.com/.default",)
+
+
+class Clock:
+    """Monotonic clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class Acquirer:
+    """Token exchange returning a new token per call, optionally gated by an event."""
+
+    def __init__(self, expires_in: int = 3600):
+        self.expires_in = expires_in
+        self.calls = 0
+        self.gate: asyncio.Event | None = None
+
+    async def __call__(self, user_assertion, scopes):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return f"token-{self.calls}", self.expires_in
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(token_cache, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def test_cached_token_is_served_until_refresh(clock):
+    cache = TokenCache(refresh_margin=300.0, expiry_skew=30.0)
+    acquire = Acquirer()
+
+    async def run():
+        first = await cache.get_or_acquire("assertion", SCOPES, acquire)
+        clock.now += 3000
+        second = await cache.get_or_acquire("assertion", SCOPES, acquire)
+        return first, second
+
+    assert asyncio.run(run()) == ("token-1", "token-1")
+    assert acquire.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_refresh_window_serves_cached_token_and_refreshes_in_background(clock):
+    cache = TokenCache(refresh_margin=300.0, expiry_skew=30.0)
+    acquire = Acquirer()
+
+    async def run():
+        await cache.get_or_acquire("assertion", SCOPES, acquire)
+        clock.now += 3600 - 200
+        served = await cache.get_or_acquire("assertion", SCOPES, acquire)
+        await asyncio.sleep(0)
+        refreshed = await cache.get_or_acquire("assertion", SCOPES, acquire)
+        return served, refreshed
+
+    assert asyncio.run(run()) == ("token-1", "token-2")
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_token_within_expiry_skew_is_not_served(clock):
+    cache = TokenCache(refresh_margin=300.0, expiry_skew=30.0)
+    acquire = Acquirer()
+
+    async def run():
+        await cache.get_or_acquire("assertion", SCOPES, acquire)
+        clock.now += 3600 - 10
+        return await cache.get_or_acquire("assertion", SCOPES, acquire)
+
+    assert asyncio.run(run()) == "token-2"
+    assert cache.stats()["misses"] == 2
+
+
+def test_short_lived_token_refreshes_at_half_its_lifetime(clock):
+    cache = TokenCache(refresh_margin=300.0, expiry_skew=0.0)
+    acquire = Acquirer(expires_in=100)
+
+    async def run():
+        await cache.get_or_acquire("assertion", SCOPES, acquire)
+        clock.now += 49
+        await cache.get_or_acquire("assertion", SCOPES, acquire)
+        clock.now += 2
+        await cache.get_or_acquire("assertion", SCOPES, acquire)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert acquire.calls == 2
+
+
+def test_concurrent_misses_share_one_acquisition(clock):
+    cache = TokenCache()
+    acquire = Acquirer()
+
+    async def run():
+        acquire.gate = asyncio.Event()
+        callers = [
+            asyncio.create_task(cache.get_or_acquire("assertion", SCOPES, acquire))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        acquire.gate.set()
+        return await asyncio.gather(*callers)
+
+    assert asyncio.run(run()) == ["token-1"] * 5
+    assert acquire.calls == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_failed_acquisition_is_not_cached(clock):
+    cache = TokenCache()
+
+    async def fail(user_assertion, scopes):
+        return None
+
+    assert asyncio.run(cache.get_or_acquire("assertion", SCOPES, fail)) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_tokens_are_evicted(clock):
+    cache = TokenCache(max_size=2)
+    acquire = Acquirer()
+
+    async def run():
+        for assertion in ("a", "b", "a", "c"):
+            await cache.get_or_acquire(assertion, SCOPES, acquire)
+
+    asyncio.run(run())
+    assert cache.stats()["evictions"] == 1
+    assert cache.make_key("b", SCOPES) not in cache._entries
+    assert cache.make_key("a", SCOPES) in cache._entries
+
+
+def test_invalidate_forces_a_new_acquisition(clock):
+    cache = TokenCache()
+    acquire = Acquirer()
+
+    async def run():
+        await cache.get_or_acquire("assertion", SCOPES, acquire)
+        cache.invalidate("assertion", SCOPES)
+        return await cache.get_or_acquire("assertion", SCOPES, acquire)
+
+    assert asyncio.run(run()) == "token-2"
+
+
+def test_cache_does_not_keep_user_assertions(clock):
+    cache = TokenCache()
+    asyncio.run(cache.get_or_acquire("secret-assertion", SCOPES, Acquirer()))
+
+    fields = {field.name for field in dataclasses.fields(CachedToken)}
+    assert fields == {"access_token", "expires_at", "refresh_at"}
+    assert all("secret-assertion" not in key for key in cache._entries)